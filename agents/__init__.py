@@ -33,3 +33,12 @@ except Exception as e:
 
 # Import agent after initialization is complete
 from .agent import root_agent
+
+# Serve tool metrics for scraping when METRICS_PORT is set
+from .tools.metrics import METRICS_PORT, start_metrics_server
+
+if METRICS_PORT:
+    try:
+        start_metrics_server(int(METRICS_PORT))
+    except (OSError, ValueError) as e:
+        print(f"[METRICS] Could not start metrics server on port {METRICS_PORT}: {str(e)}")
@@ -1,15 +1,26 @@
 """
 Simple Agent using File Search for business data and risk analysis
 Uses sequential pattern: router -> formatter
+
+The formatter renders the sub-agent's structured output in code by default
+and only calls the LLM formatter as a fallback (see agents/formatting).
+Confidently classified queries skip the router's model call (see agents/routing).
 """
 
 from google.adk.agents import LlmAgent, SequentialAgent
 from google.adk.tools.agent_tool import AgentTool
 from .sub_agents.business_data_agent.agent import business_data_agent
 from .sub_agents.risk_analysis_agent.agent import risk_analysis_agent
+from .formatting import ORCHESTRATOR_FORMATTER, CodeFormatterAgent
+from .routing import BUSINESS, FAST_ROUTER, RISK
+from .routing.agent import FastPathRouterAgent
 from .schemas.structured_output import OrchestratorOutput
 from .tools.logging_utils import log_agent_entry, log_agent_exit
 
+# Sub-agents as tools, shared by the LLM router and the fast path
+business_data_tool = AgentTool(business_data_agent)
+risk_analysis_tool = AgentTool(risk_analysis_agent)
+
 # Router agent - calls the appropriate sub-agent
 orchestrator_router = LlmAgent(
     name="orchestrator_router",
@@ -28,15 +39,15 @@ orchestrator_router = LlmAgent(
     3. Store the agent's response for the next agent to format
     """,
     tools=[
-        AgentTool(business_data_agent),
-        AgentTool(risk_analysis_agent),
+        business_data_tool,
+        risk_analysis_tool,
     ],
     output_key="agent_response",
     before_model_callback=log_agent_entry,
     after_model_callback=log_agent_exit
 )
 
-# Formatter agent - formats sub-agent output into OrchestratorOutput
+# LLM formatter agent - formats sub-agent output into OrchestratorOutput
 orchestrator_formatter = LlmAgent(
     name="orchestrator_formatter",
     model="gemini-2.5-flash",
@@ -72,6 +83,7 @@ orchestrator_formatter = LlmAgent(
            - Critical/Medium/Low risks (formatted as lists or tables)
            - Recommendations roadmap
            - Information gaps
+           - Regulation breakdown table, if regulation_breakdown is present
          * Format citations at the end (same format as BusinessDataOutput):
            **Sources:**
            **filename.txt**
@@ -87,11 +99,35 @@ orchestrator_formatter = LlmAgent(
     output_key="formatted_output"
 )
 
+# Code formatter - renders the same output without a model call, LLM as fallback
+if ORCHESTRATOR_FORMATTER == "llm":
+    formatter_agent = orchestrator_formatter
+else:
+    formatter_agent = CodeFormatterAgent(
+        name="orchestrator_code_formatter",
+        description="Formats agent responses into final output in code",
+        input_key="agent_response",
+        output_key="formatted_output",
+        fallback=orchestrator_formatter,
+    )
+
+# Fast-path router - calls the sub-agent directly when the local classifier is confident
+if FAST_ROUTER:
+    router_agent = FastPathRouterAgent(
+        name="fast_path_router",
+        description="Routes clear-cut queries without a model call",
+        routes={BUSINESS: business_data_tool, RISK: risk_analysis_tool},
+        fallback=orchestrator_router,
+        output_key="agent_response",
+    )
+else:
+    router_agent = orchestrator_router
+
 # Main orchestrator using sequential pattern
 root_agent = SequentialAgent(
     name="DocumentSearchAgent",
     sub_agents=[
-        orchestrator_router,
-        orchestrator_formatter
+        router_agent,
+        formatter_agent
     ]
 )
@@ -0,0 +1,15 @@
+"""
+Formatting of sub-agent outputs into the orchestrator's final response.
+
+ORCHESTRATOR_FORMATTER selects how OrchestratorOutput is produced:
+- "code" (default): CodeFormatterAgent renders the markdown in Python and
+  only falls back to the LLM formatter if the sub-agent output doesn't parse
+- "llm": the orchestrator_formatter LLM agent formats every response
+"""
+import os
+
+from .agent import CodeFormatterAgent
+from .markdown import parse_agent_output, render
+
+
+ORCHESTRATOR_FORMATTER = os.getenv("ORCHESTRATOR_FORMATTER", "code").strip().lower()
@@ -0,0 +1,119 @@
+"""
+Code formatter agent: builds OrchestratorOutput from the sub-agent's structured output.
+
+The business and risk sub-agents already return validated pydantic output, so
+turning it into OrchestratorOutput is templating: copy suggested_questions and
+render the rest as markdown (see markdown.py). This agent does that in code
+and only hands over to the LLM formatter when the output can't be parsed.
+"""
+import json
+import logging
+from typing import Any, AsyncGenerator, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from ..schemas.structured_output import OrchestratorOutput
+from ..tools.metrics import counter
+from . import suggestions
+from .markdown import AgentOutput, parse_agent_output, render
+
+
+logger = logging.getLogger(__name__)
+
+# AgentTool names of the sub-agents and the state keys of their outputs
+SUB_AGENT_OUTPUT_KEYS = {
+    "business_data_agent": "business_data_output",
+    "risk_analysis_agent": "risk_analysis_output",
+}
+
+FORMATTER_RUNS = counter("orchestrator_formatter_total", "Orchestrator responses by formatting path", ["path"])
+
+
+class CodeFormatterAgent(BaseAgent):
+    """
+    Formats the router's sub-agent output into OrchestratorOutput without a model call.
+
+    The output is looked up in this invocation's events (the AgentTool function
+    response, or the state delta it forwarded), then in the `input_key` state
+    value. If none of them parse, `fallback` (the LLM formatter) runs instead.
+    """
+
+    input_key: str = "agent_response"
+    output_key: str = "formatted_output"
+    fallback: Optional[BaseAgent] = None
+
+    def model_post_init(self, __context) -> None:
+        # The fallback must be a sub-agent so it is part of the agent tree
+        if self.fallback is not None and self.fallback not in self.sub_agents:
+            self.sub_agents.append(self.fallback)
+        super().model_post_init(__context)
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        output = self._find_output(ctx)
+
+        if output is None:
+            if self.fallback is None:
+                FORMATTER_RUNS.labels("failed").inc()
+                logger.warning("[FORMATTER] No parseable sub-agent output and no fallback")
+                result = OrchestratorOutput(result=str(ctx.session.state.get(self.input_key) or ""))
+                yield self._output_event(ctx, result)
+                return
+            FORMATTER_RUNS.labels("llm_fallback").inc()
+            logger.info("[FORMATTER] Sub-agent output not parseable, using %s", self.fallback.name)
+            async for event in self.fallback.run_async(ctx):
+                yield event
+            return
+
+        FORMATTER_RUNS.labels("code").inc()
+        questions = list(output.suggested_questions)
+        if not questions:
+            # Business answers formatted in code leave their follow-up questions
+            # generating in the background; pick them up within their budget
+            questions = await suggestions.collect(latest_state_delta(ctx, suggestions.STATE_KEY))
+        result = OrchestratorOutput(result=render(output), suggested_questions=questions)
+        yield self._output_event(ctx, result)
+
+    def _find_output(self, ctx: InvocationContext) -> Optional[AgentOutput]:
+        """The most recent sub-agent output of the current invocation."""
+        for event in reversed(ctx.session.events):
+            if event.invocation_id != ctx.invocation_id:
+                break
+            for response in event.get_function_responses():
+                if response.name in SUB_AGENT_OUTPUT_KEYS:
+                    output = parse_agent_output(response.response)
+                    if output is None and isinstance(response.response, dict):
+                        # AgentTool wraps plain-text results as {"result": text}
+                        output = parse_agent_output(response.response.get("result"))
+                    if output is not None:
+                        return output
+            state_delta = event.actions.state_delta if event.actions else {}
+            for key in SUB_AGENT_OUTPUT_KEYS.values():
+                if key in state_delta:
+                    output = parse_agent_output(state_delta[key])
+                    if output is not None:
+                        return output
+        return parse_agent_output(ctx.session.state.get(self.input_key))
+
+    def _output_event(self, ctx: InvocationContext, output: OrchestratorOutput) -> Event:
+        # Same shape as an LlmAgent with output_schema: JSON text plus the dict in state
+        data = output.model_dump()
+        return Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=json.dumps(data, ensure_ascii=False))]),
+            actions=EventActions(state_delta={self.output_key: data}),
+        )
+
+
+def latest_state_delta(ctx: InvocationContext, key: str) -> Any:
+    """The last value written to state `key` during the current invocation (None if not written)."""
+    for event in reversed(ctx.session.events):
+        if event.invocation_id != ctx.invocation_id:
+            break
+        if event.actions and key in event.actions.state_delta:
+            return event.actions.state_delta[key]
+    return None
@@ -0,0 +1,114 @@
+"""
+Code formatter for the business data agent.
+
+The retriever's search tool already returns the answer and citations, so
+BusinessDataOutput is assembled from the tool result directly instead of by
+an LLM copying it (which could also mangle citations):
+
+- store_search_result (after_tool_callback on the retriever) keeps a
+  successful result in state, starts the follow-up question generation and
+  skips the retriever's summarization call
+- BusinessFormatterAgent builds BusinessDataOutput from the stored result,
+  falling back to the LLM formatter if there is none (e.g. the search failed)
+"""
+import json
+import logging
+from typing import Any, AsyncGenerator, Dict, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from ..schemas.structured_output import BusinessDataOutput, Citation
+from ..tools.metrics import counter
+from . import suggestions
+from .agent import latest_state_delta
+
+
+logger = logging.getLogger(__name__)
+
+# Session state keys
+SEARCH_RESULT_KEY = "business_search_result"
+SUGGESTIONS_KEY = suggestions.STATE_KEY
+
+# Tools whose result is formatted in code
+SEARCH_TOOLS = ("search_file_search_store_async", "search_file_search_store")
+
+BUSINESS_FORMATTER_RUNS = counter("business_formatter_total", "Business responses by formatting path", ["path"])
+
+
+def store_search_result(tool, args: Dict[str, Any], tool_context, tool_response: Any) -> Optional[Dict]:
+    """after_tool_callback: keep a successful search result for BusinessFormatterAgent."""
+    if tool.name not in SEARCH_TOOLS or not isinstance(tool_response, dict) or not tool_response.get("success"):
+        return None
+    tool_context.state[SEARCH_RESULT_KEY] = {
+        "answer": tool_response.get("answer") or "",
+        "citations": tool_response.get("citations") or [],
+        "message": tool_response.get("message") or "Search completed successfully",
+    }
+    tool_context.state[SUGGESTIONS_KEY] = suggestions.start(args.get("query", ""), tool_response.get("answer") or "")
+    # The formatter uses the stored result; the model needn't summarize it
+    tool_context.actions.skip_summarization = True
+    return None
+
+
+class BusinessFormatterAgent(BaseAgent):
+    """
+    Builds BusinessDataOutput from the stored search result without a model call.
+
+    Follow-up questions are included if ready. With wait_for_suggestions they
+    are awaited within the suggestions budget; otherwise the pending key stays
+    in state so the orchestrator's code formatter can collect them after the
+    router's final model call.
+    """
+
+    output_key: str = "business_data_output"
+    wait_for_suggestions: bool = False
+    fallback: Optional[BaseAgent] = None
+
+    def model_post_init(self, __context) -> None:
+        # The fallback must be a sub-agent so it is part of the agent tree
+        if self.fallback is not None and self.fallback not in self.sub_agents:
+            self.sub_agents.append(self.fallback)
+        super().model_post_init(__context)
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        stored = latest_state_delta(ctx, SEARCH_RESULT_KEY)
+        if stored is None:
+            if self.fallback is None:
+                BUSINESS_FORMATTER_RUNS.labels("failed").inc()
+                logger.warning("[FORMATTER] No search result to format and no fallback")
+                return
+            BUSINESS_FORMATTER_RUNS.labels("llm_fallback").inc()
+            logger.info("[FORMATTER] No search result stored, using %s", self.fallback.name)
+            async for event in self.fallback.run_async(ctx):
+                yield event
+            return
+
+        BUSINESS_FORMATTER_RUNS.labels("code").inc()
+        key = latest_state_delta(ctx, SUGGESTIONS_KEY)
+        questions = await suggestions.collect(key, wait=self.wait_for_suggestions)
+        output = BusinessDataOutput(
+            operation="search",
+            success=True,
+            message=stored["message"],
+            answer=stored["answer"],
+            citations=[
+                Citation(source=c.get("source") or "Unknown source", content=c.get("content") or "")
+                for c in stored["citations"] if isinstance(c, dict)
+            ],
+            suggested_questions=questions,
+        )
+
+        data = output.model_dump()
+        state_delta = {self.output_key: data, SEARCH_RESULT_KEY: None}
+        if questions:
+            state_delta[SUGGESTIONS_KEY] = None
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=json.dumps(data, ensure_ascii=False))]),
+            actions=EventActions(state_delta=state_delta),
+        )
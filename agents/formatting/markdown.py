@@ -0,0 +1,184 @@
+"""
+Markdown rendering of sub-agent outputs.
+
+Turns BusinessDataOutput and RiskAnalysisOutput into the markdown shown in the
+chat UI, in the same layout the orchestrator_formatter LLM was instructed to
+produce: the answer or risk report first, then a sources block.
+"""
+import json
+import re
+from typing import Any, Iterable, List, Optional, Union
+
+from pydantic import BaseModel, ValidationError
+
+from ..schemas.structured_output import BusinessDataOutput, Citation, RiskAnalysisOutput, RiskItem
+
+
+AgentOutput = Union[BusinessDataOutput, RiskAnalysisOutput]
+
+# Keys only a RiskAnalysisOutput has
+_RISK_KEYS = ("executive_summary", "overall_risk_level", "critical_risks", "recommendations_roadmap")
+
+_FENCE = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.DOTALL)
+
+
+def parse_agent_output(value: Any) -> Optional[AgentOutput]:
+    """
+    Validate a sub-agent output (dict or JSON text) as BusinessDataOutput or RiskAnalysisOutput.
+
+    JSON wrapped in a markdown code fence is accepted. Returns None if the
+    value is neither.
+    """
+    if isinstance(value, BaseModel):
+        value = value.model_dump()
+    if isinstance(value, str):
+        text = value.strip()
+        match = _FENCE.search(text)
+        if match:
+            text = match.group(1)
+        try:
+            value = json.loads(text)
+        except ValueError:
+            return None
+    if not isinstance(value, dict):
+        return None
+
+    schema = RiskAnalysisOutput if any(key in value for key in _RISK_KEYS) else BusinessDataOutput
+    try:
+        return schema.model_validate(value)
+    except ValidationError:
+        return None
+
+
+def render(output: AgentOutput) -> str:
+    """Markdown for a sub-agent output."""
+    if isinstance(output, RiskAnalysisOutput):
+        return render_risk_analysis(output)
+    return render_business_data(output)
+
+
+def render_business_data(output: BusinessDataOutput) -> str:
+    """Answer followed by its sources."""
+    answer = (output.answer or "").strip()
+    if not answer:
+        answer = output.message.strip() if output.message else "No answer was found in the documents."
+    return _join([answer, render_sources(output.citations)])
+
+
+def render_risk_analysis(output: RiskAnalysisOutput) -> str:
+    """Risk report: summary, risk tables, roadmap, gaps and sources."""
+    sections = [f"## {output.regulation_name} Compliance Risk Assessment"]
+
+    if not output.regulation_available:
+        sections.append(
+            f"> **Note:** {output.regulation_name} was not found in the regulation documents, "
+            "so this assessment may be incomplete."
+        )
+
+    overview = f"**Overall risk level:** {output.overall_risk_level}"
+    if output.compliance_score is not None:
+        overview += f"  \n**Compliance score:** {output.compliance_score}/100"
+    sections.append(overview)
+
+    sections.append("### Executive Summary\n\n" + output.executive_summary.strip())
+
+    if output.regulation_breakdown:
+        sections.append("### Regulation Breakdown\n\n" + render_breakdown_table(output))
+
+    for heading, risks in (
+        ("Critical Risks", output.critical_risks),
+        ("Medium Risks", output.medium_risks),
+        ("Low Risks", output.low_risks),
+    ):
+        if risks:
+            sections.append(f"### {heading} ({len(risks)})\n\n" + render_risk_table(risks))
+
+    if output.recommendations_roadmap.strip():
+        sections.append("### Recommendations Roadmap\n\n" + output.recommendations_roadmap.strip())
+
+    if output.information_gaps:
+        sections.append("### Information Gaps\n\n" + _bullets(output.information_gaps))
+
+    if output.regulation_sections_analyzed:
+        sections.append("**Sections analyzed:** " + ", ".join(output.regulation_sections_analyzed))
+
+    sections.append(render_sources(output.citations))
+    return _join(sections)
+
+
+def render_risk_table(risks: List[RiskItem]) -> str:
+    """Markdown table with one row per risk."""
+    rows = [
+        "| Risk | Section | Current State | Requirement | Recommended Action |",
+        "| --- | --- | --- | --- | --- |",
+    ]
+    for risk in risks:
+        title = risk.title
+        if risk.processing_activity:
+            title += f" ({risk.processing_activity})"
+        rows.append("| " + " | ".join(_cell(value) for value in (
+            title,
+            risk.regulation_section or "-",
+            risk.current_state,
+            risk.requirement,
+            risk.recommended_action,
+        )) + " |")
+    return "\n".join(rows)
+
+
+def render_breakdown_table(output: RiskAnalysisOutput) -> str:
+    """Markdown table with one row per regulation of a multi-regulation analysis."""
+    rows = [
+        "| Regulation | Risk Level | Score | Critical | Medium | Low |",
+        "| --- | --- | --- | --- | --- | --- |",
+    ]
+    for item in output.regulation_breakdown:
+        name = item.regulation_name if item.regulation_available else f"{item.regulation_name} (not found)"
+        score = f"{item.compliance_score}/100" if item.compliance_score is not None else "-"
+        rows.append("| " + " | ".join(_cell(str(value)) for value in (
+            name, item.overall_risk_level, score,
+            item.critical_risk_count, item.medium_risk_count, item.low_risk_count,
+        )) + " |")
+    return "\n".join(rows)
+
+
+def render_sources(citations: Iterable[Citation]) -> str:
+    """
+    Sources block, citations grouped by document:
+
+        **Sources:**
+
+        **filename.txt**
+        > citation content
+    """
+    grouped = {}
+    for citation in citations:
+        content = (citation.content or "").strip()
+        snippets = grouped.setdefault(citation.source or "Unknown source", [])
+        if content and content not in snippets:
+            snippets.append(content)
+    if not grouped:
+        return ""
+
+    blocks = ["**Sources:**"]
+    for source, snippets in grouped.items():
+        quotes = "\n>\n".join(_quote(snippet) for snippet in snippets)
+        blocks.append(f"**{source}**" + ("\n" + quotes if quotes else ""))
+    return "\n\n".join(blocks)
+
+
+def _quote(text: str) -> str:
+    return "\n".join("> " + line if line.strip() else ">" for line in text.splitlines())
+
+
+def _cell(value: str) -> str:
+    # Table cells must stay on one line and must not contain unescaped pipes
+    return " ".join((value or "").split()).replace("|", "\\|") or "-"
+
+
+def _bullets(items: Iterable[str]) -> str:
+    return "\n".join(f"- {item.strip()}" for item in items if item and item.strip())
+
+
+def _join(sections: Iterable[str]) -> str:
+    return "\n\n".join(section for section in sections if section)
@@ -0,0 +1,135 @@
+"""
+Follow-up question generation off the critical path.
+
+start() launches a small model call for 3-5 follow-up questions as soon as the
+search result is known and returns a key; collect() picks the questions up
+later, waiting at most until SUGGESTED_QUESTIONS_BUDGET_MS after the start.
+Questions that aren't ready by then are skipped (empty list) rather than
+delaying the answer.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from google.genai import types
+
+from ..tools.metrics import counter, histogram
+
+
+# Small model used only for follow-up questions
+SUGGESTED_QUESTIONS_MODEL = os.getenv("SUGGESTED_QUESTIONS_MODEL", "gemini-2.5-flash-lite")
+
+# Longest the answer waits for the questions, counted from start()
+SUGGESTED_QUESTIONS_BUDGET_MS = int(os.getenv("SUGGESTED_QUESTIONS_BUDGET_MS", "2000"))
+
+# Session state key holding the key of a pending generation
+STATE_KEY = "pending_suggested_questions"
+
+# Generations kept for collection; the oldest uncollected ones are dropped
+MAX_PENDING = 1000
+
+# Characters of the answer given to the question model
+MAX_ANSWER_CHARS = 4000
+
+SUGGESTIONS = counter("suggested_questions_total", "Follow-up question generations by outcome", ["outcome"])
+SUGGESTIONS_LATENCY = histogram("suggested_questions_duration_seconds", "Follow-up question generation latency")
+
+logger = logging.getLogger(__name__)
+
+_pending: "OrderedDict[str, Tuple[asyncio.Task, float]]" = OrderedDict()
+
+_PROMPT = """A user asked a question about their organization's business documents and got the answer below.
+Suggest 3 to 5 short follow-up questions the user might ask next about the same documents.
+Return a JSON array of strings only.
+
+Question: {question}
+
+Answer:
+{answer}
+"""
+
+
+def start(question: str, answer: str) -> Optional[str]:
+    """Start generating follow-up questions in the background; returns the key for collect()."""
+    if SUGGESTED_QUESTIONS_BUDGET_MS <= 0:
+        SUGGESTIONS.labels("disabled").inc()
+        return None
+    try:
+        task = asyncio.get_running_loop().create_task(_generate(question, answer))
+    except RuntimeError:
+        # No running event loop (synchronous caller)
+        return None
+    key = uuid.uuid4().hex
+    _pending[key] = (task, time.monotonic())
+    while len(_pending) > MAX_PENDING:
+        _, (old_task, _) = _pending.popitem(last=False)
+        old_task.cancel()
+    return key
+
+
+async def collect(key: Optional[str], wait: bool = True) -> List[str]:
+    """
+    The questions generated for `key`, or [] if they aren't ready within the budget.
+
+    With wait=False only questions that are already done are returned, and a
+    pending generation is left for a later collect().
+    """
+    entry = _pending.get(key) if key else None
+    if entry is None:
+        return []
+    task, started = entry
+    if not task.done():
+        if not wait:
+            return []
+        remaining = started + SUGGESTED_QUESTIONS_BUDGET_MS / 1000 - time.monotonic()
+        if remaining > 0:
+            await asyncio.wait({task}, timeout=remaining)
+    _pending.pop(key, None)
+
+    if not task.done():
+        task.cancel()
+        SUGGESTIONS.labels("timeout").inc()
+        logger.info("[SUGGESTIONS] Skipped follow-up questions after %d ms budget", SUGGESTED_QUESTIONS_BUDGET_MS)
+        return []
+    if task.cancelled() or task.exception() is not None:
+        SUGGESTIONS.labels("error").inc()
+        if not task.cancelled():
+            logger.warning("[SUGGESTIONS] Follow-up question generation failed: %s", task.exception())
+        return []
+    SUGGESTIONS.labels("ready").inc()
+    return task.result()
+
+
+async def _generate(question: str, answer: str) -> List[str]:
+    # Shares the search tools' client and its connection pool
+    from ..tools.file_search_tools import client
+
+    started = time.perf_counter()
+    response = await client.aio.models.generate_content(
+        model=SUGGESTED_QUESTIONS_MODEL,
+        contents=_PROMPT.format(question=question, answer=answer[:MAX_ANSWER_CHARS]),
+        config=types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_schema=list[str],
+            temperature=0.4,
+            max_output_tokens=256,
+        ),
+    )
+    SUGGESTIONS_LATENCY.observe(time.perf_counter() - started)
+    return parse_questions(response.text)
+
+
+def parse_questions(text: Optional[str]) -> List[str]:
+    """Up to five non-empty questions from the model's JSON array."""
+    try:
+        questions = json.loads(text or "[]")
+    except ValueError:
+        return []
+    if not isinstance(questions, list):
+        return []
+    return [q.strip() for q in questions if isinstance(q, str) and q.strip()][:5]
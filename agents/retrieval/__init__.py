@@ -0,0 +1,71 @@
+"""
+Pluggable retrieval backends for the search tools.
+
+RETRIEVAL_BACKEND selects where search_file_search_store gets its answers:
+- "file_search" (default): the remote Gemini File Search store
+- "bm25": a local BM25 index over data/ and regulations/
+- "vector": a local memory-mapped embedding index over the same corpus
+"""
+import os
+import threading
+from typing import Callable, Dict, Optional
+
+from .base import RetrievalBackend
+
+
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "file_search").strip().lower()
+
+# The remote File Search store is served by the search tools themselves
+FILE_SEARCH_BACKEND = "file_search"
+
+
+def _bm25() -> RetrievalBackend:
+    from .bm25 import BM25Backend
+    return BM25Backend()
+
+
+def _vector() -> RetrievalBackend:
+    from .vector_index import VectorBackend
+    return VectorBackend()
+
+
+_factories: Dict[str, Callable[[], RetrievalBackend]] = {
+    "bm25": _bm25,
+    "vector": _vector,
+}
+_backends: Dict[str, RetrievalBackend] = {}
+_lock = threading.Lock()
+
+
+def register_backend(name: str, factory: Callable[[], RetrievalBackend]) -> None:
+    """Make a backend selectable via RETRIEVAL_BACKEND."""
+    _factories[name] = factory
+
+
+def get_backend(name: str = None) -> Optional[RetrievalBackend]:
+    """
+    Get the local backend with the given name (default: RETRIEVAL_BACKEND).
+
+    Returns None for the File Search backend, which the search tools handle.
+    """
+    name = (name or RETRIEVAL_BACKEND).lower()
+    if name == FILE_SEARCH_BACKEND:
+        return None
+    if name not in _backends:
+        if name not in _factories:
+            raise ValueError(
+                f"Unknown retrieval backend: {name}. "
+                f"Valid backends: {', '.join([FILE_SEARCH_BACKEND] + sorted(_factories))}"
+            )
+        with _lock:
+            if name not in _backends:
+                _backends[name] = _factories[name]()
+    return _backends[name]
+
+
+__all__ = [
+    "RetrievalBackend",
+    "RETRIEVAL_BACKEND",
+    "get_backend",
+    "register_backend",
+]
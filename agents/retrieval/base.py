@@ -0,0 +1,73 @@
+"""
+Retrieval backend interface.
+
+A backend answers a query from some document index and returns the same
+{answer, citations} shape as the File Search tools, so search_file_search_store
+can serve queries from a local index instead of the remote store.
+"""
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+from ..tools.grounding import MAX_CITATION_CONTENT, citation_id
+
+
+class RetrievalBackend(ABC):
+    """Base class for retrieval backends."""
+
+    # Name used to select the backend via RETRIEVAL_BACKEND
+    name: str = ""
+
+    @abstractmethod
+    def search(self, query: str, top_k: int = None, filters: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Search the backend's index.
+
+        Args:
+            query: The search query
+            top_k: Maximum number of passages to return (backend default if None)
+            filters: Normalized metadata filters (see tools/search_filters.py);
+                only chunks whose metadata matches every filter are returned
+
+        Returns:
+            {"answer": str, "citations": [{"id", "source", "content", "score", ...}]}
+        """
+
+    async def asearch(self, query: str, top_k: int = None, filters: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Async search(); runs in a worker thread unless a backend overrides it."""
+        return await asyncio.to_thread(self.search, query, top_k, filters)
+
+
+def chunk_citation(chunk: Dict[str, Any], score: float) -> Dict[str, Any]:
+    """
+    Citation for a local chunk record (see corpus.iter_file_records).
+
+    Besides the usual citation keys it carries "offsets" ([char_start,
+    char_end] in the source document) and the section "heading", so the
+    passage can be located in the original file.
+    """
+    content = chunk["text"][:MAX_CITATION_CONTENT]
+    citation = {
+        "id": citation_id(chunk["source"], content),
+        "source": chunk["source"],
+        "content": content,
+        "score": round(score, 4),
+    }
+    if chunk.get("pages"):
+        citation["pages"] = chunk["pages"]
+    if "char_start" in chunk:
+        citation["offsets"] = [chunk["char_start"], chunk["char_end"]]
+    if chunk.get("heading"):
+        citation["heading"] = chunk["heading"]
+    return citation
+
+
+def extractive_answer(citations: List[Dict[str, Any]]) -> str:
+    """Answer text for local backends: the retrieved passages, best first."""
+    if not citations:
+        return "No relevant passages were found in the local corpus."
+    passages = [
+        f"[{i}] {citation['source']}:\n{citation['content']}"
+        for i, citation in enumerate(citations, start=1)
+    ]
+    return "Most relevant passages from the local corpus:\n\n" + "\n\n".join(passages)
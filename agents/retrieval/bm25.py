@@ -0,0 +1,182 @@
+"""
+Local BM25 retrieval backend.
+
+An inverted index over chunked documents from the local corpus (see corpus.py),
+scored with Okapi BM25. The index is persisted to LOCAL_INDEX_DIR and reused
+until a corpus file changes, so startup does not re-read or re-tokenize the
+corpus (PDF text extraction alone takes seconds).
+"""
+import asyncio
+import gzip
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+
+from .base import RetrievalBackend, chunk_citation, extractive_answer
+from .chunker import CHUNKER_VERSION
+from .corpus import LOCAL_INDEX_DIR, corpus_fingerprint, load_chunks
+from ..tools.search_filters import matches
+
+
+# Passages returned per query
+BM25_TOP_K = int(os.getenv("BM25_TOP_K", "5"))
+
+# Bump when the on-disk format or tokenization changes (chunking changes are
+# tracked by CHUNKER_VERSION)
+INDEX_VERSION = 3
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+_STOPWORDS = frozenset("""
+a an and are as at be by for from has have how in is it its of on or that the
+their there these this to was were what when where which who why will with
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens without stopwords."""
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class BM25Index:
+    """Inverted index with BM25 scoring."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.chunks: List[Dict[str, Any]] = []
+        self.doc_lengths: List[int] = []
+        self.postings: Dict[str, List[List[int]]] = {}  # term -> [[chunk_id, term_freq], ...]
+        self.idf: Dict[str, float] = {}
+        self.avg_length = 0.0
+
+    @classmethod
+    def build(cls, chunks: List[Dict[str, Any]], **params) -> "BM25Index":
+        index = cls(**params)
+        index.chunks = chunks
+        for chunk_id, chunk in enumerate(chunks):
+            counts = Counter(tokenize(chunk["text"]))
+            index.doc_lengths.append(sum(counts.values()))
+            for term, freq in counts.items():
+                index.postings.setdefault(term, []).append([chunk_id, freq])
+        index._finalize()
+        return index
+
+    def _finalize(self) -> None:
+        n = len(self.chunks)
+        self.avg_length = (sum(self.doc_lengths) / n) if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(plist) + 0.5) / (len(plist) + 0.5))
+            for term, plist in self.postings.items()
+        }
+
+    def search(self, query: str, top_k: int = BM25_TOP_K, filters: Optional[Dict[str, str]] = None) -> List[tuple]:
+        """Return [(score, chunk_id), ...] for the best top_k chunks matching the filters."""
+        scores: Dict[int, float] = {}
+        k1, b, avg = self.k1, self.b, self.avg_length or 1.0
+        lengths = self.doc_lengths
+        for term in set(tokenize(query)):
+            plist = self.postings.get(term)
+            if not plist:
+                continue
+            idf = self.idf[term]
+            for chunk_id, freq in plist:
+                norm = k1 * (1 - b + b * lengths[chunk_id] / avg)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * freq * (k1 + 1) / (freq + norm)
+        candidates = ((score, chunk_id) for chunk_id, score in scores.items())
+        if filters:
+            chunks = self.chunks
+            candidates = (c for c in candidates if matches(chunks[c[1]]["metadata"], filters))
+        return heapq.nlargest(top_k, candidates)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "k1": self.k1,
+            "b": self.b,
+            "chunks": self.chunks,
+            "doc_lengths": self.doc_lengths,
+            "postings": self.postings,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BM25Index":
+        index = cls(k1=data["k1"], b=data["b"])
+        index.chunks = data["chunks"]
+        index.doc_lengths = data["doc_lengths"]
+        index.postings = data["postings"]
+        index._finalize()
+        return index
+
+
+class BM25Backend(RetrievalBackend):
+    """Retrieval backend serving queries from a persisted local BM25 index."""
+
+    name = "bm25"
+
+    def __init__(self, dirs: Sequence[str] = None, index_dir: str = LOCAL_INDEX_DIR, top_k: int = BM25_TOP_K):
+        self.dirs = dirs
+        self.index_path = os.path.join(index_dir, "bm25_index.json.gz")
+        self.top_k = top_k
+        self._index: Optional[BM25Index] = None
+        self._lock = threading.Lock()
+
+    @property
+    def index(self) -> BM25Index:
+        """The index, loaded from disk or built on first use."""
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self._load_or_build()
+        return self._index
+
+    def search(self, query: str, top_k: int = None, filters: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        index = self.index
+        citations = [
+            chunk_citation(index.chunks[chunk_id], score)
+            for score, chunk_id in index.search(query, top_k or self.top_k, filters)
+        ]
+        return {"answer": extractive_answer(citations), "citations": citations}
+
+    async def asearch(self, query: str, top_k: int = None, filters: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        # Queries take milliseconds; only the first load is worth a thread
+        if self._index is None:
+            return await asyncio.to_thread(self.search, query, top_k, filters)
+        return self.search(query, top_k, filters)
+
+    def _load_or_build(self) -> BM25Index:
+        fingerprint = [list(entry) for entry in corpus_fingerprint(self.dirs)]
+
+        if os.path.exists(self.index_path):
+            try:
+                with gzip.open(self.index_path, "rt", encoding="utf-8") as f:
+                    data = json.load(f)
+                if (data.get("version") == INDEX_VERSION
+                        and data.get("chunker") == CHUNKER_VERSION
+                        and data.get("fingerprint") == fingerprint):
+                    print(f"[BM25] Loaded index from {self.index_path}")
+                    return BM25Index.from_dict(data["index"])
+                print("[BM25] Corpus changed since the index was built, rebuilding")
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[BM25] Could not load index, rebuilding: {str(e)}")
+
+        index = BM25Index.build(load_chunks(self.dirs))
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            tmp_path = f"{self.index_path}.tmp"
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump({
+                    "version": INDEX_VERSION,
+                    "chunker": CHUNKER_VERSION,
+                    "fingerprint": fingerprint,
+                    "index": index.to_dict()
+                }, f)
+            os.replace(tmp_path, self.index_path)
+            print(f"[BM25] Saved index with {len(index.chunks)} chunks to {self.index_path}")
+        except OSError as e:
+            print(f"[BM25] Could not save index: {str(e)}")
+        return index
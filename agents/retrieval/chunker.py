@@ -0,0 +1,268 @@
+"""
+Streaming document chunker.
+
+Splits Markdown, plain text and extracted PDF text into chunks of at most
+DEFAULT_CHUNK_SIZE words, carrying the last DEFAULT_CHUNK_OVERLAP words of a
+chunk over into the next one. Files are read line by line, so memory use is
+bounded by one chunk plus the overlap no matter how large the file is.
+
+Chunks start at section headings (Markdown "#" headings and setext headings
+underlined with "===" or "---", as used by the .txt business documents), and
+overlap is only carried within a section. A heading directly followed by
+another heading (e.g. "## Processing Activities" then "### Payroll") is kept
+with the text under the second one instead of becoming a chunk of its own.
+Each chunk records where it came from:
+
+    Chunk(text="## Purpose\\nThis document ...", char_start=181, char_end=377,
+          byte_start=181, byte_end=377, content_hash="9c1e...",
+          heading="Purpose", pages=None)
+
+Offsets index the decoded text of the file (char_*) and its UTF-8 encoding
+(byte_*), so file_text[char_start:char_end] == chunk.text. For PDFs they index
+the extracted text, with pages joined by a blank line, and pages holds the
+first and last page of the chunk. PDF text extraction needs the optional pypdf
+package; without it PDFs are skipped with a warning.
+"""
+import hashlib
+import os
+import re
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # pragma: no cover - optional dependency
+    PdfReader = None
+
+from ..config import DEFAULT_CHUNK_OVERLAP, DEFAULT_CHUNK_SIZE
+
+
+# Longest line read in one piece; longer lines are read (and split) in pieces
+MAX_LINE_CHARS = 64 * 1024
+
+# Bump when chunk boundaries change so persisted indexes are rebuilt
+CHUNKER_VERSION = 2
+
+_WORD = re.compile(r"\w+")
+_ATX_HEADING = re.compile(r"^\s{0,3}(#{1,6})\s+(.*?)\s*#*\s*$")
+_SETEXT_UNDERLINE = re.compile(r"^\s{0,3}(={3,}|-{3,})\s*$")
+
+
+class Line(NamedTuple):
+    """A piece of a document with its position in the document."""
+    text: str
+    char_start: int
+    byte_start: int
+    page: Optional[int] = None
+
+
+class Chunk(NamedTuple):
+    """A chunk of a document; text is exactly document[char_start:char_end]."""
+    text: str
+    char_start: int
+    char_end: int
+    byte_start: int
+    byte_end: int
+    content_hash: str
+    heading: Optional[str] = None
+    pages: Optional[Tuple[int, int]] = None
+
+
+def content_hash(text: str) -> str:
+    """Whitespace-insensitive hash of chunk text."""
+    return hashlib.sha1(" ".join(text.split()).encode("utf-8")).hexdigest()[:16]
+
+
+def iter_text_lines(path: str, max_line_chars: int = MAX_LINE_CHARS) -> Iterator[Line]:
+    """Stream a text file as lines (line endings kept), with offsets."""
+    char_offset = 0
+    byte_offset = 0
+    # newline="" keeps "\r\n" so byte offsets match the file
+    with open(path, "r", encoding="utf-8", errors="replace", newline="") as f:
+        while True:
+            text = f.readline(max_line_chars)
+            if not text:
+                break
+            yield Line(text, char_offset, byte_offset)
+            char_offset += len(text)
+            byte_offset += len(text.encode("utf-8"))
+
+
+def iter_pdf_lines(path: str) -> Iterator[Line]:
+    """Stream the extracted text of a PDF page by page, as lines with offsets."""
+    if PdfReader is None:
+        print(f"[CHUNKER] pypdf is not installed, skipping {os.path.basename(path)}")
+        return
+    char_offset = 0
+    byte_offset = 0
+    for page_number, page in enumerate(PdfReader(path).pages, start=1):
+        page_text = page.extract_text() or ""
+        if page_number > 1:
+            page_text = "\n\n" + page_text
+        for text in page_text.splitlines(keepends=True):
+            yield Line(text, char_offset, byte_offset, page_number)
+            char_offset += len(text)
+            byte_offset += len(text.encode("utf-8"))
+
+
+def iter_string_lines(text: str) -> Iterator[Line]:
+    """Lines of an in-memory string, with offsets."""
+    char_offset = 0
+    byte_offset = 0
+    for line in text.splitlines(keepends=True):
+        yield Line(line, char_offset, byte_offset)
+        char_offset += len(line)
+        byte_offset += len(line.encode("utf-8"))
+
+
+def iter_document_lines(path: str) -> Iterator[Line]:
+    """Lines of a corpus file, extracting text from PDFs."""
+    if os.path.splitext(path)[1].lower() == ".pdf":
+        return iter_pdf_lines(path)
+    return iter_text_lines(path)
+
+
+def iter_chunks(
+    lines: Iterable[Line],
+    max_words: int = DEFAULT_CHUNK_SIZE,
+    overlap_words: int = DEFAULT_CHUNK_OVERLAP
+) -> Iterator[Chunk]:
+    """
+    Group a stream of lines into chunks.
+
+    Args:
+        lines: Consecutive pieces of one document (see iter_document_lines)
+        max_words: Maximum words per chunk (headings carried into a chunk
+            can add a few more)
+        overlap_words: Words of the previous chunk repeated at the start of the
+            next one when a section is longer than max_words
+
+    Yields:
+        Chunk records in document order
+    """
+    overlap_words = min(overlap_words, max_words // 2)
+    buffer: List[Tuple[Line, int]] = []  # (line, word count)
+    words = 0
+    new_words = 0  # words not already emitted as part of the previous chunk
+    body_words = 0  # new words outside heading lines
+    heading = None
+    chunk_heading = None
+
+    for line, line_heading in _with_headings(lines):
+        if line_heading is not None:
+            # A heading starts a new chunk, without overlap; headings with no
+            # text of their own yet stay in the buffer for the next one
+            if body_words:
+                yield _make_chunk(buffer, chunk_heading)
+                buffer, words, new_words, body_words = [], 0, 0, 0
+            elif not new_words:
+                buffer, words = [], 0
+            heading = line_heading
+
+        # Long lines are cut with room left for the overlap
+        for piece in _split_line(line, max_words, max_words - overlap_words):
+            piece_words = len(_WORD.findall(piece.text))
+            if body_words and words + piece_words > max_words:
+                yield _make_chunk(buffer, chunk_heading)
+                buffer = _overlap(buffer, min(overlap_words, max_words - piece_words))
+                words, new_words, body_words = sum(n for _, n in buffer), 0, 0
+            if not body_words:
+                chunk_heading = heading
+            buffer.append((piece, piece_words))
+            words += piece_words
+            new_words += piece_words
+            if line_heading is None:
+                body_words += piece_words
+
+    if new_words:
+        yield _make_chunk(buffer, chunk_heading)
+
+
+def iter_file_chunks(
+    path: str,
+    max_words: int = DEFAULT_CHUNK_SIZE,
+    overlap_words: int = DEFAULT_CHUNK_OVERLAP
+) -> Iterator[Chunk]:
+    """Stream the chunks of a corpus file."""
+    return iter_chunks(iter_document_lines(path), max_words, overlap_words)
+
+
+def _with_headings(lines: Iterable[Line]) -> Iterator[Tuple[Line, Optional[str]]]:
+    """Pair each line with its heading text, or None if it is not a heading."""
+    pending: Optional[Line] = None
+    for line in lines:
+        if pending is not None:
+            heading = None
+            if pending.text.strip() and _SETEXT_UNDERLINE.match(line.text):
+                heading = pending.text.strip()
+            else:
+                match = _ATX_HEADING.match(pending.text)
+                if match:
+                    heading = match.group(2)
+            yield pending, heading
+        pending = line
+    if pending is not None:
+        match = _ATX_HEADING.match(pending.text)
+        yield pending, match.group(2) if match else None
+
+
+def _split_line(line: Line, max_words: int, piece_words: int) -> Iterator[Line]:
+    """Split a line with more than max_words words into pieces of piece_words words."""
+    starts = [m.start() for m in _WORD.finditer(line.text)]
+    if len(starts) <= max_words:
+        yield line
+        return
+    piece_words = max(1, piece_words)
+    cuts = [0] + starts[piece_words::piece_words] + [len(line.text)]
+    byte_start = line.byte_start
+    for start, end in zip(cuts, cuts[1:]):
+        text = line.text[start:end]
+        yield Line(text, line.char_start + start, byte_start, line.page)
+        byte_start += len(text.encode("utf-8"))
+
+
+def _overlap(buffer: List[Tuple[Line, int]], overlap_words: int) -> List[Tuple[Line, int]]:
+    """The last overlap_words words of buffer, cutting into the first line they start in."""
+    tail: List[Tuple[Line, int]] = []
+    words = 0
+    for line, n in reversed(buffer):
+        if words + n > overlap_words:
+            wanted = overlap_words - words
+            if wanted > 0:
+                tail.append((_word_suffix(line, n, wanted), wanted))
+            break
+        tail.append((line, n))
+        words += n
+    tail.reverse()
+    return tail
+
+
+def _word_suffix(line: Line, words: int, wanted: int) -> Line:
+    """The part of a line holding its last `wanted` of `words` words."""
+    start = [m.start() for m in _WORD.finditer(line.text)][words - wanted]
+    return Line(line.text[start:], line.char_start + start,
+                line.byte_start + len(line.text[:start].encode("utf-8")), line.page)
+
+
+def _make_chunk(buffer: List[Tuple[Line, int]], heading: Optional[str]) -> Chunk:
+    lines = [line for line, _ in buffer]
+    raw = "".join(line.text for line in lines)
+    text = raw.strip()
+    leading = len(raw) - len(raw.lstrip())
+    char_start = lines[0].char_start + leading
+    byte_start = lines[0].byte_start + len(raw[:leading].encode("utf-8"))
+
+    pages = None
+    numbered = [line.page for line in lines if line.page is not None]
+    if numbered:
+        pages = (numbered[0], numbered[-1])
+
+    return Chunk(
+        text=text,
+        char_start=char_start,
+        char_end=char_start + len(text),
+        byte_start=byte_start,
+        byte_end=byte_start + len(text.encode("utf-8")),
+        content_hash=content_hash(text),
+        heading=heading,
+        pages=pages,
+    )
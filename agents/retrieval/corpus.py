@@ -0,0 +1,94 @@
+"""
+Local corpus loading for the local retrieval backends.
+
+Reads the business process documents in data/ and the regulation PDFs in
+regulations/ and splits them into chunks (see chunker.py) tagged with metadata
+inferred from their path (see tools/search_filters.py).
+"""
+import os
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+from ..tools.search_filters import infer_metadata
+from .chunker import iter_file_chunks
+
+
+# Repository root (agents/retrieval/ is two levels below it)
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Comma-separated directories indexed by the local backends (relative to the repo root)
+LOCAL_CORPUS_DIRS = [
+    d.strip() for d in os.getenv("LOCAL_CORPUS_DIRS", "data,regulations").split(",") if d.strip()
+]
+
+# Directory where local indexes are persisted
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", os.path.join(REPO_ROOT, ".retrieval_cache"))
+
+TEXT_EXTENSIONS = {".txt", ".md"}
+PDF_EXTENSIONS = {".pdf"}
+
+
+def corpus_dirs(dirs: Sequence[str] = None) -> List[str]:
+    """Absolute paths of the corpus directories."""
+    return [d if os.path.isabs(d) else os.path.join(REPO_ROOT, d) for d in (dirs or LOCAL_CORPUS_DIRS)]
+
+
+def iter_corpus_files(dirs: Sequence[str] = None) -> Iterator[str]:
+    """Yield every indexable file under the corpus directories, in a stable order."""
+    for directory in corpus_dirs(dirs):
+        if not os.path.isdir(directory):
+            print(f"[CORPUS] Skipping missing directory: {directory}")
+            continue
+        for root, subdirs, files in os.walk(directory):
+            # Walk subdirectories in name order too, not filesystem order
+            subdirs.sort()
+            for filename in sorted(files):
+                ext = os.path.splitext(filename)[1].lower()
+                if ext in TEXT_EXTENSIONS or ext in PDF_EXTENSIONS:
+                    yield os.path.join(root, filename)
+
+
+def corpus_fingerprint(dirs: Sequence[str] = None) -> List[Tuple[str, int, int]]:
+    """(relative path, size, mtime) of every corpus file, to detect stale indexes."""
+    fingerprint = []
+    for path in iter_corpus_files(dirs):
+        stat = os.stat(path)
+        fingerprint.append((os.path.relpath(path, REPO_ROOT), stat.st_size, stat.st_mtime_ns))
+    return fingerprint
+
+
+def iter_file_records(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the chunk records of one corpus file.
+
+    Records are {"source", "path", "metadata"} plus the fields of
+    chunker.Chunk (text, offsets, content_hash, heading, pages).
+    """
+    source = os.path.basename(path)
+    relpath = os.path.relpath(path, REPO_ROOT)
+    metadata = infer_metadata(relpath)
+    for chunk in iter_file_chunks(path):
+        record = {"source": source, "path": relpath, "metadata": metadata}
+        record.update(chunk._asdict())
+        if chunk.pages is None:
+            del record["pages"]
+        else:
+            record["pages"] = list(chunk.pages)
+        yield record
+
+
+def load_chunks(dirs: Sequence[str] = None, paths: Sequence[str] = None) -> List[Dict[str, Any]]:
+    """
+    Chunk corpus files into records (see iter_file_records).
+
+    Args:
+        dirs: Corpus directories (default LOCAL_CORPUS_DIRS)
+        paths: Only chunk these files (paths relative to the repo root)
+    """
+    wanted = set(paths) if paths is not None else None
+    chunks = []
+    for path in iter_corpus_files(dirs):
+        if wanted is not None and os.path.relpath(path, REPO_ROOT) not in wanted:
+            continue
+        chunks.extend(iter_file_records(path))
+    print(f"[CORPUS] Loaded {len(chunks)} chunks")
+    return chunks
@@ -0,0 +1,477 @@
+"""
+Local dense-vector retrieval backend.
+
+Chunk embeddings are stored as a float32 matrix in a flat file opened with
+np.memmap, so the index is paged in by the OS instead of being loaded into
+Python objects. Vectors are L2-normalised, so a single matrix product gives
+cosine similarities for a whole batch of queries; top-k selection uses
+argpartition over fixed-size row blocks.
+
+New or changed documents are appended to the matrix; rows of removed or
+changed documents are tombstoned and masked at query time, so updates never
+rewrite the matrix. Chunks whose content hash is already indexed reuse their
+stored vector instead of being embedded again, so editing one section of a
+document only embeds the chunks that changed.
+
+Honors DEFAULT_TOP_K, DEFAULT_DISTANCE_THRESHOLD (cosine distance) and
+DEFAULT_EMBEDDING_MODEL from agents/config.py.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .base import RetrievalBackend, chunk_citation, extractive_answer
+from .chunker import CHUNKER_VERSION
+from .corpus import LOCAL_INDEX_DIR, corpus_fingerprint, load_chunks
+from ..config import (
+    PROJECT_ID,
+    DEFAULT_TOP_K,
+    DEFAULT_DISTANCE_THRESHOLD,
+    DEFAULT_EMBEDDING_MODEL,
+    DEFAULT_EMBEDDING_REQUESTS_PER_MIN,
+)
+from ..tools.search_filters import infer_metadata, matches
+
+
+# Embedder used by the vector backend: "vertex" or "hashing"
+# (defaults to Vertex AI when a project is configured, hashing otherwise)
+VECTOR_EMBEDDER = os.getenv("VECTOR_EMBEDDER", "vertex" if PROJECT_ID else "hashing")
+
+# Rows scored per block; bounds the temporary similarity matrix
+SEARCH_BLOCK_ROWS = 65536
+
+# Metadata filter masks kept per backend (least recently used are dropped)
+FILTER_MASK_CACHE_SIZE = 32
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+class Embedder:
+    """Turns texts into L2-normalised float32 vectors."""
+
+    # Identifies the embedding space; indexes built with another embedder are not reused
+    name: str = ""
+    dim: int = 0
+
+    # Cosine distance cutoff suited to this embedder's similarity scale
+    distance_threshold: float = DEFAULT_DISTANCE_THRESHOLD
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed texts into an (n, dim) float32 array of unit vectors."""
+        raise NotImplementedError
+
+
+class HashingEmbedder(Embedder):
+    """
+    Deterministic feature-hashing embedder (no network, no model).
+
+    Unigrams and bigrams are hashed into signed buckets. Similarities are much
+    lower than for learned embeddings, hence the looser distance threshold.
+    """
+
+    distance_threshold = float(os.getenv("HASHING_DISTANCE_THRESHOLD", "0.95"))
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = _TOKEN.findall(text.lower())
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            for feature in features:
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                vectors[row, value % self.dim] += 1.0 if (value >> 63) else -1.0
+        return _normalize(vectors)
+
+
+class VertexEmbedder(Embedder):
+    """Vertex AI text embeddings (DEFAULT_EMBEDDING_MODEL), batched and rate limited."""
+
+    def __init__(
+        self,
+        model: str = DEFAULT_EMBEDDING_MODEL,
+        batch_size: int = 32,
+        requests_per_min: int = DEFAULT_EMBEDDING_REQUESTS_PER_MIN
+    ):
+        from vertexai.language_models import TextEmbeddingModel
+
+        # "publishers/google/models/text-embedding-005" -> "text-embedding-005"
+        self.model_id = model.rsplit("/", 1)[-1]
+        self.name = self.model_id
+        self.batch_size = batch_size
+        self.min_interval = 60.0 / requests_per_min if requests_per_min else 0.0
+        self._model = TextEmbeddingModel.from_pretrained(self.model_id)
+        self._last_request = 0.0
+        self._lock = threading.Lock()
+        self.dim = len(self._model.get_embeddings(["dimension probe"])[0].values)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        rows = []
+        for start in range(0, len(texts), self.batch_size):
+            self._throttle()
+            batch = self._model.get_embeddings(list(texts[start:start + self.batch_size]))
+            rows.extend(embedding.values for embedding in batch)
+        return _normalize(np.asarray(rows, dtype=np.float32).reshape(len(rows), self.dim))
+
+    def _throttle(self) -> None:
+        with self._lock:
+            wait = self._last_request + self.min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self._last_request = time.monotonic()
+
+
+def get_embedder(name: str = VECTOR_EMBEDDER) -> Embedder:
+    """Create the embedder selected by name ("vertex" or "hashing")."""
+    if name == "vertex":
+        return VertexEmbedder()
+    if name == "hashing":
+        return HashingEmbedder()
+    raise ValueError(f"Unknown embedder: {name}. Valid embedders: vertex, hashing")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32, copy=False)
+
+
+class VectorIndex:
+    """
+    Append-only float32 vector matrix on disk with per-row metadata.
+
+    Files in the index directory:
+    - vectors.f32: row-major float32 matrix, one unit vector per chunk
+    - rows.jsonl: one metadata record per row, in row order
+    - header.json: dimension, embedder, row count, tombstones and indexed files
+    """
+
+    def __init__(self, directory: str, dim: int, embedder_name: str):
+        self.directory = directory
+        self.dim = dim
+        self.embedder_name = embedder_name
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.rows_path = os.path.join(directory, "rows.jsonl")
+        self.header_path = os.path.join(directory, "header.json")
+
+        self.rows: List[Dict[str, Any]] = []
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.deleted: set = set()
+        self._matrix: Optional[np.memmap] = None
+        self._live_mask: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+        self._load()
+
+    @property
+    def count(self) -> int:
+        return len(self.rows)
+
+    def append(self, vectors: np.ndarray, rows: List[Dict[str, Any]]) -> range:
+        """Append vectors and their metadata; returns the new row ids."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.shape != (len(rows), self.dim):
+            raise ValueError(f"Expected vectors of shape ({len(rows)}, {self.dim}), got {vectors.shape}")
+
+        with self._lock:
+            start = self.count
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.vectors_path, "ab") as f:
+                f.write(vectors.tobytes())
+            with open(self.rows_path, "a", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(row) + "\n")
+            self.rows.extend(rows)
+            self._reopen()
+            return range(start, self.count)
+
+    def delete(self, row_ids: Sequence[int]) -> None:
+        """Tombstone rows so searches skip them."""
+        with self._lock:
+            self.deleted.update(int(r) for r in row_ids)
+            self._live_mask = None
+
+    def save_header(self) -> None:
+        header = {
+            "dim": self.dim,
+            "embedder": self.embedder_name,
+            "chunker": CHUNKER_VERSION,
+            "count": self.count,
+            "deleted": sorted(self.deleted),
+            "files": self.files,
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self.header_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(header, f)
+        os.replace(tmp_path, self.header_path)
+
+    def search(
+        self,
+        queries: np.ndarray,
+        top_k: int = DEFAULT_TOP_K,
+        distance_threshold: float = DEFAULT_DISTANCE_THRESHOLD,
+        row_mask: Optional[np.ndarray] = None
+    ) -> List[List[Tuple[float, int]]]:
+        """
+        Batched top-k cosine search.
+
+        Args:
+            queries: (q, dim) array of unit query vectors
+            top_k: Results per query
+            distance_threshold: Drop results with cosine distance above this
+            row_mask: Optional boolean array; only rows set to True are searched
+
+        Returns:
+            For each query, [(similarity, row_id), ...] best first
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        matrix, live = self._matrix, self._live()
+        if matrix is None or self.count == 0 or top_k <= 0:
+            return [[] for _ in range(len(queries))]
+        if row_mask is not None:
+            live = row_mask[:self.count] if live is None else (live & row_mask[:self.count])
+
+        min_similarity = 1.0 - distance_threshold
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+
+        for start in range(0, self.count, SEARCH_BLOCK_ROWS):
+            block = matrix[start:start + SEARCH_BLOCK_ROWS]
+            scores = queries @ block.T  # (q, block_rows)
+            if live is not None:
+                scores[:, ~live[start:start + len(block)]] = -np.inf
+            k = min(top_k, scores.shape[1])
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, candidates, axis=1)], axis=1)
+            best_rows = np.concatenate([best_rows, candidates + start], axis=1)
+
+        order = np.argsort(-best_scores, axis=1)[:, :top_k]
+        results = []
+        for q in range(len(queries)):
+            hits = []
+            for column in order[q]:
+                score = float(best_scores[q, column])
+                if score < min_similarity:
+                    break
+                hits.append((score, int(best_rows[q, column])))
+            results.append(hits)
+        return results
+
+    def _live(self) -> Optional[np.ndarray]:
+        if not self.deleted:
+            return None
+        if self._live_mask is None or len(self._live_mask) != self.count:
+            mask = np.ones(self.count, dtype=bool)
+            mask[[r for r in self.deleted if r < self.count]] = False
+            self._live_mask = mask
+        return self._live_mask
+
+    def _load(self) -> None:
+        if not os.path.exists(self.header_path):
+            # A first sync killed before save_header leaves data files without a header
+            if os.path.exists(self.vectors_path) or os.path.exists(self.rows_path):
+                print(f"[VECTOR] Index at {self.directory} has no header, starting empty")
+                self._reset()
+            return
+        try:
+            with open(self.header_path, "r", encoding="utf-8") as f:
+                header = json.load(f)
+            if header["dim"] != self.dim or header["embedder"] != self.embedder_name:
+                print(f"[VECTOR] Index at {self.directory} uses another embedder, starting empty")
+                self._reset()
+                return
+            if header.get("chunker") != CHUNKER_VERSION:
+                print(f"[VECTOR] Index at {self.directory} was chunked differently, starting empty")
+                self._reset()
+                return
+            rows = []
+            with open(self.rows_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    rows.append(json.loads(line))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[VECTOR] Could not load index, starting empty: {str(e)}")
+            self._reset()
+            return
+
+        # A crash between appends and save_header, or between the vectors and rows
+        # writes of one append, leaves extra data past the header count; cut it back
+        count = header["count"]
+        vectors_size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        if len(rows) < count or vectors_size < count * self.dim * 4:
+            print("[VECTOR] Index files are truncated, starting empty")
+            self._reset()
+            return
+        self.rows = rows[:count]
+        self.files = header.get("files", {})
+        self.deleted = set(header.get("deleted", []))
+        if len(rows) != count or vectors_size != count * self.dim * 4:
+            self._truncate()
+        self._reopen()
+
+    def vector(self, row_id: int) -> np.ndarray:
+        """The stored vector of a row."""
+        return np.array(self._matrix[row_id])
+
+    def _reset(self) -> None:
+        """Remove unusable index files so appends start from row 0."""
+        for path in (self.vectors_path, self.rows_path, self.header_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _truncate(self) -> None:
+        """Drop vectors and rows written after the last saved header."""
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(self.count * self.dim * 4)
+        with open(self.rows_path, "w", encoding="utf-8") as f:
+            for row in self.rows:
+                f.write(json.dumps(row) + "\n")
+
+    def _reopen(self) -> None:
+        self._live_mask = None
+        if self.count == 0:
+            self._matrix = None
+            return
+        self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(self.count, self.dim))
+
+
+class VectorBackend(RetrievalBackend):
+    """Retrieval backend serving queries from a local memory-mapped vector index."""
+
+    name = "vector"
+
+    def __init__(
+        self,
+        embedder: Embedder = None,
+        dirs: Sequence[str] = None,
+        index_dir: str = LOCAL_INDEX_DIR,
+        top_k: int = DEFAULT_TOP_K,
+        distance_threshold: float = None
+    ):
+        self.embedder = embedder
+        self.dirs = dirs
+        self.index_dir = index_dir
+        self.top_k = top_k
+        self.distance_threshold = distance_threshold
+        self._index: Optional[VectorIndex] = None
+        self._masks: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def index(self) -> VectorIndex:
+        """The index, synced with the corpus on first use."""
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    if self.embedder is None:
+                        self.embedder = get_embedder()
+                    if self.distance_threshold is None:
+                        self.distance_threshold = self.embedder.distance_threshold
+                    index = VectorIndex(
+                        os.path.join(self.index_dir, f"vector_{self.embedder.name}"),
+                        self.embedder.dim,
+                        self.embedder.name
+                    )
+                    self.sync(index)
+                    self._index = index
+        return self._index
+
+    def sync(self, index: VectorIndex) -> None:
+        """Append new or changed corpus files and tombstone removed ones."""
+        current = {path: [size, mtime] for path, size, mtime in corpus_fingerprint(self.dirs)}
+        stale = [path for path, info in index.files.items() if current.get(path) != info["stat"]]
+        new = [path for path, stat in current.items() if index.files.get(path, {}).get("stat") != stat]
+        if not stale and not new:
+            print(f"[VECTOR] Index is up to date ({index.count} rows)")
+            return
+
+        # Vectors of live chunks, by content hash, so unchanged chunks are not re-embedded
+        known = {
+            row["content_hash"]: row_id
+            for row_id, row in enumerate(index.rows)
+            if row_id not in index.deleted and "content_hash" in row
+        }
+
+        for path in stale:
+            start, end = index.files.pop(path)["rows"]
+            index.delete(range(start, end))
+
+        if new:
+            chunks = load_chunks(self.dirs, paths=new)
+            vectors = self._embed_chunks(index, chunks, known) if chunks else None
+            for path in new:
+                file_rows = [i for i, c in enumerate(chunks) if c["path"] == path]
+                if file_rows:
+                    added = index.append(vectors[file_rows], [chunks[i] for i in file_rows])
+                    rows = [added.start, added.stop]
+                else:
+                    rows = [index.count, index.count]
+                index.files[path] = {"stat": current[path], "rows": rows}
+
+        index.save_header()
+        print(f"[VECTOR] Synced index: {len(new)} file(s) added, {len(stale)} removed or changed")
+
+    def search(self, query: str, top_k: int = None, filters: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        return self.search_batch([query], top_k, filters)[0]
+
+    def search_batch(
+        self,
+        queries: Sequence[str],
+        top_k: int = None,
+        filters: Optional[Dict[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Search several queries with one embedding call and one matrix product."""
+        index = self.index
+        row_mask = self._filter_mask(index, filters) if filters else None
+        hits = index.search(self.embedder.embed(queries), top_k or self.top_k, self.distance_threshold, row_mask)
+        results = []
+        for query_hits in hits:
+            citations = [chunk_citation(index.rows[row_id], score) for score, row_id in query_hits]
+            results.append({"answer": extractive_answer(citations), "citations": citations})
+        return results
+
+    def _embed_chunks(self, index: VectorIndex, chunks: List[Dict[str, Any]], known: Dict[str, int]) -> np.ndarray:
+        """Vectors for chunks, reusing indexed vectors of identical chunks."""
+        vectors = np.empty((len(chunks), index.dim), dtype=np.float32)
+        missing = []
+        for i, chunk in enumerate(chunks):
+            row_id = known.get(chunk["content_hash"])
+            if row_id is None:
+                missing.append(i)
+            else:
+                vectors[i] = index.vector(row_id)
+        if missing:
+            vectors[missing] = self.embedder.embed([chunks[i]["text"] for i in missing])
+        print(f"[VECTOR] Embedded {len(missing)} chunk(s), reused {len(chunks) - len(missing)}")
+        return vectors
+
+    def _filter_mask(self, index: VectorIndex, filters: Dict[str, str]) -> np.ndarray:
+        """Boolean mask of rows matching the filters, LRU-cached per filter set and row count."""
+        key = (tuple(sorted(filters.items())), index.count)
+        with self._lock:
+            mask = self._masks.get(key)
+            if mask is not None:
+                self._masks.move_to_end(key)
+                return mask
+        mask = np.fromiter(
+            (matches(row.get("metadata") or infer_metadata(row["path"]), filters) for row in index.rows),
+            dtype=bool,
+            count=index.count
+        )
+        with self._lock:
+            self._masks[key] = mask
+            while len(self._masks) > FILTER_MASK_CACHE_SIZE:
+                self._masks.popitem(last=False)
+        return mask
@@ -0,0 +1,48 @@
+"""
+Fast-path routing in front of the orchestrator_router LLM.
+
+Most messages are obviously either business-document questions or compliance
+risk questions. FastPathRouterAgent classifies the message locally (keyword and
+regex rules, then an optional trained model) and, when confident, calls the
+business or risk agent directly, skipping the router's model call. Uncertain
+messages and follow-ups go to the LLM router as before.
+
+Settings:
+- FAST_ROUTER: "on" (default) or "off"
+- ROUTER_RULE_THRESHOLD: minimum rule confidence to route (default 0.8)
+- ROUTER_MODEL_THRESHOLD: minimum model confidence to route (default 0.9)
+- ROUTER_MODEL_PATH: trained model (default agents/routing/router_model.json;
+  used if it exists, see `python -m agents.routing.train`)
+
+`python -m agents.routing.evaluate` reports accuracy, coverage and latency
+against the labelled queries in labelled_queries.jsonl.
+"""
+import os
+from typing import Optional
+
+from .classifier import FastPathClassifier, RouteDecision
+from .model import RouterModel
+from .rules import BUSINESS, RISK
+
+
+ROUTING_DIR = os.path.dirname(os.path.abspath(__file__))
+
+FAST_ROUTER = os.getenv("FAST_ROUTER", "on").strip().lower() not in ("off", "false", "0")
+ROUTER_RULE_THRESHOLD = float(os.getenv("ROUTER_RULE_THRESHOLD", "0.8"))
+ROUTER_MODEL_THRESHOLD = float(os.getenv("ROUTER_MODEL_THRESHOLD", "0.9"))
+ROUTER_MODEL_PATH = os.getenv("ROUTER_MODEL_PATH", os.path.join(ROUTING_DIR, "router_model.json"))
+LABELLED_QUERIES_PATH = os.path.join(ROUTING_DIR, "labelled_queries.jsonl")
+
+_classifier: Optional[FastPathClassifier] = None
+
+
+def get_classifier() -> FastPathClassifier:
+    """The process-wide classifier configured from the environment."""
+    global _classifier
+    if _classifier is None:
+        _classifier = FastPathClassifier(
+            ROUTER_RULE_THRESHOLD,
+            ROUTER_MODEL_THRESHOLD,
+            RouterModel.load(ROUTER_MODEL_PATH),
+        )
+    return _classifier
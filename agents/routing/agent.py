@@ -0,0 +1,103 @@
+"""
+FastPathRouterAgent: calls the chosen sub-agent directly when the classifier is confident.
+"""
+import json
+import logging
+import uuid
+from typing import Any, AsyncGenerator, Dict
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+
+from . import get_classifier
+
+
+logger = logging.getLogger(__name__)
+
+
+class FastPathRouterAgent(BaseAgent):
+    """
+    Routes the user message without a model call when the classifier is confident.
+
+    `routes` maps a route ("business", "risk") to the AgentTool the LLM router
+    would call for it. The direct call is recorded as the same function call
+    and response events, and the result is stored under `output_key`, so the
+    formatter downstream can't tell the two paths apart. Undecided messages
+    run `fallback` (the LLM router).
+    """
+
+    routes: Dict[str, Any]
+    fallback: BaseAgent
+    output_key: str = "agent_response"
+
+    def model_post_init(self, __context) -> None:
+        # The fallback must be a sub-agent so it is part of the agent tree
+        if self.fallback not in self.sub_agents:
+            self.sub_agents.append(self.fallback)
+        super().model_post_init(__context)
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        query = _text(ctx.user_content)
+        has_history = any(event.invocation_id != ctx.invocation_id for event in ctx.session.events)
+        decision = get_classifier().classify(query, has_history=has_history)
+        tool = self.routes.get(decision.route) if decision.route else None
+
+        if tool is None:
+            logger.info("[ROUTER] Using LLM router (%s, confidence %.2f)", decision.reason or "undecided", decision.confidence)
+            async for event in self.fallback.run_async(ctx):
+                yield event
+            return
+
+        logger.info("[ROUTER] Fast path -> %s (%s, confidence %.2f)", tool.name, decision.source, decision.confidence)
+        call_id = f"fastpath-{uuid.uuid4().hex[:12]}"
+        args = {"request": query}
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[
+                types.Part(function_call=types.FunctionCall(id=call_id, name=tool.name, args=args))
+            ]),
+        )
+
+        tool_context = ToolContext(ctx, function_call_id=call_id)
+        result = await self._call_tool(ctx, tool, args, tool_context)
+        response = result if isinstance(result, dict) else {"result": result}
+
+        actions: EventActions = tool_context.actions
+        actions.state_delta[self.output_key] = json.dumps(result, ensure_ascii=False) if isinstance(result, dict) else str(result)
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="user", parts=[
+                types.Part(function_response=types.FunctionResponse(id=call_id, name=tool.name, response=response))
+            ]),
+            actions=actions,
+        )
+
+    @staticmethod
+    async def _call_tool(ctx: InvocationContext, tool, args: Dict[str, Any], tool_context: ToolContext) -> Any:
+        """Run the tool with the runner's plugin callbacks, as the LLM router would."""
+        plugins = ctx.plugin_manager
+        result = await plugins.run_before_tool_callback(tool=tool, tool_args=args, tool_context=tool_context)
+        if result is not None:
+            return result
+        try:
+            result = await tool.run_async(args=args, tool_context=tool_context)
+        except Exception as e:
+            result = await plugins.run_on_tool_error_callback(tool=tool, tool_args=args, tool_context=tool_context, error=e)
+            if result is None:
+                raise
+            return result
+        altered = await plugins.run_after_tool_callback(tool=tool, tool_args=args, tool_context=tool_context, result=result)
+        return result if altered is None else altered
+
+
+def _text(content: types.Content) -> str:
+    if not content or not content.parts:
+        return ""
+    return "\n".join(part.text for part in content.parts if part.text).strip()
@@ -0,0 +1,78 @@
+"""
+Fast-path classifier: decides the route locally when it is confident.
+
+Rules are tried first, then the optional trained model; a query is only
+routed when one of them clears its threshold. Everything else (and follow-up
+messages that depend on the conversation) is left to the LLM router.
+"""
+import time
+from typing import NamedTuple, Optional
+
+from ..tools.metrics import counter, histogram
+from . import rules
+from .model import RouterModel
+
+
+ROUTER_DECISIONS = counter("router_decisions_total", "Routing decisions by route and deciding stage", ["route", "source"])
+ROUTER_CLASSIFY_LATENCY = histogram(
+    "router_classify_duration_seconds", "Fast-path classification latency",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01),
+)
+
+# Route and source of queries left to the LLM router
+LLM = "llm"
+
+
+class RouteDecision(NamedTuple):
+    route: Optional[str]  # "business", "risk" or None (use the LLM router)
+    confidence: float
+    source: str  # "rules", "model", or "llm" when undecided
+    reason: str = ""
+
+
+class FastPathClassifier:
+    """Routes queries with rules and an optional model above confidence thresholds."""
+
+    def __init__(self, rule_threshold: float, model_threshold: float, model: Optional[RouterModel] = None):
+        self.rule_threshold = rule_threshold
+        self.model_threshold = model_threshold
+        self.model = model
+
+    def classify(self, query: str, has_history: bool = False, record: bool = True) -> RouteDecision:
+        """
+        Route a user message.
+
+        has_history: the session has earlier turns, so follow-up messages
+        ("what about CCPA?") are left to the LLM router, which sees them.
+        """
+        start = time.perf_counter()
+        decision = self._classify(query or "", has_history)
+        if record:
+            ROUTER_CLASSIFY_LATENCY.observe(time.perf_counter() - start)
+            ROUTER_DECISIONS.labels(decision.route or LLM, decision.source).inc()
+        return decision
+
+    def _classify(self, query: str, has_history: bool) -> RouteDecision:
+        if not query.strip():
+            return RouteDecision(None, 0.0, LLM, "empty")
+        if has_history and rules.is_follow_up(query):
+            return RouteDecision(None, 0.0, LLM, "follow_up")
+
+        rule_match = rules.match(query)
+        decision = _decide(rules.risk_probability(rule_match.scores), self.rule_threshold, "rules")
+        if decision.route:
+            return decision
+
+        if self.model is not None:
+            decision = _decide(self.model.risk_probability(query, rule_match), self.model_threshold, "model")
+            if decision.route:
+                return decision
+        return RouteDecision(None, decision.confidence, LLM, "below_threshold")
+
+
+def _decide(risk_probability: float, threshold: float, source: str) -> RouteDecision:
+    route = rules.RISK if risk_probability >= 0.5 else rules.BUSINESS
+    confidence = max(risk_probability, 1.0 - risk_probability)
+    if confidence >= threshold:
+        return RouteDecision(route, confidence, source)
+    return RouteDecision(None, confidence, LLM)
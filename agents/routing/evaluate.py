@@ -0,0 +1,190 @@
+"""
+Offline accuracy and latency report for the fast-path router.
+
+For each configuration (rules only, and rules + model with k-fold
+cross-validation so the model is never scored on queries it was trained on)
+it reports:
+
+- coverage: share of queries routed without the LLM router
+- accuracy: share of those routed to the labelled agent
+- classification latency percentiles
+
+plus a threshold sweep to help choose ROUTER_RULE_THRESHOLD and
+ROUTER_MODEL_THRESHOLD.
+
+Usage:
+    python -m agents.routing.evaluate [--labelled PATH] [--folds 5] [--errors] [--json report.json]
+"""
+import argparse
+import json
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from . import LABELLED_QUERIES_PATH, ROUTER_MODEL_THRESHOLD, ROUTER_RULE_THRESHOLD
+from .classifier import FastPathClassifier
+from .model import RouterModel, cross_validation_splits, load_labelled
+
+
+SWEEP_THRESHOLDS = (0.6, 0.7, 0.8, 0.85, 0.9, 0.95)
+
+
+def score(classifier: FastPathClassifier, examples: Sequence[Tuple[str, str]]) -> Dict[str, Any]:
+    """Coverage, accuracy, misroutes and per-query latency of a classifier on labelled queries."""
+    routed = correct = 0
+    by_source: Dict[str, List[int]] = {}
+    errors = []
+    latencies = []
+    for query, label in examples:
+        start = time.perf_counter()
+        decision = classifier.classify(query, record=False)
+        latencies.append(time.perf_counter() - start)
+        if decision.route is None:
+            continue
+        routed += 1
+        hit = decision.route == label
+        correct += hit
+        counts = by_source.setdefault(decision.source, [0, 0])
+        counts[0] += 1
+        counts[1] += hit
+        if not hit:
+            errors.append({"query": query, "label": label, "route": decision.route,
+                           "source": decision.source, "confidence": round(decision.confidence, 3)})
+    return {
+        "queries": len(examples),
+        "routed": routed,
+        "correct": correct,
+        "by_source": by_source,
+        "errors": errors,
+        "latencies": latencies,
+    }
+
+
+def summarize(name: str, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine per-fold results into one report row."""
+    queries = sum(r["queries"] for r in results)
+    routed = sum(r["routed"] for r in results)
+    correct = sum(r["correct"] for r in results)
+    latencies = sorted(l for r in results for l in r["latencies"])
+    by_source: Dict[str, Dict[str, Any]] = {}
+    for r in results:
+        for source, (count, hits) in r["by_source"].items():
+            entry = by_source.setdefault(source, {"routed": 0, "correct": 0})
+            entry["routed"] += count
+            entry["correct"] += hits
+    return {
+        "name": name,
+        "queries": queries,
+        "coverage": round(routed / queries, 4) if queries else 0.0,
+        "accuracy": round(correct / routed, 4) if routed else None,
+        "misroutes": routed - correct,
+        "by_source": by_source,
+        "latency_us": {
+            "p50": round(_percentile(latencies, 50) * 1e6, 1),
+            "p99": round(_percentile(latencies, 99) * 1e6, 1),
+            "max": round(latencies[-1] * 1e6, 1) if latencies else 0.0,
+        },
+        "errors": [e for r in results for e in r["errors"]],
+    }
+
+
+def evaluate(
+    examples: Sequence[Tuple[str, str]],
+    rule_threshold: float,
+    model_threshold: float,
+    folds: int,
+) -> Dict[str, Any]:
+    rows = [summarize("rules", [score(FastPathClassifier(rule_threshold, model_threshold), examples)])]
+
+    splits = list(cross_validation_splits(list(examples), folds))
+    models = [RouterModel.train(train) for train, _ in splits]
+
+    def cross_validated(rule_t: float, model_t: float) -> List[Dict[str, Any]]:
+        return [
+            score(FastPathClassifier(rule_t, model_t, model), test)
+            for model, (_, test) in zip(models, splits)
+        ]
+
+    rows.append(summarize(f"rules+model ({folds}-fold)", cross_validated(rule_threshold, model_threshold)))
+    # Model alone: rules never confident enough to decide
+    rows.append(summarize(f"model only ({folds}-fold)", cross_validated(1.01, model_threshold)))
+
+    sweep = []
+    for threshold in SWEEP_THRESHOLDS:
+        rules_row = summarize("rules", [score(FastPathClassifier(threshold, model_threshold), examples)])
+        model_row = summarize("model", cross_validated(1.01, threshold))
+        sweep.append({
+            "threshold": threshold,
+            "rules": {"coverage": rules_row["coverage"], "accuracy": rules_row["accuracy"]},
+            "model": {"coverage": model_row["coverage"], "accuracy": model_row["accuracy"]},
+        })
+
+    return {
+        "rule_threshold": rule_threshold,
+        "model_threshold": model_threshold,
+        "configurations": rows,
+        "threshold_sweep": sweep,
+    }
+
+
+def format_report(report: Dict[str, Any], show_errors: bool = False) -> str:
+    lines = [
+        f"Rule threshold: {report['rule_threshold']}  model threshold: {report['model_threshold']}",
+        "",
+        f"{'configuration':<24}{'queries':>8}{'coverage':>10}{'accuracy':>10}{'misroutes':>10}"
+        f"{'p50 us':>9}{'p99 us':>9}",
+    ]
+    for row in report["configurations"]:
+        accuracy = f"{row['accuracy']:.1%}" if row["accuracy"] is not None else "-"
+        lines.append(
+            f"{row['name']:<24}{row['queries']:>8}{row['coverage']:>10.1%}{accuracy:>10}{row['misroutes']:>10}"
+            f"{row['latency_us']['p50']:>9}{row['latency_us']['p99']:>9}"
+        )
+
+    lines += ["", "Threshold sweep (coverage / accuracy)", f"{'threshold':>10}{'rules':>22}{'model':>22}"]
+    for entry in report["threshold_sweep"]:
+        cells = []
+        for name in ("rules", "model"):
+            stats = entry[name]
+            accuracy = f"{stats['accuracy']:.1%}" if stats["accuracy"] is not None else "-"
+            cells.append(f"{stats['coverage']:.1%} / {accuracy}")
+        lines.append(f"{entry['threshold']:>10}{cells[0]:>22}{cells[1]:>22}")
+
+    if show_errors:
+        for row in report["configurations"]:
+            if row["errors"]:
+                lines += ["", f"Misroutes ({row['name']}):"]
+                lines += [
+                    f"  [{e['label']} -> {e['route']} via {e['source']} @ {e['confidence']}] {e['query']}"
+                    for e in row["errors"]
+                ]
+    return "\n".join(lines)
+
+
+def _percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Evaluate the fast-path router on labelled queries")
+    parser.add_argument("--labelled", default=LABELLED_QUERIES_PATH, help="JSONL of {query, route}")
+    parser.add_argument("--rule-threshold", type=float, default=ROUTER_RULE_THRESHOLD)
+    parser.add_argument("--model-threshold", type=float, default=ROUTER_MODEL_THRESHOLD)
+    parser.add_argument("--folds", type=int, default=5, help="Cross-validation folds for the model")
+    parser.add_argument("--errors", action="store_true", help="List misrouted queries")
+    parser.add_argument("--json", dest="json_path", help="Also write the report as JSON to this path")
+    args = parser.parse_args(argv)
+
+    examples = load_labelled(args.labelled)
+    report = evaluate(examples, args.rule_threshold, args.model_threshold, args.folds)
+    print(format_report(report, args.errors))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
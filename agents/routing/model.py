@@ -0,0 +1,132 @@
+"""
+Lightweight trained router model: logistic regression over query features.
+
+Features are lowercase word unigrams and bigrams, the indexes of the matching
+rules (see rules.py) and a length bucket. The model is small enough to store
+as JSON and score in microseconds, and it is optional: the router uses it
+only when ROUTER_MODEL_PATH exists.
+
+    python -m agents.routing.train          # writes ROUTER_MODEL_PATH
+"""
+import json
+import logging
+import math
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from . import rules
+
+
+logger = logging.getLogger(__name__)
+
+
+MODEL_VERSION = 1
+
+_WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def features(query: str, rule_match: Optional[rules.RuleMatch] = None) -> List[str]:
+    """Feature names present in a query."""
+    words = _WORD.findall(query.lower())
+    names = [f"w:{w}" for w in words]
+    names.extend(f"b:{a}_{b}" for a, b in zip(words, words[1:]))
+    rule_match = rule_match or rules.match(query)
+    names.extend(f"rule:{index}" for index in rule_match.matched)
+    names.append(f"len:{min(len(words) // 5, 4)}")
+    return names
+
+
+class RouterModel:
+    """Binary logistic regression: P(risk) for a query."""
+
+    def __init__(self, weights: Dict[str, float], bias: float = 0.0):
+        self.weights = weights
+        self.bias = bias
+
+    def risk_probability(self, query: str, rule_match: Optional[rules.RuleMatch] = None) -> float:
+        z = self.bias + sum(self.weights.get(name, 0.0) for name in set(features(query, rule_match)))
+        return _sigmoid(z)
+
+    @classmethod
+    def train(
+        cls,
+        examples: Sequence[Tuple[str, str]],
+        epochs: int = 300,
+        learning_rate: float = 0.5,
+        l2: float = 0.01,
+        min_count: int = 1,
+    ) -> "RouterModel":
+        """
+        Fit on (query, route) pairs with full-batch gradient descent.
+
+        Deterministic for a given example list, so a retrained model only
+        changes when the labelled queries do.
+        """
+        rows = [(set(features(query)), 1.0 if route == rules.RISK else 0.0) for query, route in examples]
+        counts: Dict[str, int] = {}
+        for names, _ in rows:
+            for name in names:
+                counts[name] = counts.get(name, 0) + 1
+        weights = {name: 0.0 for name, count in counts.items() if count >= min_count}
+        rows = [([n for n in names if n in weights], label) for names, label in rows]
+        bias = 0.0
+        n = float(len(rows)) or 1.0
+
+        for _ in range(epochs):
+            gradient: Dict[str, float] = {}
+            bias_gradient = 0.0
+            for names, label in rows:
+                error = _sigmoid(bias + sum(weights[name] for name in names)) - label
+                bias_gradient += error
+                for name in names:
+                    gradient[name] = gradient.get(name, 0.0) + error
+            bias -= learning_rate * bias_gradient / n
+            for name in weights:
+                weights[name] -= learning_rate * (gradient.get(name, 0.0) / n + l2 * weights[name])
+
+        return cls({name: round(w, 6) for name, w in weights.items() if abs(w) >= 1e-4}, round(bias, 6))
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"version": MODEL_VERSION, "bias": self.bias, "weights": self.weights}, f, indent=0, sort_keys=True)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["RouterModel"]:
+        """Load a saved model; None if the file is missing or from another MODEL_VERSION."""
+        if not path or not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != MODEL_VERSION:
+            logger.warning("[ROUTER] Ignoring router model %s: version %s != %s", path, data.get("version"), MODEL_VERSION)
+            return None
+        return cls(data["weights"], data["bias"])
+
+
+def load_labelled(path: str) -> List[Tuple[str, str]]:
+    """(query, route) pairs from a JSONL file of {"query", "route"} objects."""
+    examples = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                if item["route"] not in rules.ROUTES:
+                    raise ValueError(f"Unknown route {item['route']!r} for query {item['query']!r}")
+                examples.append((item["query"], item["route"]))
+    return examples
+
+
+def _sigmoid(z: float) -> float:
+    if z < -35:
+        return 0.0
+    return 1.0 / (1.0 + math.exp(-z))
+
+
+def cross_validation_splits(items: Sequence, parts: int) -> Iterable[Tuple[list, list]]:
+    """(train, test) splits for `parts`-fold cross-validation (every part-th item is held out)."""
+    for k in range(parts):
+        yield (
+            [item for i, item in enumerate(items) if i % parts != k],
+            [item for i, item in enumerate(items) if i % parts == k],
+        )
@@ -0,0 +1,92 @@
+"""
+Keyword and regex rules for routing a query to the business or risk agent.
+
+Each rule adds its weight to one route's score when it matches; the scores
+are turned into a probability that the query is a risk question. Strong
+signals are regulation names and risk/compliance phrasing ("compliance
+gaps", "assess ... risk"); business questions are recognised by how they ask
+about the organization's own processes ("how do we", "which vendors").
+"""
+import math
+import re
+from typing import Dict, List, NamedTuple, Tuple
+
+from ..tools.search_filters import KNOWN_REGULATIONS
+
+
+BUSINESS = "business"
+RISK = "risk"
+ROUTES = (BUSINESS, RISK)
+
+_REGULATIONS = "|".join(r.lower() for r in KNOWN_REGULATIONS)
+
+# (route, weight, pattern)
+RULES: Tuple[Tuple[str, float, "re.Pattern"], ...] = tuple(
+    (route, weight, re.compile(pattern, re.IGNORECASE))
+    for route, weight, pattern in (
+        # Risk: regulations and compliance analysis
+        (RISK, 3.0, rf"\b({_REGULATIONS})\b"),
+        (RISK, 2.0, r"\b(data protection|privacy) (laws?|regulations?|acts?|rules|risks?)\b|\beprivacy\b"),
+        (RISK, 2.0, r"\bcomplian(ce|t)\b.{0,40}\b(risk|gap|issue|problem|assessment|analysis|review|check)s?\b"),
+        (RISK, 2.0, r"\b(risk|gap|impact) (assessment|analysis|review)\b"),
+        (RISK, 2.0, r"\bnon-?complian(ce|t)\b|\bviolat(e|es|ion|ions|ing)\b|\bbreach(es)? of\b"),
+        (RISK, 2.0, r"\b(dpia|data protection impact|right to be forgotten|data subject rights?|lawful basis|legal basis)\b"),
+        (RISK, 1.5, r"\b(fines?|penalt(y|ies)|enforcement|liabilit(y|ies)|regulators?|exposure)\b"),
+        (RISK, 1.5, r"\b(assess|evaluate|audit|analy[sz]e|identify|rate)\b.{0,60}\b(risks?|complian(ce|t)|gaps?)\b"),
+        (RISK, 1.5, r"\b(comply|complies|compliant)\b|\b(requirements?|obligations?|implications?|safeguards?)\b"),
+        (RISK, 1.0, r"\brisks?\b|\brisky\b"),
+        (RISK, 1.0, r"\bcompliance\b|\bregulat(ion|ions|ory|or|ors)\b|\blawful(ly|ness)?\b"),
+        (RISK, 1.0, r"\b(art(icle)?s?\.?|section|§)\s*\d+|\barticles\b|\bprinciple\b"),
+        # Business: questions about the organization's own documents and processes
+        (BUSINESS, 2.0, r"^(how|what|where|when|who|which)\b.{0,30}\b(do|does|did) (we|our|the company)\b"),
+        (BUSINESS, 2.0, r"\b(describe|summari[sz]e|explain|outline|walk me through)\b.{0,20}\b(our|the)\b"),
+        (BUSINESS, 2.0, r"\bcredit risk\b"),  # a business process, not a compliance risk
+        (BUSINESS, 1.5, r"\b(which|what) (vendors|systems|teams|tools|departments|partners|third parties)\b"),
+        (BUSINESS, 1.5, r"^(list|show|find|give me)\b"),
+        (BUSINESS, 1.0, r"\b(our|we|us|company's)\b"),
+        (BUSINESS, 1.0, r"\b(process|workflow|procedure|pipeline|policy|program|campaign|onboarding)\b"),
+        (BUSINESS, 1.0, r"\b(collect|store|retain|share|send|use|process)(s|ed|ing)?\b.{0,30}\b(data|information|records)\b"),
+    )
+)
+
+# Business score added when no risk rule matches: questions that don't mention
+# regulations, risk or compliance at all are about the business documents
+NO_RISK_SIGNAL = 2.0
+
+# Steepness of the score margin -> probability curve
+SCORE_SCALE = 0.6
+
+# Messages that lean on earlier turns ("what about CCPA?", "tell me more")
+FOLLOW_UP = re.compile(
+    r"^(and|also|but|so|what about|how about|tell me more|more on|why|same for|what else|ok|okay)\b"
+    r"|\b(the above|that one|those ones|previous answer|you (said|mentioned))\b",
+    re.IGNORECASE,
+)
+
+
+class RuleMatch(NamedTuple):
+    scores: Dict[str, float]
+    matched: List[int]  # indexes into RULES
+
+
+def match(query: str) -> RuleMatch:
+    """Scores per route and the indexes of the rules that matched."""
+    scores = {route: 0.0 for route in ROUTES}
+    matched = []
+    for index, (route, weight, pattern) in enumerate(RULES):
+        if pattern.search(query):
+            scores[route] += weight
+            matched.append(index)
+    if not scores[RISK] and len(query.split()) >= 4:
+        scores[BUSINESS] += NO_RISK_SIGNAL
+    return RuleMatch(scores, matched)
+
+
+def risk_probability(scores: Dict[str, float]) -> float:
+    """P(risk) from the score margin; a single weak match (1.0) stays near 0.65."""
+    return 1.0 / (1.0 + math.exp(-SCORE_SCALE * (scores[RISK] - scores[BUSINESS])))
+
+
+def is_follow_up(query: str) -> bool:
+    """Whether the message probably depends on the conversation so far."""
+    return bool(FOLLOW_UP.search(query.strip())) or len(query.split()) < 3
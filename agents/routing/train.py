@@ -0,0 +1,29 @@
+"""
+Train the router model on the labelled queries.
+
+Usage:
+    python -m agents.routing.train [--labelled PATH] [--output PATH]
+"""
+import argparse
+from typing import List, Optional
+
+from . import LABELLED_QUERIES_PATH, ROUTER_MODEL_PATH
+from .model import RouterModel, load_labelled
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Train the fast-path router model")
+    parser.add_argument("--labelled", default=LABELLED_QUERIES_PATH, help="JSONL of {query, route}")
+    parser.add_argument("--output", default=ROUTER_MODEL_PATH, help="Where to write the model")
+    parser.add_argument("--epochs", type=int, default=300)
+    parser.add_argument("--l2", type=float, default=0.01)
+    args = parser.parse_args(argv)
+
+    examples = load_labelled(args.labelled)
+    model = RouterModel.train(examples, epochs=args.epochs, l2=args.l2)
+    model.save(args.output)
+    print(f"[ROUTER] Trained on {len(examples)} queries, {len(model.weights)} features -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,18 @@ class RiskItem(BaseModel):
     processing_activity: Optional[str] = Field(default=None, description="Related activity")
 
 
+class RegulationBreakdown(BaseModel):
+    """Per-regulation summary in a multi-regulation analysis."""
+    regulation_name: str = Field(description="Regulation name")
+    regulation_available: bool = Field(description="Was regulation found")
+    overall_risk_level: str = Field(description="High, Medium, or Low")
+    compliance_score: Optional[int] = Field(default=None, description="Score 0-100")
+    critical_risk_count: int = Field(default=0, description="Number of high risks")
+    medium_risk_count: int = Field(default=0, description="Number of medium risks")
+    low_risk_count: int = Field(default=0, description="Number of low risks")
+    executive_summary: str = Field(default="", description="Summary for this regulation")
+
+
 class RiskAnalysisOutput(BaseModel):
     """Risk analysis output."""
     regulation_name: str = Field(description="Regulation name")
@@ -31,6 +43,9 @@ class RiskAnalysisOutput(BaseModel):
     regulation_sections_analyzed: List[str] = Field(default_factory=list, description="Sections")
     citations: List['Citation'] = Field(default_factory=list, description="Source citations")
     suggested_questions: List[str] = Field(default_factory=list, description="Follow-up questions")
+    regulation_breakdown: List[RegulationBreakdown] = Field(
+        default_factory=list, description="Per-regulation results when several regulations were analyzed"
+    )
 
 
 class Citation(BaseModel):
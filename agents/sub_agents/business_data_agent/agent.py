@@ -1,10 +1,22 @@
 """
 Business Data Agent - Searches business documents using File Search.
 Uses sequential pattern: retriever -> formatter
+
+With BUSINESS_FORMATTER=code (default) the output is assembled from the search
+result in code, with follow-up questions from a small concurrent model call;
+the LLM formatter only runs if there is no successful search result
+(see agents/formatting/business.py). BUSINESS_FORMATTER=llm always uses it.
 """
+import os
+
 from google.adk.agents import LlmAgent, SequentialAgent
-from ...tools.file_search_tools import search_file_search_store
+from ...tools.file_search_tools import search_file_search_store_async
 from ...schemas.structured_output import BusinessDataOutput
+from ...formatting import ORCHESTRATOR_FORMATTER
+from ...formatting.business import BusinessFormatterAgent, store_search_result
+
+
+BUSINESS_FORMATTER = os.getenv("BUSINESS_FORMATTER", "code").strip().lower()
 
 
 # Retriever agent - calls the tool and stores raw data
@@ -16,7 +28,7 @@ business_data_retriever = LlmAgent(
     You retrieve information from business documents.
 
     **YOUR JOB:**
-    1. Call `search_file_search_store` with the user's question
+    1. Call `search_file_search_store_async` with the user's question
     2. Store the raw response in the state using output_key
 
     **IMPORTANT:**
@@ -24,8 +36,9 @@ business_data_retriever = LlmAgent(
     - Do NOT format or modify the response
     - The next agent will handle formatting
     """,
-    tools=[search_file_search_store],
-    output_key="raw_search_results"
+    tools=[search_file_search_store_async],
+    output_key="raw_search_results",
+    after_tool_callback=store_search_result if BUSINESS_FORMATTER == "code" else None
 )
 
 # Formatter agent - formats the data into BusinessDataOutput schema
@@ -66,11 +79,24 @@ business_data_formatter = LlmAgent(
     output_key="business_data_output"
 )
 
+# Code formatter - builds the same output from the stored search result, LLM as fallback
+if BUSINESS_FORMATTER == "llm":
+    formatter_agent = business_data_formatter
+else:
+    formatter_agent = BusinessFormatterAgent(
+        name="business_data_code_formatter",
+        description="Formats business data into structured output in code",
+        output_key="business_data_output",
+        # The orchestrator's code formatter collects late questions after the router's last call
+        wait_for_suggestions=ORCHESTRATOR_FORMATTER != "code",
+        fallback=business_data_formatter,
+    )
+
 # Sequential agent combining retriever and formatter
 business_data_agent = SequentialAgent(
     name="business_data_agent",
     sub_agents=[
         business_data_retriever,
-        business_data_formatter
+        formatter_agent
     ]
 )
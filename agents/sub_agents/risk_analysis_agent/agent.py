@@ -1,10 +1,15 @@
 """
 Risk Analysis Agent - Analyzes compliance risks using File Search.
 Uses sequential pattern: retriever -> formatter
+
+Questions naming several regulations run the pipeline once per regulation
+concurrently and merge the results (see multi_regulation.py; RISK_FANOUT=off
+analyzes them in a single pass).
 """
 from google.adk.agents import LlmAgent, SequentialAgent
-from ...tools.file_search_tools import search_file_search_store
+from ...tools.file_search_tools import search_file_search_store_async, search_many
 from ...schemas.structured_output import RiskAnalysisOutput
+from .multi_regulation import RISK_FANOUT, MultiRegulationRiskAgent
 
 # Retriever agent - searches for regulation and business data
 risk_analysis_retriever = LlmAgent(
@@ -15,16 +20,22 @@ risk_analysis_retriever = LlmAgent(
     You retrieve information needed for compliance risk analysis.
 
     **YOUR JOB:**
-    1. Search for regulation requirements using `search_file_search_store`
-    2. Search for business processes using `search_file_search_store`
-    3. Store the raw search results in the state
+    1. Call `search_many` ONCE with all the lookups you need:
+       - `regulation_queries`: the regulation requirements relevant to the question
+         (set `regulation`, e.g. "GDPR", when the question names one)
+       - `business_queries`: the business processes / data processing activities involved
+    2. Store the raw search results in the state
 
     **IMPORTANT:**
-    - Call the tool multiple times if needed (regulations, then business processes)
+    - Put every query in a single `search_many` call; they run concurrently
+    - Scoped queries only search the matching documents; use plain `queries`
+      only when a lookup genuinely spans both regulations and business documents
+    - Use `search_file_search_store_async` only for a follow-up lookup that
+      depends on the first results
     - Just gather the data, don't analyze yet
     - The next agent will perform the risk analysis
     """,
-    tools=[search_file_search_store],
+    tools=[search_many, search_file_search_store_async],
     output_key="raw_risk_data"
 )
 
@@ -37,10 +48,10 @@ risk_analysis_formatter = LlmAgent(
     You analyze compliance risks and format the results.
 
     **INPUT:**
-    You receive raw_risk_data from the previous agent with search results.
-    Each search result contains:
-    - answer: the main answer text
+    You receive raw_risk_data from the previous agent with search results:
+    - results: map of each query to its answer text
     - citations: array of {source: "filename", content: "snippet text"}
+    Follow-up searches, if any, return a single answer with its own citations.
 
     **YOUR JOB:**
     Analyze the data and format into RiskAnalysisOutput with:
@@ -62,7 +73,7 @@ risk_analysis_formatter = LlmAgent(
     - Preserve BOTH "source" and "content" fields from each citation
     - DO NOT modify or summarize the citation content
     - Combine citations from multiple searches if applicable
-    - Remove duplicates based on source+content
+    - Citations are already deduplicated; do not spend effort removing duplicates
 
     **RULES:**
     - Return valid JSON matching RiskAnalysisOutput schema
@@ -78,10 +89,21 @@ risk_analysis_formatter = LlmAgent(
 )
 
 # Sequential agent combining retriever and formatter
-risk_analysis_agent = SequentialAgent(
-    name="risk_analysis_agent",
+risk_analysis_pipeline = SequentialAgent(
+    name="risk_analysis_pipeline" if RISK_FANOUT else "risk_analysis_agent",
     sub_agents=[
         risk_analysis_retriever,
         risk_analysis_formatter
     ]
 )
+
+# One pipeline run per named regulation, merged into a single RiskAnalysisOutput
+if RISK_FANOUT:
+    risk_analysis_agent = MultiRegulationRiskAgent(
+        name="risk_analysis_agent",
+        description="Analyzes compliance risks, one regulation at a time in parallel when several are named",
+        pipeline=risk_analysis_pipeline,
+        output_key="risk_analysis_output",
+    )
+else:
+    risk_analysis_agent = risk_analysis_pipeline
@@ -0,0 +1,301 @@
+"""
+Batch compliance scan: every business document against every regulation.
+
+Pairs each processing-activity document in data/ with each regulation that
+has a document in regulations/ and analyzes the pairs with analyze_document
+(see document_analysis.py), a bounded number at a time. Unchanged pairs are
+served from the result cache.
+
+Results are appended to a JSONL file as each pair finishes, one line per
+pair. The file doubles as the checkpoint: when a run is killed and started
+again with the same output file, pairs already recorded as successful for
+the same document contents and the same corpus revision (see
+document_analysis.corpus_revision) are skipped; an upload or delete in the
+store since then makes them scan again.
+
+Rate limits (HTTP 429 / RESOURCE_EXHAUSTED, and 503) are retried with
+exponential backoff and jitter; while one analysis backs off the others hold
+off starting new model calls too, so the whole run slows down instead of
+piling up more rejected requests.
+
+Usage:
+    python -m agents.sub_agents.risk_analysis_agent.batch_scan [--output scan.jsonl] [--concurrency 4]
+        [--regulations GDPR,CCPA] [--documents PATTERN] [--restart]
+"""
+import argparse
+import asyncio
+import fnmatch
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from ...retrieval.corpus import iter_corpus_files
+from ...tools.search_filters import infer_metadata
+from .document_analysis import analyze_document, corpus_revision, get_cache
+from .multi_regulation import RISK_LEVELS, risk_level_rank
+from .result_cache import REPO_ROOT, document_hash
+
+
+# Analyses running at the same time
+SCAN_CONCURRENCY = int(os.getenv("SCAN_CONCURRENCY", "4"))
+
+# Attempts per pair for rate-limited or unavailable responses
+SCAN_MAX_ATTEMPTS = int(os.getenv("SCAN_MAX_ATTEMPTS", "5"))
+
+# First backoff delay in seconds (doubles per attempt, with jitter)
+SCAN_BACKOFF_BASE = float(os.getenv("SCAN_BACKOFF_BASE", "2"))
+
+SCAN_BACKOFF_MAX = 60.0
+
+DEFAULT_OUTPUT = os.path.join(REPO_ROOT, "scan_results.jsonl")
+
+Pair = Tuple[str, str]
+
+
+def business_documents(pattern: Optional[str] = None) -> List[str]:
+    """Business process documents in data/ (paths relative to the repo root)."""
+    documents = []
+    for path in iter_corpus_files(["data"]):
+        relpath = os.path.relpath(path, REPO_ROOT)
+        if infer_metadata(relpath).get("doc_kind") != "business_process":
+            continue
+        if pattern and not fnmatch.fnmatch(os.path.basename(relpath), pattern):
+            continue
+        documents.append(relpath)
+    return documents
+
+
+def corpus_regulations() -> List[str]:
+    """Regulations with a document in regulations/, in file order."""
+    regulations = []
+    for path in iter_corpus_files(["regulations"]):
+        regulation = infer_metadata(os.path.relpath(path, REPO_ROOT)).get("regulation")
+        if regulation is None:
+            print(f"[SCAN] No regulation identifier in {os.path.basename(path)}, skipping it")
+        elif regulation not in regulations:
+            regulations.append(regulation)
+    return regulations
+
+
+def load_checkpoint(path: str) -> Set[Tuple[str, str, str, str]]:
+    """(document, document_sha256, regulation, corpus_revision) of the pairs already scanned successfully."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "rb+") as f:
+        # Terminate a line cut short by a killed run so new records start on their own line
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short when the previous run was killed
+                continue
+            if record.get("status") == "ok":
+                # Records without a revision predate it and are scanned again
+                done.add((record["document"], record["document_sha256"], record["regulation"],
+                          record.get("corpus_revision")))
+    return done
+
+
+def is_rate_limited(error: Optional[BaseException]) -> bool:
+    """True for quota and overload errors worth retrying, judged by their HTTP code or API status."""
+    while error is not None:
+        code = getattr(error, "code", None) or getattr(error, "status_code", None)
+        if code in (429, 503) or getattr(error, "status", None) in ("RESOURCE_EXHAUSTED", "UNAVAILABLE"):
+            return True
+        # Errors raised through the agent runner may wrap the API error
+        error = error.__cause__
+    return False
+
+
+class Progress:
+    """Throughput and ETA over the pairs of one run."""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.started = time.monotonic()
+        self.counts = {"ok": 0, "cached": 0, "failed": 0}
+        self.levels: Dict[str, int] = {}
+        self.failures: List[Dict[str, Any]] = []
+
+    @property
+    def finished(self) -> int:
+        return self.counts["ok"] + self.counts["failed"]
+
+    def record(self, record: Dict[str, Any]) -> None:
+        if record["status"] == "ok":
+            self.counts["ok"] += 1
+            self.counts["cached"] += record["cached"]
+            level = RISK_LEVELS[risk_level_rank(record["output"]["overall_risk_level"])]
+            self.levels[level] = self.levels.get(level, 0) + 1
+        else:
+            self.counts["failed"] += 1
+            self.failures.append(record)
+
+    def line(self, record: Dict[str, Any]) -> str:
+        elapsed = time.monotonic() - self.started
+        rate = self.finished / elapsed if elapsed > 0 else 0.0
+        remaining = self.total - self.finished
+        eta = _duration(remaining / rate) if rate > 0 else "-"
+        outcome = "cached" if record.get("cached") else record["status"]
+        return (
+            f"[SCAN] {self.finished}/{self.total} {record['document']} / {record['regulation']}: {outcome} "
+            f"({rate * 60:.1f} pairs/min, ETA {eta})"
+        )
+
+    def summary(self, skipped: int) -> str:
+        elapsed = time.monotonic() - self.started
+        lines = [
+            f"[SCAN] Finished {self.finished} pairs in {_duration(elapsed)}: "
+            f"{self.counts['ok']} ok ({self.counts['cached']} cached), {self.counts['failed']} failed, "
+            f"{skipped} skipped from the checkpoint",
+        ]
+        if self.levels:
+            lines.append("[SCAN] Risk levels: " + ", ".join(f"{level} {self.levels[level]}" for level in reversed(RISK_LEVELS) if level in self.levels))
+        for failure in self.failures:
+            lines.append(f"[SCAN] Failed: {failure['document']} / {failure['regulation']}: {failure['error']}")
+        return "\n".join(lines)
+
+
+class BatchScanner:
+    """Runs analyze_document over document x regulation pairs with bounded concurrency."""
+
+    def __init__(
+        self,
+        output_path: str,
+        concurrency: int = SCAN_CONCURRENCY,
+        max_attempts: int = SCAN_MAX_ATTEMPTS,
+        backoff_base: float = SCAN_BACKOFF_BASE,
+    ):
+        self.output_path = output_path
+        self.concurrency = max(1, concurrency)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        # time.monotonic() until which no analysis starts: the latest end of
+        # the pending backoffs
+        self._resume_at = 0.0
+        self._write_lock = asyncio.Lock()
+
+    async def run(self, documents: Sequence[str], regulations: Sequence[str]) -> Progress:
+        hashes = {document: document_hash(os.path.join(REPO_ROOT, document)) for document in documents}
+        revision = await corpus_revision()
+        done = load_checkpoint(self.output_path)
+        pairs = [
+            (document, regulation)
+            for document in documents for regulation in regulations
+            if (document, hashes[document], regulation, revision) not in done
+        ]
+        skipped = len(documents) * len(regulations) - len(pairs)
+        print(f"[SCAN] {len(documents)} documents x {len(regulations)} regulations ({', '.join(regulations)}): "
+              f"{len(pairs)} to scan, {skipped} already in {self.output_path}")
+
+        progress = Progress(len(pairs))
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def scan(pair: Pair) -> None:
+            async with semaphore:
+                record = await self._analyze(pair, hashes[pair[0]])
+            await self._append(record)
+            progress.record(record)
+            print(progress.line(record), flush=True)
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.output_path)), exist_ok=True)
+        await asyncio.gather(*(scan(pair) for pair in pairs))
+        print(progress.summary(skipped))
+        return progress
+
+    async def _analyze(self, pair: Pair, sha256: str) -> Dict[str, Any]:
+        document, regulation = pair
+        record = {"document": document, "document_sha256": sha256, "regulation": regulation}
+        started = time.monotonic()
+        for attempt in range(1, self.max_attempts + 1):
+            await self._wait_for_resume()
+            try:
+                analysis = await analyze_document(document, regulation)
+            except Exception as e:
+                if is_rate_limited(e) and attempt < self.max_attempts:
+                    await self._back_off(attempt, pair)
+                    continue
+                record.update(status="failed", attempts=attempt, error=f"{type(e).__name__}: {str(e)[:300]}")
+                break
+            record.update(status="ok", attempts=attempt, cached=analysis.cached,
+                          corpus_revision=analysis.corpus_revision, output=analysis.output.model_dump())
+            break
+        record["duration_s"] = round(time.monotonic() - started, 3)
+        record["scanned_at"] = datetime.now(timezone.utc).isoformat()
+        return record
+
+    async def _back_off(self, attempt: int, pair: Pair) -> None:
+        delay = min(SCAN_BACKOFF_MAX, self.backoff_base * 2 ** (attempt - 1))
+        delay = random.uniform(delay / 2, delay)
+        print(f"[SCAN] Rate limited on {pair[0]} / {pair[1]}, retrying in {delay:.1f}s (attempt {attempt})", flush=True)
+        # Overlapping backoffs extend the pause instead of ending it early
+        self._resume_at = max(self._resume_at, time.monotonic() + delay)
+        await self._wait_for_resume()
+
+    async def _wait_for_resume(self) -> None:
+        # Loop: another backoff may push the deadline out while this one sleeps
+        while True:
+            delay = self._resume_at - time.monotonic()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    async def _append(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        async with self._write_lock:
+            with open(self.output_path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+
+def _duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Scan every business document against every regulation")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="JSONL results file, also the checkpoint")
+    parser.add_argument("--concurrency", type=int, default=SCAN_CONCURRENCY, help="Analyses running at the same time")
+    parser.add_argument("--regulations", help="Comma-separated regulations (default: those in regulations/)")
+    parser.add_argument("--documents", help="Only scan documents whose file name matches this glob")
+    parser.add_argument("--max-attempts", type=int, default=SCAN_MAX_ATTEMPTS, help="Attempts per pair when rate limited")
+    parser.add_argument("--restart", action="store_true", help="Discard the previous results instead of resuming")
+    args = parser.parse_args(argv)
+
+    documents = business_documents(args.documents)
+    if args.regulations:
+        regulations = [r.strip().upper() for r in args.regulations.split(",") if r.strip()]
+    else:
+        regulations = corpus_regulations()
+    if not documents or not regulations:
+        print("[SCAN] Nothing to scan")
+        sys.exit(1)
+
+    if args.restart and os.path.exists(args.output):
+        os.remove(args.output)
+    if not get_cache().enabled:
+        print("[SCAN] Result cache disabled (RISK_CACHE=off): every pair is analyzed again")
+
+    scanner = BatchScanner(args.output, args.concurrency, args.max_attempts)
+    progress = asyncio.run(scanner.run(documents, regulations))
+    sys.exit(1 if progress.counts["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
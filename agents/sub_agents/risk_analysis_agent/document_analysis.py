@@ -0,0 +1,183 @@
+"""
+Risk analysis of one business document against one regulation, cached.
+
+analyze_document runs the risk analysis pipeline headlessly (its own runner
+and session) for a (document, regulation) pair. The document's text is sent
+with the request, so the business side of the analysis comes from the file
+itself rather than from whatever version of it the store holds; only the
+regulation's requirements are searched. The validated RiskAnalysisOutput is
+cached (see result_cache.py) under the document's hash and the revision of
+the searched corpus, so re-analyzing an unchanged document against an
+unchanged corpus returns immediately without any model call.
+
+Usage:
+    python -m agents.sub_agents.risk_analysis_agent.document_analysis data/credit_risk_assessment.txt --regulation GDPR
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import uuid
+from typing import List, NamedTuple, Optional
+
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from ...formatting.markdown import parse_agent_output
+from ...retrieval import get_backend
+from ...retrieval.chunker import CHUNKER_VERSION, iter_document_lines
+from ...retrieval.corpus import corpus_fingerprint
+from ...schemas.structured_output import RiskAnalysisOutput
+from ...tools.file_search_tools import store_resolver
+from .agent import risk_analysis_formatter, risk_analysis_pipeline, risk_analysis_retriever
+from .result_cache import REPO_ROOT, RiskResultCache, document_hash, prompt_version
+
+
+# Agents whose instructions and models determine the analysis
+ANALYSIS_AGENTS = (risk_analysis_retriever, risk_analysis_formatter)
+
+ANALYSIS_MODEL = "+".join(str(agent.model) for agent in ANALYSIS_AGENTS)
+
+# Longest document text sent with the request; longer documents are cut
+ANALYSIS_MAX_DOCUMENT_CHARS = int(os.getenv("ANALYSIS_MAX_DOCUMENT_CHARS", "60000"))
+
+APP_NAME = "document_analysis"
+
+_WORD = re.compile(r"[A-Za-z0-9]+")
+
+logger = logging.getLogger(__name__)
+
+_cache: Optional[RiskResultCache] = None
+_runner: Optional[InMemoryRunner] = None
+
+
+class DocumentAnalysis(NamedTuple):
+    document: str
+    regulation: str
+    output: RiskAnalysisOutput
+    cached: bool
+    corpus_revision: str
+
+
+def get_cache() -> RiskResultCache:
+    global _cache
+    if _cache is None:
+        _cache = RiskResultCache()
+    return _cache
+
+
+async def corpus_revision() -> str:
+    """
+    Revision of the corpus the analysis searches: the File Search store
+    revision, or for a local backend (RETRIEVAL_BACKEND) a digest of its
+    corpus files.
+    """
+    backend = get_backend()
+    if backend is None:
+        revision = await store_resolver.arevision()
+        if revision is None:
+            # Keying cached analyses on an unknown revision could serve them stale
+            raise RuntimeError(f"Could not get the revision of File Search store {store_resolver.display_name}")
+        return f"store-{revision}"
+    fingerprint = await asyncio.to_thread(corpus_fingerprint, getattr(backend, "dirs", None))
+    digest = hashlib.sha256(json.dumps([CHUNKER_VERSION, fingerprint]).encode("utf-8"))
+    return f"{backend.name}-{digest.hexdigest()[:12]}"
+
+
+def document_text(path: str) -> str:
+    """The document's text (extracted for PDFs), at most ANALYSIS_MAX_DOCUMENT_CHARS characters."""
+    parts, size = [], 0
+    for line in iter_document_lines(path):
+        parts.append(line.text)
+        size += len(line.text)
+        if size >= ANALYSIS_MAX_DOCUMENT_CHARS:
+            break
+    return "".join(parts)[:ANALYSIS_MAX_DOCUMENT_CHARS]
+
+
+def document_request(path: str, regulation: str, text: str) -> str:
+    """The request sent to the risk analysis pipeline for a document."""
+    name = os.path.basename(path)
+    title = " ".join(_WORD.findall(os.path.splitext(name)[0]))
+    truncated = " (truncated)" if len(text) >= ANALYSIS_MAX_DOCUMENT_CHARS else ""
+    return (
+        f"Assess the {regulation} compliance risks of the business process described in "
+        f"\"{name}\" ({title}). Its full text{truncated} is below, between the <document> "
+        f"tags: base the description of the business process on this text only, and cite "
+        f"it with source \"{name}\". Do not search business documents; search only the "
+        f"{regulation} requirements, with regulation_queries and regulation=\"{regulation}\", "
+        f"and set regulation_name to \"{regulation}\".\n\n"
+        f"<document name=\"{name}\">\n{text}\n</document>"
+    )
+
+
+async def analyze_document(path: str, regulation: str, cache: Optional[RiskResultCache] = None) -> DocumentAnalysis:
+    """
+    Analyze a business document against a regulation, serving cached results.
+
+    Args:
+        path: Document path (absolute or relative to the repository root)
+        regulation: Regulation identifier, e.g. "GDPR"
+        cache: Result cache (default: shared RiskResultCache)
+
+    Raises:
+        ValueError: If the agent did not return a valid RiskAnalysisOutput
+    """
+    cache = cache or get_cache()
+    path = path if os.path.isabs(path) else os.path.join(REPO_ROOT, path)
+    relpath = os.path.relpath(path, REPO_ROOT)
+    regulation = regulation.strip().upper()
+
+    sha256 = await asyncio.to_thread(document_hash, path)
+    text = await asyncio.to_thread(document_text, path)
+    revision = await corpus_revision()
+    key = cache.make_key(sha256, regulation, ANALYSIS_MODEL, prompt_version(ANALYSIS_AGENTS), revision)
+    output = cache.get(key)
+    if output is not None:
+        logger.info("[RISK] Cached analysis of %s against %s", relpath, regulation)
+        return DocumentAnalysis(relpath, regulation, output, True, revision)
+
+    output = await _run_agent(document_request(path, regulation, text))
+    cache.set(key, output, document=relpath, regulation=regulation, model=ANALYSIS_MODEL, corpus_revision=revision)
+    return DocumentAnalysis(relpath, regulation, output, False, revision)
+
+
+async def _run_agent(request: str) -> RiskAnalysisOutput:
+    global _runner
+    if _runner is None:
+        # The pipeline itself: the multi-regulation fan-out would react to
+        # regulations merely mentioned in the document text
+        _runner = InMemoryRunner(agent=risk_analysis_pipeline, app_name=APP_NAME)
+    user_id = f"analysis-{uuid.uuid4().hex[:8]}"
+    session = await _runner.session_service.create_session(app_name=APP_NAME, user_id=user_id)
+    message = types.Content(role="user", parts=[types.Part(text=request)])
+
+    result = None
+    async for event in _runner.run_async(user_id=user_id, session_id=session.id, new_message=message):
+        if "risk_analysis_output" in event.actions.state_delta:
+            result = event.actions.state_delta["risk_analysis_output"]
+    await _runner.session_service.delete_session(app_name=APP_NAME, user_id=user_id, session_id=session.id)
+
+    output = parse_agent_output(result)
+    if not isinstance(output, RiskAnalysisOutput):
+        raise ValueError("risk analysis pipeline did not return a RiskAnalysisOutput")
+    return output
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Analyze a business document against a regulation")
+    parser.add_argument("document", help="Document path, e.g. data/credit_risk_assessment.txt")
+    parser.add_argument("--regulation", required=True, help="Regulation identifier, e.g. GDPR")
+    args = parser.parse_args(argv)
+
+    analysis = asyncio.run(analyze_document(args.document, args.regulation))
+    print(f"[RISK] {analysis.document} / {analysis.regulation}: {analysis.output.overall_risk_level}"
+          f"{' (cached)' if analysis.cached else ''}")
+    print(json.dumps(analysis.output.model_dump(), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Multi-regulation risk analysis: one concurrent analysis branch per regulation.
+
+When a question names several regulations ("GDPR and CCPA risks of ..."),
+MultiRegulationRiskAgent runs the single-regulation pipeline (retriever ->
+formatter) once per regulation at the same time, each in its own session
+through an AgentTool, and merges the RiskAnalysisOutputs with merge_outputs.
+Wall-clock time follows the slowest regulation rather than their sum.
+Questions naming zero or one regulation run the pipeline directly.
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import uuid
+from typing import Any, AsyncGenerator, Iterable, List, Optional, Sequence, Tuple
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.tools.agent_tool import AgentTool
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+
+from ...formatting.markdown import parse_agent_output
+from ...schemas.structured_output import Citation, RegulationBreakdown, RiskAnalysisOutput, RiskItem
+from ...tools.grounding import dedupe_citations
+from ...tools.metrics import counter, histogram
+from ...tools.search_filters import KNOWN_REGULATIONS
+
+
+# "on" (default) or "off": analyze all named regulations in one pass
+RISK_FANOUT = os.getenv("RISK_FANOUT", "on").strip().lower() not in ("off", "false", "0")
+
+# Regulation branches running at the same time
+RISK_FANOUT_CONCURRENCY = int(os.getenv("RISK_FANOUT_CONCURRENCY", "4"))
+
+# At most this many regulations are analyzed per question
+MAX_REGULATIONS = 6
+
+RISK_LEVELS = ("Low", "Medium", "High")
+
+FANOUT_BRANCHES = counter("risk_fanout_branches_total", "Regulation analysis branches by outcome", ["outcome"])
+FANOUT_LATENCY = histogram("risk_fanout_duration_seconds", "Multi-regulation analysis wall-clock time")
+
+_REGULATION_PATTERN = re.compile(r"\b(" + "|".join(KNOWN_REGULATIONS) + r")\b", re.IGNORECASE)
+
+logger = logging.getLogger(__name__)
+
+
+def detect_regulations(text: str) -> List[str]:
+    """Known regulations named in the text, in KNOWN_REGULATIONS order."""
+    found = {match.upper() for match in _REGULATION_PATTERN.findall(text or "")}
+    return [regulation for regulation in KNOWN_REGULATIONS if regulation in found][:MAX_REGULATIONS]
+
+
+def branch_request(query: str, regulation: str) -> str:
+    """The question as asked of a single regulation's branch."""
+    return (
+        f"{query}\n\n"
+        f"Analyze compliance with {regulation} only. Search its requirements with "
+        f"regulation=\"{regulation}\" and set regulation_name to \"{regulation}\"."
+    )
+
+
+def risk_level_rank(level: Any) -> int:
+    """Index into RISK_LEVELS; unrecognized levels count as Medium."""
+    text = str(level or "").strip().lower()
+    if text in ("high", "critical", "severe"):
+        return 2
+    if text == "low":
+        return 0
+    return 1
+
+
+def merge_outputs(outputs: Sequence[Tuple[str, RiskAnalysisOutput]], failures: Sequence[str] = ()) -> RiskAnalysisOutput:
+    """
+    Combine per-regulation outputs into one report.
+
+    Deterministic: regulations are taken in the given order, risks and lists
+    keep their order within each regulation, duplicates are dropped. The
+    overall risk level is the highest of the regulations and the compliance
+    score the lowest (the weakest regulation bounds overall compliance).
+    """
+    names = [regulation for regulation, _ in outputs]
+    scores = [output.compliance_score for _, output in outputs if output.compliance_score is not None]
+    level = max((risk_level_rank(output.overall_risk_level) for _, output in outputs), default=0)
+
+    def risks(attribute: str) -> List[RiskItem]:
+        merged, seen = [], set()
+        for regulation, output in outputs:
+            for risk in getattr(output, attribute):
+                section = risk.regulation_section or ""
+                if regulation.lower() not in section.lower():
+                    section = f"{regulation} {section}".strip()
+                key = (regulation, risk.title.strip().lower(), section.lower())
+                if key not in seen:
+                    seen.add(key)
+                    merged.append(risk.model_copy(update={"regulation_section": section}))
+        return merged
+
+    def sections(render) -> str:
+        return "\n\n".join(
+            f"**{regulation}:**\n{text.strip()}"
+            for regulation, output in outputs
+            for text in [render(output)] if text and text.strip()
+        )
+
+    gaps = _unique(gap for _, output in outputs for gap in output.information_gaps)
+    gaps.extend(f"{regulation} analysis could not be completed" for regulation in failures)
+
+    return RiskAnalysisOutput(
+        regulation_name=", ".join(names),
+        regulation_available=any(output.regulation_available for _, output in outputs),
+        overall_risk_level=RISK_LEVELS[level],
+        compliance_score=min(scores) if scores else None,
+        critical_risks=risks("critical_risks"),
+        medium_risks=risks("medium_risks"),
+        low_risks=risks("low_risks"),
+        executive_summary=sections(lambda output: output.executive_summary),
+        recommendations_roadmap=sections(lambda output: output.recommendations_roadmap),
+        information_gaps=gaps,
+        regulation_sections_analyzed=_unique(
+            section if regulation.lower() in section.lower() else f"{regulation} {section}"
+            for regulation, output in outputs for section in output.regulation_sections_analyzed
+        ),
+        citations=_unique_citations(c for _, output in outputs for c in output.citations),
+        suggested_questions=_interleave([output.suggested_questions for _, output in outputs], limit=5),
+        regulation_breakdown=[
+            RegulationBreakdown(
+                regulation_name=regulation,
+                regulation_available=output.regulation_available,
+                overall_risk_level=output.overall_risk_level,
+                compliance_score=output.compliance_score,
+                critical_risk_count=len(output.critical_risks),
+                medium_risk_count=len(output.medium_risks),
+                low_risk_count=len(output.low_risks),
+                executive_summary=output.executive_summary,
+            )
+            for regulation, output in outputs
+        ],
+    )
+
+
+class MultiRegulationRiskAgent(BaseAgent):
+    """
+    Runs `pipeline` once per regulation named in the question, concurrently.
+
+    Exposes the same output as the pipeline (RiskAnalysisOutput JSON, stored
+    under `output_key`), so callers don't know which path ran.
+    """
+
+    pipeline: BaseAgent
+    output_key: str = "risk_analysis_output"
+    concurrency: int = RISK_FANOUT_CONCURRENCY
+
+    def model_post_init(self, __context) -> None:
+        if self.pipeline not in self.sub_agents:
+            self.sub_agents.append(self.pipeline)
+        super().model_post_init(__context)
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        query = "\n".join(part.text for part in (ctx.user_content.parts if ctx.user_content else []) if part.text)
+        regulations = detect_regulations(query)
+        if len(regulations) < 2:
+            async for event in self.pipeline.run_async(ctx):
+                yield event
+            return
+
+        logger.info("[RISK] Analyzing %s in parallel", ", ".join(regulations))
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        tool = AgentTool(self.pipeline)
+        semaphore = asyncio.Semaphore(max(1, self.concurrency))
+
+        async def branch(regulation: str) -> Optional[RiskAnalysisOutput]:
+            # Each branch runs in its own session; its state stays there
+            tool_context = ToolContext(ctx, function_call_id=f"{regulation.lower()}-{uuid.uuid4().hex[:8]}")
+            async with semaphore:
+                try:
+                    result = await tool.run_async(args={"request": branch_request(query, regulation)}, tool_context=tool_context)
+                except Exception as e:
+                    logger.warning("[RISK] %s analysis failed: %s", regulation, str(e))
+                    return None
+            output = parse_agent_output(result)
+            return output if isinstance(output, RiskAnalysisOutput) else None
+
+        results = await asyncio.gather(*(branch(regulation) for regulation in regulations))
+        FANOUT_LATENCY.observe(loop.time() - started)
+
+        outputs = [(regulation, output) for regulation, output in zip(regulations, results) if output is not None]
+        failures = [regulation for regulation, output in zip(regulations, results) if output is None]
+        FANOUT_BRANCHES.labels("success").inc(len(outputs))
+        FANOUT_BRANCHES.labels("failed").inc(len(failures))
+
+        if not outputs:
+            logger.warning("[RISK] All regulation branches failed, running a single analysis")
+            async for event in self.pipeline.run_async(ctx):
+                yield event
+            return
+
+        merged = merge_outputs(outputs, failures).model_dump()
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=json.dumps(merged, ensure_ascii=False))]),
+            actions=EventActions(state_delta={self.output_key: merged}),
+        )
+
+
+def _unique(items) -> List[str]:
+    seen, unique = set(), []
+    for item in items:
+        key = (item or "").strip()
+        if key and key.lower() not in seen:
+            seen.add(key.lower())
+            unique.append(key)
+    return unique
+
+
+def _unique_citations(citations: Iterable[Citation]) -> List[Citation]:
+    """Citations deduplicated by content hash, the same way search_many merges them."""
+    merged = dedupe_citations({"source": c.source, "content": c.content} for c in citations)
+    return [Citation(source=c["source"], content=c["content"]) for c in merged]
+
+
+def _interleave(lists: Sequence[Sequence[str]], limit: int) -> List[str]:
+    """Round-robin over the lists, skipping duplicates, up to `limit` items."""
+    merged, seen = [], set()
+    for round_items in _zip_longest(lists):
+        for item in round_items:
+            key = item.strip().lower()
+            if key and key not in seen:
+                seen.add(key)
+                merged.append(item.strip())
+                if len(merged) >= limit:
+                    return merged
+    return merged
+
+
+def _zip_longest(lists: Sequence[Sequence[str]]):
+    for index in range(max((len(items) for items in lists), default=0)):
+        yield [items[index] for items in lists if index < len(items)]
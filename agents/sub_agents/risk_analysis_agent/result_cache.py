@@ -0,0 +1,183 @@
+"""
+Persistent cache of risk analyses per (document, regulation).
+
+Analyzing an unchanged business document against the same regulation gives
+the same report, but costs a retriever and a formatter LLM call every time.
+RiskResultCache stores the validated RiskAnalysisOutput on disk under a key
+built from:
+
+- the SHA-256 of the document contents (renaming or touching the file does
+  not invalidate it, editing it does); the contents are sent to the agent,
+  so the analysis depends on exactly these bytes
+- the regulation identifier
+- the models of the retriever and formatter
+- the prompt version (see prompt_version)
+- the revision of the searched corpus (the File Search store revision, or
+  the local index's files), which changes on every upload, delete or edit
+  of the regulation documents the analysis searches
+
+Entries never expire: any change to these inputs produces a different key.
+Entries that no longer validate against RiskAnalysisOutput are treated as
+misses and removed.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence
+
+from pydantic import ValidationError
+
+from ...schemas.structured_output import RiskAnalysisOutput
+from ...tools.metrics import counter
+
+
+# Repository root (agents/sub_agents/risk_analysis_agent/ is three levels below it)
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# "on" (default) or "off"
+RISK_CACHE = os.getenv("RISK_CACHE", "on").strip().lower() not in ("off", "false", "0")
+
+# Directory where analyses are persisted
+RISK_CACHE_DIR = os.getenv("RISK_CACHE_DIR", os.path.join(REPO_ROOT, ".risk_cache"))
+
+# Entries kept in memory in front of the disk tier
+RISK_CACHE_SIZE = int(os.getenv("RISK_CACHE_SIZE", "128"))
+
+# Bump when the analysis changes in a way the instructions don't show
+# (e.g. different search parameters); instruction and schema edits are
+# picked up automatically by prompt_version
+PROMPT_VERSION = "2"
+
+CACHE_LOOKUPS = counter("risk_cache_lookups_total", "Risk analysis cache lookups by outcome", ["outcome"])
+
+
+def prompt_version(agents: Sequence[Any]) -> str:
+    """
+    Version of the analysis prompts: PROMPT_VERSION plus a digest of each
+    agent's instruction and output schema.
+
+    Any edit to the risk_analysis_formatter (or retriever) instruction changes
+    the version, so entries computed with the old prompt are no longer found.
+    """
+    digest = hashlib.sha256(PROMPT_VERSION.encode("utf-8"))
+    for agent in agents:
+        instruction = getattr(agent, "instruction", "")
+        digest.update(b"\x1f" + str(getattr(agent, "name", "")).encode("utf-8"))
+        digest.update(b"\x1f" + (instruction if isinstance(instruction, str) else repr(instruction)).encode("utf-8"))
+        schema = getattr(agent, "output_schema", None)
+        if schema is not None:
+            digest.update(b"\x1f" + json.dumps(schema.model_json_schema(), sort_keys=True).encode("utf-8"))
+    return f"v{PROMPT_VERSION}-{digest.hexdigest()[:12]}"
+
+
+def document_hash(path: str) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class RiskResultCache:
+    """Disk-backed cache of RiskAnalysisOutput with a small in-memory LRU in front."""
+
+    def __init__(self, disk_dir: Optional[str] = RISK_CACHE_DIR, max_entries: int = RISK_CACHE_SIZE, enabled: bool = RISK_CACHE):
+        self.disk_dir = disk_dir
+        self.max_entries = max_entries
+        self.enabled = enabled and bool(disk_dir)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, RiskAnalysisOutput]" = OrderedDict()
+
+    @staticmethod
+    def make_key(document_sha256: str, regulation: str, model: str, version: str, corpus_revision: str) -> str:
+        """
+        Build a cache key.
+
+        Args:
+            document_sha256: document_hash() of the analyzed document
+            regulation: Regulation identifier (case-insensitive, e.g. "GDPR")
+            model: Model(s) that produce the analysis
+            version: prompt_version() of the analysis agents
+            corpus_revision: Revision of the corpus the analysis searches
+        """
+        parts = [document_sha256, regulation.strip().upper(), model, version, corpus_revision]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[RiskAnalysisOutput]:
+        """Cached analysis for the key, or None."""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            output = self._entries.get(key)
+            if output is not None:
+                self._entries.move_to_end(key)
+                CACHE_LOOKUPS.labels("hit").inc()
+                return output
+
+        output = self._read_disk(key)
+        if output is None:
+            CACHE_LOOKUPS.labels("miss").inc()
+            return None
+        CACHE_LOOKUPS.labels("disk_hit").inc()
+        with self._lock:
+            self._put(key, output)
+        return output
+
+    def set(self, key: str, output: RiskAnalysisOutput, **info: Any) -> None:
+        """
+        Store a validated analysis.
+
+        `info` (e.g. document path, regulation) is saved next to it for
+        inspection; it is not part of the key.
+        """
+        if not self.enabled:
+            return
+        output = RiskAnalysisOutput.model_validate(output.model_dump())
+        with self._lock:
+            self._put(key, output)
+        self._write_disk(key, {"info": info, "output": output.model_dump()})
+
+    def _put(self, key: str, output: RiskAnalysisOutput) -> None:
+        # Caller holds self._lock
+        self._entries[key] = output
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[RiskAnalysisOutput]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            return RiskAnalysisOutput.model_validate(data["output"])
+        except (KeyError, TypeError, ValidationError):
+            # Written by an incompatible version of the schema
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            return None
+
+    def _write_disk(self, key: str, data: Dict[str, Any]) -> None:
+        # Write then rename so concurrent readers never see a partial file
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+        except (OSError, TypeError, ValueError) as e:
+            print(f"[CACHE] Failed to write risk analysis cache entry: {str(e)}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
@@ -2,8 +2,18 @@
 Simple File Search Tools
 """
 
-from .file_search_tools import search_file_search_store
+from .file_search_tools import (
+    search_file_search_store,
+    search_file_search_store_async,
+    search_many,
+    stream_file_search_store,
+    astream_file_search_store,
+)
 
 __all__ = [
     "search_file_search_store",
+    "search_file_search_store_async",
+    "search_many",
+    "stream_file_search_store",
+    "astream_file_search_store",
 ]
\ No newline at end of file
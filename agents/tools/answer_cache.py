@@ -0,0 +1,205 @@
+"""
+Answer cache for File Search queries.
+
+Analysts ask the same questions repeatedly, and every one costs a full
+generate_content call. AnswerCache keeps recent search results in a bounded
+LRU with a TTL, optionally backed by an on-disk tier that survives restarts
+and cold starts. Keys include the store revision (see StoreResolver.revision),
+so results for an older set of documents stop being served at most
+STORE_REVISION_TTL seconds after a change made by another process; writers
+call clear() after their own uploads and deletes, which takes effect at once.
+
+This module only uses the standard library so the Cloud Function can ship a copy
+of it (see cloud_functions/file_search_api/deploy.sh).
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+# Maximum number of in-memory entries (0 disables the cache)
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "256"))
+
+# Seconds an answer stays valid
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+
+# Directory for the on-disk tier (unset = memory only)
+ANSWER_CACHE_DIR = os.getenv("ANSWER_CACHE_DIR") or None
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return _WHITESPACE.sub(" ", query).strip().rstrip("?!. ").lower()
+
+
+class AnswerCache:
+    """Bounded LRU+TTL cache of search results with an optional disk tier."""
+
+    def __init__(
+        self,
+        max_entries: int = ANSWER_CACHE_SIZE,
+        ttl: float = ANSWER_CACHE_TTL,
+        disk_dir: Optional[str] = ANSWER_CACHE_DIR
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "sets": 0, "evictions": 0, "clears": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def make_key(query: str, model: str, revision: str, **scope: Any) -> str:
+        """
+        Build a cache key from the normalized query, model and store revision.
+
+        Args:
+            query: The user query (normalized before hashing)
+            model: Gemini model name
+            revision: Store revision the answer was computed against
+            **scope: Anything else that changes the answer (e.g. filters)
+        """
+        parts = [normalize_query(query), model, revision]
+        parts.extend(f"{name}={scope[name]}" for name in sorted(scope) if scope[name] is not None)
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a cached value, checking memory first and then disk."""
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        value = self._get_memory(key, now)
+        if value is not None:
+            return value
+
+        entry = self._read_disk(key, now)
+        with self._lock:
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["disk_hits"] += 1
+            self._put(key, entry)
+        return entry[1]
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        """Async get(); the disk tier is read off the event loop."""
+        if not self.enabled:
+            return None
+        if self.disk_dir:
+            value = self._get_memory(key, time.time())
+            if value is not None:
+                return value
+            return await asyncio.to_thread(self.get, key)
+        return self.get(key)
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Cache a value in memory and, if configured, on disk."""
+        if not self.enabled:
+            return
+
+        entry = (time.time() + self.ttl, value)
+        with self._lock:
+            self._stats["sets"] += 1
+            self._put(key, entry)
+        self._write_disk(key, entry)
+
+    async def aset(self, key: str, value: Dict[str, Any]) -> None:
+        """Async set(); the disk tier is written off the event loop."""
+        if self.disk_dir:
+            await asyncio.to_thread(self.set, key, value)
+        else:
+            self.set(key, value)
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers (call after the store changes)."""
+        with self._lock:
+            self._entries.clear()
+            self._stats["clears"] += 1
+        if self.disk_dir and os.path.isdir(self.disk_dir):
+            for filename in os.listdir(self.disk_dir):
+                if filename.endswith(".json"):
+                    try:
+                        os.remove(os.path.join(self.disk_dir, filename))
+                    except OSError:
+                        pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        stats["max_entries"] = self.max_entries
+        stats["disk_dir"] = self.disk_dir
+        return stats
+
+    def _get_memory(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if now < expires_at:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return value
+                del self._entries[key]
+        return None
+
+    def _put(self, key: str, entry: tuple) -> None:
+        # Caller holds self._lock
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _read_disk(self, key: str, now: float) -> Optional[tuple]:
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if now >= data.get("expires_at", 0):
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            return None
+        return data["expires_at"], data["value"]
+
+    def _write_disk(self, key: str, entry: tuple) -> None:
+        if not self.disk_dir:
+            return
+        # Write then rename so concurrent readers never see a partial file
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"expires_at": entry[0], "value": entry[1]}, f)
+            os.replace(tmp_path, self._path(key))
+        except (OSError, TypeError, ValueError) as e:
+            print(f"[CACHE] Failed to write answer cache entry: {str(e)}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
@@ -5,12 +5,21 @@ Based on: https://ai.google.dev/gemini-api/docs/file-search
 
 NOTE: File Search is only supported with the Gemini Developer API, not Vertex AI.
 This requires using the Developer API key, not Vertex AI credentials.
+
+Set RETRIEVAL_BACKEND to serve searches from a local index instead (see
+agents/retrieval).
 """
+import asyncio
 import os
-from typing import Dict, Any
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
 from google import genai
 from google.genai import types
 from .tool_logger import log_tool_call
+from .store_resolver import get_resolver, is_not_found_error
+from .answer_cache import AnswerCache
+from .grounding import extract_citations, dedupe_citations
+from .search_filters import build_metadata_filter, normalize_metadata
+from ..retrieval import get_backend
 
 
 # Initialize Gemini Developer API client (File Search requires Developer API, not Vertex AI)
@@ -24,33 +33,137 @@ client = genai.Client(
 DATA_STORE = os.getenv("DATA_STORE", "data_v1")
 
 
+# Maximum number of searches search_many runs at the same time
+SEARCH_MANY_CONCURRENCY = int(os.getenv("SEARCH_MANY_CONCURRENCY", "4"))
+
+
+# Process-wide cache of the store resource name (avoids listing stores per call)
+store_resolver = get_resolver(client, DATA_STORE)
+
+# Repeated questions are answered from cache until the store changes
+answer_cache = AnswerCache()
+
+
 def get_store_name():
     """Get the resource name of the File Search store, creating it if it doesn't exist."""
-    try:
-        # List all stores to find ours
-        for store in client.file_search_stores.list():
-            if getattr(store, 'display_name', '') == DATA_STORE:
-                print(f"[STORE] Found store {DATA_STORE}: {store.name}")
-                return store.name
-        
-        # Store doesn't exist, create it
-        print(f"[STORE] Store {DATA_STORE} not found, creating...")
-        store = client.file_search_stores.create(
-            config={'display_name': DATA_STORE}
-        )
-        print(f"[STORE] Created store: {store.name}")
-        return store.name
-    except Exception as e:
-        print(f"[STORE ERROR] Failed to get/create store: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        raise
+    return store_resolver.resolve()
+
+
+def _search_config(store_name: str, filters: Dict[str, str] = None) -> types.GenerateContentConfig:
+    """Generation config that grounds the answer in the File Search store."""
+    return types.GenerateContentConfig(
+        tools=[
+            types.Tool(
+                file_search=types.FileSearch(
+                    file_search_store_names=[store_name],
+                    metadata_filter=build_metadata_filter(filters)
+                )
+            )
+        ]
+    )
+
+
+def _filters(
+    doc_kind: Optional[str] = None,
+    regulation: Optional[str] = None,
+    business_domain: Optional[str] = None
+) -> Dict[str, str]:
+    """Normalized metadata filters from the tools' filter arguments."""
+    return normalize_metadata({
+        "doc_kind": doc_kind,
+        "regulation": regulation,
+        "business_domain": business_domain,
+    })
+
+
+def _cache_key(query: str, model: str, revision: Optional[str], filters: Dict[str, str]) -> Optional[str]:
+    # Without a store revision the answer cache is bypassed
+    if revision is None:
+        return None
+    return answer_cache.make_key(query, model, revision, metadata_filter=build_metadata_filter(filters))
+
+
+def _cache_answer(cache_key: Optional[str], answer: str, citations: List[Dict[str, Any]]) -> None:
+    if cache_key is not None:
+        answer_cache.set(cache_key, {"answer": answer, "citations": citations})
+
+
+async def _acache_answer(cache_key: Optional[str], answer: str, citations: List[Dict[str, Any]]) -> None:
+    # The disk tier is written off the event loop
+    if cache_key is not None:
+        await answer_cache.aset(cache_key, {"answer": answer, "citations": citations})
+
+
+def _parse_response(response) -> Tuple[str, List[Dict[str, Any]]]:
+    """Get the answer text and citations from a generate_content response."""
+    # Extract answer
+    answer = response.text if hasattr(response, 'text') else str(response)
+    
+    # Extract deduplicated citations from grounding metadata
+    citations = extract_citations(response)
+    
+    print(f"[SEARCH] Found answer with {len(citations)} citations")
+    if citations:
+        print(f"[SEARCH] Sample citation: {citations[0]['source']}")
+    
+    return answer, citations
+
+
+def _search_result(answer: str, citations: List[Dict[str, Any]], cached: bool) -> Dict[str, Any]:
+    """Build the tool's result dict for a successful search."""
+    return {
+        "success": True,
+        "answer": answer,
+        "citations": citations,
+        "cached": cached,
+        "message": "✅ Search completed successfully"
+    }
+
+
+def _backend_result(backend, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the tool's result dict from a local retrieval backend's answer."""
+    print(f"[SEARCH] {backend.name} backend returned {len(result['citations'])} citations")
+    return {**_search_result(result["answer"], result["citations"], cached=False), "backend": backend.name}
+
+
+def _cached_result(cache_key: Optional[str], query: str) -> Optional[Dict[str, Any]]:
+    """Get the tool's result dict from the answer cache, or None on a miss."""
+    cached = answer_cache.get(cache_key) if cache_key is not None else None
+    return _cache_hit(cached, query)
+
+
+async def _acached_result(cache_key: Optional[str], query: str) -> Optional[Dict[str, Any]]:
+    """Async _cached_result(); the disk tier is read off the event loop."""
+    cached = await answer_cache.aget(cache_key) if cache_key is not None else None
+    return _cache_hit(cached, query)
+
+
+def _cache_hit(cached: Optional[Dict[str, Any]], query: str) -> Optional[Dict[str, Any]]:
+    if cached is None:
+        return None
+    print(f"[SEARCH] Answer cache hit for: {query}")
+    return _search_result(cached["answer"], cached["citations"], cached=True)
+
+
+def _search_error(e: Exception) -> Dict[str, Any]:
+    """Build the tool's result dict for a failed search."""
+    # Don't keep serving a store name that no longer exists until the TTL expires
+    if is_not_found_error(e):
+        store_resolver.invalidate()
+    return {
+        "success": False,
+        "error": str(e),
+        "message": f"❌ Search failed: {str(e)}"
+    }
 
 
 @log_tool_call
 def search_file_search_store(
     query: str,
-    model: str = "gemini-2.5-flash"
+    model: str = "gemini-2.5-flash",
+    doc_kind: Optional[str] = None,
+    regulation: Optional[str] = None,
+    business_domain: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Search the DATA_STORE File Search store using semantic search.
@@ -61,73 +174,358 @@ def search_file_search_store(
     Args:
         query: The search query
         model: Gemini model to use (default: gemini-2.5-flash)
+        doc_kind: Only search documents of this kind: "regulation" or
+            "business_process" (default: all documents)
+        regulation: Only search documents about this regulation, e.g. "GDPR"
+        business_domain: Only search documents in this business domain,
+            e.g. "hr", "healthcare", "marketing"
         
     Returns:
-        Dictionary with search results and citations
+        Dictionary with search results and citations. "cached" is True when the
+        answer was served from the answer cache.
         
     Example:
         search_file_search_store(
-            query="What are the data retention requirements under GDPR?"
+            query="What are the data retention requirements under GDPR?",
+            doc_kind="regulation",
+            regulation="GDPR"
         )
     """
     try:
+        filters = _filters(doc_kind, regulation, business_domain)
+        
+        # A local backend (RETRIEVAL_BACKEND) answers without the File Search store
+        backend = get_backend()
+        if backend is not None:
+            return _backend_result(backend, backend.search(query, filters=filters))
+        
         # Get the actual store resource name (not just display name)
         store_name = get_store_name()
         
+        cache_key = _cache_key(query, model, store_resolver.revision(), filters)
+        cached = _cached_result(cache_key, query)
+        if cached is not None:
+            return cached
+        
         response = client.models.generate_content(
             model=model,
             contents=query,
-            config=types.GenerateContentConfig(
-                tools=[
-                    types.Tool(
-                        file_search=types.FileSearch(
-                            file_search_store_names=[store_name]
-                        )
-                    )
-                ]
-            )
+            config=_search_config(store_name, filters)
         )
         
-        # Extract answer
-        answer = response.text if hasattr(response, 'text') else str(response)
-        
-        # Extract citations from grounding metadata
-        citations = []
-        if hasattr(response, 'candidates') and response.candidates:
-            for candidate in response.candidates:
-                if hasattr(candidate, 'grounding_metadata'):
-                    metadata = candidate.grounding_metadata
-                    if hasattr(metadata, 'grounding_chunks'):
-                        for chunk in metadata.grounding_chunks:
-                            # Try to get citation from retrieved_context first
-                            if hasattr(chunk, 'retrieved_context'):
-                                ctx = chunk.retrieved_context
-                                source = getattr(ctx, 'title', getattr(ctx, 'uri', 'Unknown'))
-                                content = getattr(ctx, 'text', '')
-                                citations.append({
-                                    "source": source,
-                                    "content": content[:500] if content else ''  # Limit content length
-                                })
-                            # Fallback to direct attributes
-                            elif hasattr(chunk, 'web') and hasattr(chunk.web, 'uri'):
-                                citations.append({
-                                    "source": getattr(chunk.web, 'title', chunk.web.uri),
-                                    "content": getattr(chunk.web, 'uri', '')
-                                })
-        
-        print(f"[SEARCH] Found answer with {len(citations)} citations")
-        if citations:
-            print(f"[SEARCH] Sample citation: {citations[0]['source']}")
+        answer, citations = _parse_response(response)
+        _cache_answer(cache_key, answer, citations)
+        return _search_result(answer, citations, cached=False)
+    except Exception as e:
+        return _search_error(e)
+
+
+async def _asearch(query: str, model: str, filters: Dict[str, str] = None) -> Dict[str, Any]:
+    """Shared body of the async search tools."""
+    try:
+        # A local backend (RETRIEVAL_BACKEND) answers without the File Search store
+        backend = get_backend()
+        if backend is not None:
+            return _backend_result(backend, await backend.asearch(query, filters=filters))
+        
+        # Get the actual store resource name (not just display name)
+        store_name = await store_resolver.aresolve()
         
-        return {
-            "success": True,
-            "answer": answer,
-            "citations": citations,
-            "message": "✅ Search completed successfully"
-        }
+        cache_key = _cache_key(query, model, await store_resolver.arevision(), filters)
+        cached = await _acached_result(cache_key, query)
+        if cached is not None:
+            return cached
+        
+        response = await client.aio.models.generate_content(
+            model=model,
+            contents=query,
+            config=_search_config(store_name, filters)
+        )
+        
+        answer, citations = _parse_response(response)
+        await _acache_answer(cache_key, answer, citations)
+        return _search_result(answer, citations, cached=False)
     except Exception as e:
+        return _search_error(e)
+
+
+@log_tool_call
+async def search_file_search_store_async(
+    query: str,
+    model: str = "gemini-2.5-flash",
+    doc_kind: Optional[str] = None,
+    regulation: Optional[str] = None,
+    business_domain: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Search the DATA_STORE File Search store using semantic search (non-blocking).
+    
+    Same behaviour and return shape as search_file_search_store, but uses the
+    async Gemini client so other agent sessions keep running during the search.
+    
+    Args:
+        query: The search query
+        model: Gemini model to use (default: gemini-2.5-flash)
+        doc_kind: Only search documents of this kind: "regulation" or
+            "business_process" (default: all documents)
+        regulation: Only search documents about this regulation, e.g. "GDPR"
+        business_domain: Only search documents in this business domain,
+            e.g. "hr", "healthcare", "marketing"
+        
+    Returns:
+        Dictionary with search results and citations. "cached" is True when the
+        answer was served from the answer cache.
+        
+    Example:
+        await search_file_search_store_async(
+            query="What are the data retention requirements under GDPR?",
+            doc_kind="regulation"
+        )
+    """
+    try:
+        filters = _filters(doc_kind, regulation, business_domain)
+    except ValueError as e:
+        return _search_error(e)
+    return await _asearch(query, model, filters)
+
+
+@log_tool_call
+async def search_many(
+    queries: Optional[List[str]] = None,
+    model: str = "gemini-2.5-flash",
+    regulation_queries: Optional[List[str]] = None,
+    business_queries: Optional[List[str]] = None,
+    regulation: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Run several File Search queries concurrently in one tool call.
+    
+    Use this instead of calling the search tool repeatedly, e.g. to look up
+    regulation requirements and business processes at the same time.
+    Scoped queries only search the matching documents, which keeps irrelevant
+    chunks out of the results; a scoped query that finds nothing is searched
+    again across all documents.
+    
+    Args:
+        queries: Queries searched across all documents
+        model: Gemini model to use (default: gemini-2.5-flash)
+        regulation_queries: Queries searched only in regulation documents
+        business_queries: Queries searched only in business process documents
+        regulation: Restrict regulation_queries to this regulation, e.g. "GDPR"
+        
+    Returns:
+        Dictionary with a per-query result map under "results" (answer,
+        success and citation_count for each query, plus unscoped_fallback
+        when a scoped query was retried across all documents; scoped queries
+        are keyed as "[regulation] ..." / "[business_process] ...") and the merged,
+        deduplicated citations of all queries under "citations"
+        
+    Example:
+        await search_many(
+            regulation_queries=["What are the data retention requirements?"],
+            business_queries=["How long do we retain customer data?"],
+            regulation="GDPR"
+        )
+    """
+    try:
+        scopes = [
+            ("", queries, {}),
+            ("regulation", regulation_queries, _filters("regulation", regulation)),
+            ("business_process", business_queries, _filters("business_process")),
+        ]
+    except ValueError as e:
+        return _search_error(e)
+    
+    # (result key, query, filters); duplicates are searched once
+    jobs = {}
+    for scope, scope_queries, filters in scopes:
+        for query in scope_queries or []:
+            if query and query.strip():
+                key = f"[{scope}] {query}" if scope else query
+                jobs.setdefault(key, (query, filters))
+    if not jobs:
         return {
             "success": False,
-            "error": str(e),
-            "message": f"❌ Search failed: {str(e)}"
+            "error": "No queries provided",
+            "message": "❌ Search failed: No queries provided"
         }
+    
+    semaphore = asyncio.Semaphore(SEARCH_MANY_CONCURRENCY)
+    
+    async def bounded_search(query: str, filters: Dict[str, str]) -> Dict[str, Any]:
+        async with semaphore:
+            result = await _asearch(query, model, filters)
+            # Documents uploaded without metadata never match a scope; search them all instead
+            if filters and result.get("success") and not result.get("citations"):
+                print(f"[SEARCH] No scoped citations, retrying unscoped: {query}")
+                result = dict(await _asearch(query, model), unscoped_fallback=True)
+            return result
+    
+    outcomes = await asyncio.gather(*(bounded_search(q, f) for q, f in jobs.values()))
+    
+    # Merge citations in query order; the per-query entries only carry a
+    # count so citations aren't sent to the model twice
+    results = {}
+    for key, result in zip(jobs, outcomes):
+        results[key] = {k: v for k, v in result.items() if k != "citations"}
+        results[key]["citation_count"] = len(result.get("citations", []))
+    citations = dedupe_citations(c for result in outcomes for c in result.get("citations", []))
+    
+    failed = [key for key, result in results.items() if not result.get("success")]
+    succeeded = len(jobs) - len(failed)
+    
+    return {
+        "success": succeeded > 0,
+        "results": results,
+        "citations": citations,
+        "failed_queries": failed,
+        "message": f"{'✅' if not failed else '⚠️'} {succeeded}/{len(jobs)} searches completed successfully"
+    }
+
+
+class _SearchStream:
+    """Turns streamed response chunks into search events and caches the final answer."""
+    
+    def __init__(self, cache_key: Optional[str]):
+        self.cache_key = cache_key
+        self.answer_parts: List[str] = []
+        self.citations: List[Dict[str, Any]] = []
+        self.result: Optional[Dict[str, Any]] = None
+    
+    def feed(self, chunk) -> List[Dict[str, Any]]:
+        # Grounding metadata usually arrives with the last chunk
+        self.citations.extend(extract_citations(chunk))
+        text = chunk.text
+        if not text:
+            return []
+        self.answer_parts.append(text)
+        return [{"type": "delta", "text": text}]
+    
+    def finish(self, cache: bool = True) -> List[Dict[str, Any]]:
+        """Final events; with cache=False the caller caches self.result itself."""
+        answer = "".join(self.answer_parts)
+        citations = dedupe_citations(self.citations)
+        print(f"[SEARCH] Streamed answer with {len(citations)} citations")
+        if cache:
+            _cache_answer(self.cache_key, answer, citations)
+        self.result = _search_result(answer, citations, cached=False)
+        return _final_events(self.result)
+
+
+def _final_events(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {"type": "citations", "citations": result["citations"]},
+        {"type": "done", "result": result},
+    ]
+
+
+def _cached_events(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # Also used for local backends, which answer in one piece
+    return [{"type": "delta", "text": result["answer"]}] + _final_events(result)
+
+
+def stream_file_search_store(
+    query: str,
+    model: str = "gemini-2.5-flash",
+    doc_kind: Optional[str] = None,
+    regulation: Optional[str] = None,
+    business_domain: Optional[str] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Search the DATA_STORE File Search store, yielding the answer as it is generated.
+    
+    Events (dicts with a "type" key), in order:
+    - {"type": "delta", "text": ...} for each piece of answer text
+    - {"type": "citations", "citations": [...]} once grounding metadata has arrived
+    - {"type": "done", "result": {...}} with the same dict search_file_search_store returns
+    A failure yields a single {"type": "error", ...} event instead of "done".
+    
+    Args:
+        query: The search query
+        model: Gemini model to use (default: gemini-2.5-flash)
+        doc_kind, regulation, business_domain: Metadata filters, as for
+            search_file_search_store
+        
+    Example:
+        for event in stream_file_search_store(query="What is our retention policy?"):
+            if event["type"] == "delta":
+                print(event["text"], end="")
+    """
+    try:
+        filters = _filters(doc_kind, regulation, business_domain)
+        backend = get_backend()
+        if backend is not None:
+            yield from _cached_events(_backend_result(backend, backend.search(query, filters=filters)))
+            return
+        
+        store_name = get_store_name()
+        cache_key = _cache_key(query, model, store_resolver.revision(), filters)
+        cached = _cached_result(cache_key, query)
+        if cached is not None:
+            yield from _cached_events(cached)
+            return
+        
+        stream = _SearchStream(cache_key)
+        for chunk in client.models.generate_content_stream(
+            model=model,
+            contents=query,
+            config=_search_config(store_name, filters)
+        ):
+            yield from stream.feed(chunk)
+        yield from stream.finish()
+    except Exception as e:
+        yield {"type": "error", **_search_error(e)}
+
+
+async def astream_file_search_store(
+    query: str,
+    model: str = "gemini-2.5-flash",
+    doc_kind: Optional[str] = None,
+    regulation: Optional[str] = None,
+    business_domain: Optional[str] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Async variant of stream_file_search_store using the async Gemini client.
+    
+    Yields the same events as stream_file_search_store.
+    
+    Args:
+        query: The search query
+        model: Gemini model to use (default: gemini-2.5-flash)
+        doc_kind, regulation, business_domain: Metadata filters, as for
+            search_file_search_store
+        
+    Example:
+        async for event in astream_file_search_store(query="What is our retention policy?"):
+            ...
+    """
+    try:
+        filters = _filters(doc_kind, regulation, business_domain)
+        backend = get_backend()
+        if backend is not None:
+            for event in _cached_events(_backend_result(backend, await backend.asearch(query, filters=filters))):
+                yield event
+            return
+        
+        store_name = await store_resolver.aresolve()
+        cache_key = _cache_key(query, model, await store_resolver.arevision(), filters)
+        cached = await _acached_result(cache_key, query)
+        if cached is not None:
+            for event in _cached_events(cached):
+                yield event
+            return
+        
+        stream = _SearchStream(cache_key)
+        async for chunk in await client.aio.models.generate_content_stream(
+            model=model,
+            contents=query,
+            config=_search_config(store_name, filters)
+        ):
+            for event in stream.feed(chunk):
+                yield event
+        events = stream.finish(cache=False)
+        await _acache_answer(cache_key, stream.result["answer"], stream.result["citations"])
+        for event in events:
+            yield event
+    except Exception as e:
+        yield {"type": "error", **_search_error(e)}
@@ -0,0 +1,149 @@
+"""
+Grounding metadata extraction - turns File Search grounding metadata into citations.
+
+Citations are built in a single pass over each candidate's grounding chunks and
+deduplicated by a content hash in Python, so prompts no longer have to ask the
+model to remove duplicates. Each citation is a compact dict:
+
+    {"id": "3f2a...", "source": "privacy_policy.txt", "content": "...",
+     "score": 0.92, "pages": [3, 4], "answer_spans": [[120, 188]]}
+
+Only "id", "source" and "content" are always present; the other keys are
+included when the API provides them.
+
+This module only uses the standard library so the Cloud Function can ship a copy
+of it (see cloud_functions/file_search_api/deploy.sh).
+"""
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional
+
+
+# Maximum characters of chunk text kept per citation
+MAX_CITATION_CONTENT = 500
+
+
+def citation_id(source: str, content: str) -> str:
+    """Content hash used to deduplicate citations."""
+    digest = hashlib.sha1(f"{source}\x1f{' '.join(content.split())}".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def extract_citations(response: Any, max_content: int = MAX_CITATION_CONTENT) -> List[Dict[str, Any]]:
+    """
+    Extract deduplicated citations from a generate_content response.
+
+    Args:
+        response: A GenerateContentResponse (or a streamed chunk of one)
+        max_content: Maximum characters of chunk text kept per citation
+
+    Returns:
+        Citations in the order their chunks appear, duplicates merged
+    """
+    citations: List[Dict[str, Any]] = []
+    by_id: Dict[str, Dict[str, Any]] = {}
+
+    for candidate in getattr(response, 'candidates', None) or []:
+        metadata = getattr(candidate, 'grounding_metadata', None)
+        if metadata is None:
+            continue
+
+        support_info = _support_info(getattr(metadata, 'grounding_supports', None))
+
+        for index, chunk in enumerate(getattr(metadata, 'grounding_chunks', None) or []):
+            citation = _chunk_citation(chunk, max_content)
+            if citation is None:
+                continue
+            score, spans = support_info.get(index, (None, None))
+            if score is not None:
+                citation["score"] = score
+            if spans:
+                citation["answer_spans"] = spans
+            _add(citation, citations, by_id)
+
+    return citations
+
+
+def dedupe_citations(citations: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Merge citation lists, keeping the first copy of each citation.
+
+    Duplicates keep the highest score and the union of their answer spans.
+    Citations without an "id" (e.g. from older cache entries) get one.
+    """
+    merged: List[Dict[str, Any]] = []
+    by_id: Dict[str, Dict[str, Any]] = {}
+    for citation in citations:
+        _add(dict(citation), merged, by_id)
+    return merged
+
+
+def _support_info(supports: Optional[List[Any]]) -> Dict[int, tuple]:
+    """Map chunk index -> (best confidence score, answer spans it supports)."""
+    info: Dict[int, tuple] = {}
+    for support in supports or []:
+        indices = getattr(support, 'grounding_chunk_indices', None) or []
+        scores = getattr(support, 'confidence_scores', None) or []
+        segment = getattr(support, 'segment', None)
+        span = None
+        if segment is not None and getattr(segment, 'end_index', None) is not None:
+            span = [getattr(segment, 'start_index', None) or 0, segment.end_index]
+
+        for position, chunk_index in enumerate(indices):
+            score = scores[position] if position < len(scores) else None
+            best, spans = info.get(chunk_index, (None, []))
+            if score is not None and (best is None or score > best):
+                best = score
+            if span is not None and span not in spans:
+                spans.append(span)
+            info[chunk_index] = (best, spans)
+    return info
+
+
+def _chunk_citation(chunk: Any, max_content: int) -> Optional[Dict[str, Any]]:
+    """Build a citation from one grounding chunk, or None if it has no source."""
+    ctx = getattr(chunk, 'retrieved_context', None)
+    if ctx is not None:
+        source = getattr(ctx, 'title', None) or getattr(ctx, 'uri', None) or 'Unknown'
+        content = getattr(ctx, 'text', None) or ''
+        citation = {"source": source, "content": content[:max_content]}
+
+        rag_chunk = getattr(ctx, 'rag_chunk', None)
+        page_span = getattr(rag_chunk, 'page_span', None) if rag_chunk is not None else None
+        if page_span is not None and getattr(page_span, 'first_page', None) is not None:
+            citation["pages"] = [page_span.first_page, getattr(page_span, 'last_page', None) or page_span.first_page]
+        elif getattr(ctx, 'page_number', None) is not None:
+            citation["pages"] = [ctx.page_number, ctx.page_number]
+
+        document = getattr(ctx, 'document_name', None)
+        if document:
+            citation["document"] = document
+        return citation
+
+    # Fallback to web citations
+    web = getattr(chunk, 'web', None)
+    if web is not None and getattr(web, 'uri', None):
+        return {"source": getattr(web, 'title', None) or web.uri, "content": web.uri}
+
+    return None
+
+
+def _add(citation: Dict[str, Any], citations: List[Dict[str, Any]], by_id: Dict[str, Dict[str, Any]]) -> None:
+    cid = citation.get("id") or citation_id(citation.get("source", ""), citation.get("content", ""))
+    existing = by_id.get(cid)
+    if existing is None:
+        citation["id"] = cid
+        if "answer_spans" in citation:
+            citation["answer_spans"] = list(citation["answer_spans"])
+        by_id[cid] = citation
+        citations.append(citation)
+        return
+
+    score = citation.get("score")
+    if score is not None and (existing.get("score") is None or score > existing["score"]):
+        existing["score"] = score
+    for span in citation.get("answer_spans", []):
+        spans = existing.setdefault("answer_spans", [])
+        if span not in spans:
+            spans.append(span)
+    if "pages" not in existing and "pages" in citation:
+        existing["pages"] = citation["pages"]
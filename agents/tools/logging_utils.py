@@ -1,22 +1,259 @@
-import logging
+"""
+Agent and tool lifecycle logging.
+
+Two modes, selected with LOG_FORMAT:
+
+- text (default): human-readable banners, as printed during local development
+- json: one JSON line per event ({"severity", "message", "event", ...}, which
+  Cloud Logging parses as structured logs). Records from the agents.* loggers
+  go through a bounded queue to a background thread, so formatting and
+  writing never block the agent loop; if the queue is full, records are
+  dropped and counted rather than waited on.
+
+In both modes payloads (tool arguments and results) are capped at
+LOG_MAX_PAYLOAD characters and only rendered when the record is written.
+LOG_SAMPLE_RATE keeps that fraction of lifecycle events, sampled per
+invocation so a sampled session is logged completely; warnings and errors
+are always kept.
+"""
+import atexit
 import json
+import logging
+import os
+import queue
+import random
+import time
+import zlib
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Callable, Dict, Optional
+
+from .metrics import counter
+
+
+# "text" or "json"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+
+# Fraction of lifecycle events logged (1.0 = all)
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+
+# Maximum characters of a logged payload (tool arguments, results)
+LOG_MAX_PAYLOAD = int(os.getenv("LOG_MAX_PAYLOAD", "2000"))
+
+# Records buffered for the background writer in json mode
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+STRUCTURED = LOG_FORMAT == "json"
+
+LOG_RECORDS_DROPPED = counter("log_records_dropped_total", "Log records dropped because the log queue was full")
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+
+class LazyFields:
+    """
+    Structured fields of a log record, rendered only when the record is written.
+
+    Values may be callables; they are called at render time (in the writer
+    thread in json mode), so expensive previews cost nothing for records
+    that are filtered out.
+    """
+
+    __slots__ = ("event", "fields")
+
+    def __init__(self, event: str, fields: Dict[str, Any]):
+        self.event = event
+        self.fields = fields
+
+    def render(self) -> Dict[str, Any]:
+        rendered = {"event": self.event}
+        for name, value in self.fields.items():
+            rendered[name] = value() if callable(value) else value
+        return rendered
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}Z",
+            "severity": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields is not None:
+            try:
+                entry.update(fields.render())
+            except Exception as e:
+                entry["render_error"] = str(e)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+JsonFormatter.converter = time.gmtime
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records when the queue is full and defers formatting."""
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Same-process queue: pass the record as is so message and fields are
+        # rendered by the listener thread instead of the caller
+        return record
+
+
+_listener: Optional[QueueListener] = None
+
+
+def configure_logging() -> None:
+    """Set up logging for LOG_FORMAT; called once when this module is imported."""
+    global _listener
+    if not STRUCTURED:
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s'
+        )
+        return
+
+    if _listener is not None:
+        return
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(JsonFormatter())
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    agents_logger = logging.getLogger("agents")
+    agents_logger.addHandler(_NonBlockingQueueHandler(log_queue))
+    agents_logger.setLevel(logging.INFO)
+    agents_logger.propagate = False
+
+
+def sampled(key: Optional[str] = None) -> bool:
+    """
+    Whether to log an event under LOG_SAMPLE_RATE.
+
+    Events with the same key (e.g. an invocation id) are all kept or all dropped.
+    """
+    if LOG_SAMPLE_RATE >= 1.0:
+        return True
+    if LOG_SAMPLE_RATE <= 0.0:
+        return False
+    if key is None:
+        return random.random() < LOG_SAMPLE_RATE
+    return zlib.crc32(key.encode("utf-8")) % 10000 < LOG_SAMPLE_RATE * 10000
+
+
+def event_extra(event: str, **fields: Any) -> Dict[str, Any]:
+    """`extra` for a logging call carrying structured fields (callables are rendered lazily)."""
+    return {"fields": LazyFields(event, fields)}
+
+
+def preview(value: Any, limit: int = LOG_MAX_PAYLOAD) -> Any:
+    """
+    JSON-friendly preview of a payload, at most about `limit` characters.
+
+    Walks the value instead of serializing it whole, so a large result costs
+    roughly `limit` work rather than its full size.
+    """
+    budget = [limit]
+
+    def walk(item: Any, depth: int) -> Any:
+        if budget[0] <= 0:
+            return "..."
+        if isinstance(item, str):
+            text = item if len(item) <= budget[0] else item[:budget[0]] + "..."
+            budget[0] -= len(text)
+            return text
+        if item is None or isinstance(item, (bool, int, float)):
+            budget[0] -= 8
+            return item
+        if depth >= 6:
+            budget[0] -= 3
+            return "..."
+        if isinstance(item, dict):
+            out = {}
+            for key, val in item.items():
+                if budget[0] <= 0:
+                    out["..."] = f"{len(item) - len(out)} more"
+                    break
+                budget[0] -= len(str(key)) + 4
+                out[str(key)] = walk(val, depth + 1)
+            return out
+        if isinstance(item, (list, tuple)):
+            out = []
+            for val in item:
+                if budget[0] <= 0:
+                    out.append(f"... {len(item) - len(out)} more")
+                    break
+                out.append(walk(val, depth + 1))
+            return out
+        return walk(str(item), depth)
+
+    return walk(value, 0)
+
+
+def _lazy_preview(value: Any) -> Callable[[], Any]:
+    return lambda: preview(value)
+
+
+class _LazyJson:
+    """Renders a capped JSON preview when the log message is formatted."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __str__(self) -> str:
+        return json.dumps(preview(self.value), indent=2, default=str, ensure_ascii=False)
+
+
+configure_logging()
+
+
 # Callback functions for agent lifecycle logging
 def log_agent_entry(callback_context, llm_request):
     """Logs when an agent is about to be executed."""
+    if not logger.isEnabledFor(logging.INFO) or not sampled(callback_context.invocation_id):
+        return
+    if STRUCTURED:
+        logger.info("agent_entry", extra=event_extra(
+            "agent_entry",
+            agent=callback_context.agent_name,
+            invocation_id=callback_context.invocation_id,
+        ))
+        return
     logger.info("="*80)
     logger.info(f"🔄 AGENT ENTRY / TRANSFER: {callback_context.agent_name}")
     logger.info("="*80)
 
 def log_agent_exit(callback_context, llm_response):
     """Logs when an agent has finished execution."""
+    if not logger.isEnabledFor(logging.INFO) or not sampled(callback_context.invocation_id):
+        return
+    if STRUCTURED:
+        logger.info("agent_exit", extra=event_extra(
+            "agent_exit",
+            agent=callback_context.agent_name,
+            invocation_id=callback_context.invocation_id,
+            function_calls=[
+                part.function_call.name
+                for part in ((llm_response.content and llm_response.content.parts) or [])
+                if part.function_call
+            ],
+            error_code=getattr(llm_response, "error_code", None),
+        ))
+        return
     logger.info("="*80)
     logger.info(f"✅ AGENT EXIT: {callback_context.agent_name}")
     # Optionally log the type of response (e.g., function call)
@@ -29,36 +266,45 @@ def log_agent_exit(callback_context, llm_response):
 # Callback functions for tool lifecycle logging
 def log_tool_entry(tool_context):
     """Logs when a tool is about to be executed."""
+    if not logger.isEnabledFor(logging.INFO) or not sampled(getattr(tool_context, 'invocation_id', None)):
+        return
+    args = getattr(tool_context, 'args', None)
+    if STRUCTURED:
+        logger.info("tool_entry", extra=event_extra(
+            "tool_entry",
+            tool=tool_context.tool_name,
+            agent=tool_context.agent_name,
+            args=_lazy_preview(args) if args else None,
+        ))
+        return
     logger.info("-"*80)
     logger.info(f"🔧 TOOL ENTRY: {tool_context.tool_name}")
     logger.info(f"   Agent: {tool_context.agent_name}")
-    
+
     # Log tool arguments if available
-    if hasattr(tool_context, 'args') and tool_context.args:
-        try:
-            args_str = json.dumps(tool_context.args, indent=2)
-            logger.info(f"   Arguments:\n{args_str}")
-        except:
-            logger.info(f"   Arguments: {tool_context.args}")
-    
+    if args:
+        logger.info("   Arguments: %s", _LazyJson(args))
+
     logger.info("-"*80)
 
 def log_tool_exit(tool_context, result):
     """Logs when a tool has finished execution."""
+    if not logger.isEnabledFor(logging.INFO) or not sampled(getattr(tool_context, 'invocation_id', None)):
+        return
+    if STRUCTURED:
+        logger.info("tool_exit", extra=event_extra(
+            "tool_exit",
+            tool=tool_context.tool_name,
+            agent=getattr(tool_context, 'agent_name', None),
+            result=_lazy_preview(result) if result else None,
+        ))
+        return
     logger.info("-"*80)
     logger.info(f"✅ TOOL EXIT: {tool_context.tool_name}")
-    
-    # Log result summary
+
+    # Log result summary (capped at LOG_MAX_PAYLOAD, rendered only if written)
     if result:
-        try:
-            # Try to log as JSON if it's a dict
-            if isinstance(result, dict):
-                result_str = json.dumps(result, indent=2)
-                logger.info(f"   Result:\n{result_str}")
-            else:
-                result_preview = str(result)[:500]  # Limit to 500 chars
-                logger.info(f"   Result: {result_preview}")
-        except:
-            logger.info(f"   Result: {result}")
-    
+        logger.info("   Result: %s", _LazyJson(result))
+
     logger.info("-"*80)
+
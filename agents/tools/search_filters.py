@@ -0,0 +1,147 @@
+"""
+Document metadata and search filters for scoped File Search queries.
+
+Documents can carry structured metadata so searches can be restricted to a
+subset of the store (e.g. only regulation text, or only GDPR):
+
+- doc_kind: "regulation" or "business_process"
+- regulation: regulation name, e.g. "GDPR", "CCPA", "HIPAA"
+- business_domain: e.g. "hr", "healthcare", "marketing"
+
+The same filters drive File Search metadata_filter expressions and the local
+retrieval backends.
+
+This module only uses the standard library so the Cloud Function can ship a copy
+of it (see cloud_functions/file_search_api/deploy.sh).
+"""
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+
+METADATA_KEYS = ("doc_kind", "regulation", "business_domain")
+
+DOC_KINDS = ("regulation", "business_process")
+
+KNOWN_REGULATIONS = ("GDPR", "CCPA", "CPRA", "HIPAA", "COPPA", "FERPA", "GLBA", "PIPEDA", "LGPD")
+
+# Keywords in a business document's file name -> business_domain
+_DOMAIN_KEYWORDS = (
+    ("employee", "hr"),
+    ("healthcare", "healthcare"),
+    ("patient", "healthcare"),
+    ("child", "education"),
+    ("educational", "education"),
+    ("credit", "finance"),
+    ("marketing", "marketing"),
+    ("advertising", "marketing"),
+    ("recommendation", "ecommerce"),
+    ("ecommerce", "ecommerce"),
+    ("vendor", "vendor_management"),
+    ("customer", "customer"),
+    ("user", "customer"),
+    ("privacy", "privacy"),
+    ("breach", "privacy"),
+    ("deletion", "privacy"),
+)
+
+_WORD = re.compile(r"[A-Za-z]+")
+
+
+def normalize_metadata(metadata: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Validate and normalize document metadata or search filters.
+
+    Unset values are dropped, regulation names are upper-cased and other
+    values lower-cased.
+
+    Raises:
+        ValueError: for non-object input, unknown keys or an unknown doc_kind
+    """
+    if not metadata:
+        return {}
+    if not isinstance(metadata, dict):
+        raise ValueError(f"Metadata must be an object of key/value pairs, got {type(metadata).__name__}")
+    normalized = {}
+    for key, value in metadata.items():
+        if key not in METADATA_KEYS:
+            raise ValueError(f"Unknown metadata key: {key}. Valid keys: {', '.join(METADATA_KEYS)}")
+        if value is None or str(value).strip() == "":
+            continue
+        value = str(value).strip()
+        normalized[key] = value.upper() if key == "regulation" else value.lower()
+    if normalized.get("doc_kind") and normalized["doc_kind"] not in DOC_KINDS:
+        raise ValueError(f"Unknown doc_kind: {normalized['doc_kind']}. Valid kinds: {', '.join(DOC_KINDS)}")
+    return normalized
+
+
+def to_custom_metadata(metadata: Dict[str, str]) -> List[Dict[str, str]]:
+    """Document metadata as File Search custom_metadata entries."""
+    return [{"key": key, "string_value": value} for key, value in normalize_metadata(metadata).items()]
+
+
+def from_custom_metadata(entries: Optional[List[Dict[str, Any]]]) -> Dict[str, str]:
+    """Document metadata from File Search REST customMetadata entries."""
+    metadata = {}
+    for entry in entries or []:
+        value = entry.get("stringValue", entry.get("string_value"))
+        if entry.get("key") and value is not None:
+            metadata[entry["key"]] = value
+    return metadata
+
+
+def build_metadata_filter(filters: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    File Search metadata_filter expression (AIP-160) for the given filters.
+
+    Example: {"doc_kind": "regulation", "regulation": "gdpr"}
+             -> 'doc_kind = "regulation" AND regulation = "GDPR"'
+    """
+    normalized = normalize_metadata(filters)
+    if not normalized:
+        return None
+    return " AND ".join(
+        f'{key} = "{_quote(normalized[key])}"' for key in METADATA_KEYS if key in normalized
+    )
+
+
+def matches(metadata: Dict[str, str], filters: Optional[Dict[str, str]]) -> bool:
+    """True if document metadata satisfies every (normalized) filter."""
+    return all(metadata.get(key) == value for key, value in (filters or {}).items())
+
+
+def infer_metadata(path: str) -> Dict[str, str]:
+    """
+    Best-effort metadata for a local corpus file from its path.
+
+    Files under a regulations/ directory are regulations (named after the
+    first known regulation in the file name); everything else is a business
+    process, with a domain guessed from the file name. A bare file name (e.g.
+    an upload from the UI) has no directory to go by, so it counts as a
+    regulation when it names a known regulation or the word "regulation(s)".
+    """
+    parts = path.replace("\\", "/").lower().split("/")
+    filename = os.path.basename(path)
+    words = [w.lower() for w in _WORD.findall(filename)]
+
+    bare_regulation = len(parts) == 1 and any(
+        word.upper() in KNOWN_REGULATIONS or word in ("regulation", "regulations") for word in words
+    )
+    if "regulations" in parts[:-1] or bare_regulation:
+        metadata = {"doc_kind": "regulation"}
+        for word in words:
+            if word.upper() in KNOWN_REGULATIONS:
+                metadata["regulation"] = word.upper()
+                break
+        return metadata
+
+    metadata = {"doc_kind": "business_process"}
+    for keyword, domain in _DOMAIN_KEYWORDS:
+        if any(word.startswith(keyword) for word in words):
+            metadata["business_domain"] = domain
+            break
+    return metadata
+
+
+def _quote(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
@@ -0,0 +1,279 @@
+"""
+File Search store resolver - maps the DATA_STORE display name to its resource name.
+
+Resolving the store used to list every File Search store before each search,
+upload and list call. The resolver caches the resolved store for a TTL, caches
+"store not found" answers for a shorter TTL, and serialises store creation so
+concurrent first calls cannot create duplicate stores.
+
+The store's revision (used to key answer caches) is cached separately for a
+much shorter TTL, so a change made by another process or function instance
+is noticed within STORE_REVISION_TTL seconds.
+
+This module only uses the standard library so the Cloud Function can ship a copy
+of it (see cloud_functions/file_search_api/deploy.sh).
+"""
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+
+# How long a resolved store is trusted before it is looked up again
+STORE_CACHE_TTL = float(os.getenv("STORE_CACHE_TTL", "600"))
+
+# How long a "store does not exist" answer is trusted (lookups with create=False)
+STORE_NEGATIVE_CACHE_TTL = float(os.getenv("STORE_NEGATIVE_CACHE_TTL", "30"))
+
+# How long a store revision is trusted before the store is fetched again;
+# bounds how long cached answers outlive a change made elsewhere
+STORE_REVISION_TTL = float(os.getenv("STORE_REVISION_TTL", "10"))
+
+
+class StoreResolver:
+    """Resolves and caches the File Search store with a given display name."""
+
+    def __init__(
+        self,
+        client: Any,
+        display_name: str,
+        ttl: float = STORE_CACHE_TTL,
+        negative_ttl: float = STORE_NEGATIVE_CACHE_TTL,
+        revision_ttl: float = STORE_REVISION_TTL
+    ):
+        self.client = client
+        self.display_name = display_name
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.revision_ttl = revision_ttl
+
+        # Serialises lookups and creation; the fast path never takes it
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        self._store = None
+        self._expires_at = 0.0
+        self._negative_expires_at = 0.0
+        self._resolved_at = 0.0
+
+        # (store name, fingerprint, expiry) of the last revision lookup
+        self._revision_lock = threading.Lock()
+        self._revision: Optional[Tuple[str, str, float]] = None
+        # Bumped by invalidate() so a lookup started before it isn't cached
+        self._generation = 0
+
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "negative_hits": 0,
+            "lookups": 0,
+            "creates": 0,
+            "errors": 0,
+            "invalidations": 0,
+            "revision_lookups": 0,
+            "revision_errors": 0,
+        }
+
+    def resolve(self, create: bool = True) -> Optional[str]:
+        """
+        Get the resource name of the store.
+
+        Args:
+            create: Create the store if it does not exist. When False, a missing
+                store returns None and that answer is cached for negative_ttl.
+
+        Returns:
+            The store resource name (e.g. "fileSearchStores/abc"), or None
+        """
+        store = self.get_store(create=create)
+        return store.name if store is not None else None
+
+    def get_store(self, create: bool = True) -> Optional[Any]:
+        """Get the cached store object, looking it up (and creating it) on a miss."""
+        cached = self._cached(create)
+        if cached is not _MISS:
+            return cached
+
+        with self._lock:
+            # Another thread may have resolved the store while we were waiting
+            cached = self._cached(create)
+            if cached is not _MISS:
+                return cached
+
+            self._count("misses")
+            try:
+                store = self._lookup()
+                if store is None:
+                    if not create:
+                        self._negative_expires_at = time.monotonic() + self.negative_ttl
+                        return None
+                    store = self._create()
+            except Exception as e:
+                self._count("errors")
+                print(f"[STORE ERROR] Failed to get/create store: {str(e)}")
+                raise
+
+            now = time.monotonic()
+            self._store = store
+            self._resolved_at = now
+            self._expires_at = now + self.ttl
+            self._negative_expires_at = 0.0
+            return store
+
+    async def aget_store(self, create: bool = True) -> Optional[Any]:
+        """Async get_store(); a cache miss is resolved off the event loop."""
+        cached = self._cached(create)
+        if cached is not _MISS:
+            return cached
+        return await asyncio.to_thread(self.get_store, create)
+
+    async def aresolve(self, create: bool = True) -> Optional[str]:
+        """Async resolve()."""
+        store = await self.aget_store(create=create)
+        return store.name if store is not None else None
+
+    def revision(self) -> Optional[str]:
+        """
+        Short fingerprint of the store's contents, for keying caches.
+
+        Built from the store's update time and document counts, so it changes
+        when documents are added or removed. The store is fetched again once
+        the last fingerprint is older than revision_ttl (independently of the
+        name cache), so changes made by other processes show up within that
+        time; invalidate() makes in-process changes visible immediately.
+
+        Caches are only an optimisation, so a failed fetch does not fail the
+        caller: the last fingerprint is returned if nothing was invalidated
+        since, and None otherwise (callers then bypass their cache).
+        """
+        store_name = self.resolve()
+        fingerprint = self._cached_revision(store_name)
+        if fingerprint is not None:
+            return fingerprint
+
+        with self._revision_lock:
+            fingerprint = self._cached_revision(store_name)
+            if fingerprint is not None:
+                return fingerprint
+            self._count("revision_lookups")
+            generation = self._generation
+            try:
+                store = self.client.file_search_stores.get(name=store_name)
+            except Exception as e:
+                self._count("revision_errors")
+                if is_not_found_error(e):
+                    self.invalidate()
+                    raise
+                stale = self._revision
+                print(f"[STORE ERROR] Failed to get store revision: {str(e)}")
+                return stale[1] if stale is not None and stale[0] == store_name else None
+            fingerprint = _fingerprint(store)
+            if generation == self._generation:
+                self._revision = (store_name, fingerprint, time.monotonic() + self.revision_ttl)
+            return fingerprint
+
+    async def arevision(self) -> Optional[str]:
+        """Async revision(); a stale revision is fetched off the event loop."""
+        store_name = await self.aresolve()
+        fingerprint = self._cached_revision(store_name)
+        if fingerprint is not None:
+            return fingerprint
+        return await asyncio.to_thread(self.revision)
+
+    def invalidate(self) -> None:
+        """Forget the cached store and revision so the next call looks them up again."""
+        with self._lock:
+            self._store = None
+            self._expires_at = 0.0
+            self._negative_expires_at = 0.0
+            self._revision = None
+            self._generation += 1
+        self._count("invalidations")
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and the currently cached store, for logging and debugging."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        served = stats["hits"] + stats["negative_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["hits"] + stats["negative_hits"]) / served, 4) if served else 0.0
+        stats["display_name"] = self.display_name
+        stats["store_name"] = self._store.name if self._store is not None else None
+        stats["age_seconds"] = round(time.monotonic() - self._resolved_at, 1) if self._store is not None else None
+        return stats
+
+    def _cached(self, create: bool):
+        now = time.monotonic()
+        store = self._store
+        if store is not None and now < self._expires_at:
+            self._count("hits")
+            return store
+        if not create and now < self._negative_expires_at:
+            self._count("negative_hits")
+            return None
+        return _MISS
+
+    def _cached_revision(self, store_name: str) -> Optional[str]:
+        cached = self._revision
+        if cached is not None and cached[0] == store_name and time.monotonic() < cached[2]:
+            return cached[1]
+        return None
+
+    def _lookup(self) -> Optional[Any]:
+        self._count("lookups")
+        for store in self.client.file_search_stores.list():
+            if getattr(store, 'display_name', '') == self.display_name:
+                print(f"[STORE] Found store {self.display_name}: {store.name}")
+                return store
+        return None
+
+    def _create(self) -> Any:
+        print(f"[STORE] Store {self.display_name} not found, creating...")
+        store = self.client.file_search_stores.create(
+            config={'display_name': self.display_name}
+        )
+        self._count("creates")
+        print(f"[STORE] Created store: {store.name}")
+        return store
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self._stats[key] += 1
+
+
+def _fingerprint(store: Any) -> str:
+    fingerprint = "|".join(str(part) for part in (
+        store.name,
+        getattr(store, 'update_time', None),
+        getattr(store, 'active_documents_count', None),
+        getattr(store, 'pending_documents_count', None),
+        getattr(store, 'failed_documents_count', None),
+        getattr(store, 'size_bytes', None),
+    ))
+    return hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()[:12]
+
+
+def is_not_found_error(error: Exception) -> bool:
+    """True if an API error means the cached store name no longer exists."""
+    return getattr(error, 'code', None) == 404 or 'NOT_FOUND' in str(error)
+
+
+# Sentinel distinguishing "not cached" from a cached "store does not exist"
+_MISS = object()
+
+_resolvers: Dict[Tuple[int, str], StoreResolver] = {}
+_resolvers_lock = threading.Lock()
+
+
+def get_resolver(client: Any, display_name: str) -> StoreResolver:
+    """Get the process-wide resolver for a client and store display name."""
+    key = (id(client), display_name)
+    resolver = _resolvers.get(key)
+    if resolver is None:
+        with _resolvers_lock:
+            resolver = _resolvers.get(key)
+            if resolver is None:
+                resolver = StoreResolver(client, display_name)
+                _resolvers[key] = resolver
+    return resolver
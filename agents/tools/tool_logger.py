@@ -1,54 +1,182 @@
 """
-Tool logging wrapper to add entry/exit logging to all tools.
+Tool logging wrapper to add entry/exit logging and metrics to all tools.
+
+Every call is timed with a monotonic clock and recorded in the metrics
+registry (see metrics.py):
+
+- tool_call_duration_seconds{tool}: latency histogram
+- tool_calls_total{tool, outcome}: outcome is "success", "failed" (the tool
+  returned {"success": False}) or "error" (it raised)
+- tool_calls_in_flight{tool}: calls currently running
+- tool_result_bytes{tool}: approximate size of returned results
+
+Results are only rendered into the log when DEBUG logging is enabled for this
+module, so large citation payloads cost nothing at INFO. Entry and success
+lines follow LOG_SAMPLE_RATE, sampled per invocation like the agent callbacks
+(the wrapper asks ADK for the tool_context to learn the invocation id), so a
+call's entry and exit lines are kept or dropped together; failures and errors
+are always logged. With
+LOG_FORMAT=json each line carries tool, outcome and duration_s fields (see
+logging_utils.py).
 """
 import functools
+import inspect
+import logging
+import reprlib
 import time
-from typing import Any, Callable
+from typing import Any, Callable, Optional
+
+from .logging_utils import event_extra, sampled
+from .metrics import SIZE_BUCKETS, counter, gauge, histogram
+
+
+logger = logging.getLogger(__name__)
+
+# Abbreviated repr for DEBUG logs; never renders a whole large result
+_short = reprlib.Repr()
+_short.maxstring = 200
+_short.maxother = 200
+_short.maxdict = 8
+_short.maxlist = 5
+_short.maxlevel = 3
+
+TOOL_LATENCY = histogram("tool_call_duration_seconds", "Tool call latency", ["tool"])
+TOOL_CALLS = counter("tool_calls_total", "Tool calls by outcome", ["tool", "outcome"])
+TOOL_IN_FLIGHT = gauge("tool_calls_in_flight", "Tool calls currently running", ["tool"])
+TOOL_RESULT_BYTES = histogram("tool_result_bytes", "Approximate size of tool results", ["tool"], SIZE_BUCKETS)
 
 
 def log_tool_call(func: Callable) -> Callable:
     """
-    Decorator to log tool entry and exit with timing information.
-    
+    Decorator to log tool entry and exit and record call metrics.
+
+    Works for both regular and async (coroutine) tool functions.
+
     Args:
         func: The tool function to wrap
-        
+
     Returns:
-        Wrapped function with logging
+        Wrapped function with logging and metrics
     """
+    tool_name = func.__name__
+    in_flight = TOOL_IN_FLIGHT.labels(tool_name)
+    signature = inspect.signature(func)
+    # ADK passes tool_context to tools whose signature has it; the wrapper
+    # accepts it for the sampling key even if the tool itself doesn't
+    takes_context = "tool_context" in signature.parameters
+
+    def sample(kwargs: dict) -> bool:
+        tool_context = kwargs.get("tool_context") if takes_context else kwargs.pop("tool_context", None)
+        return sampled(_sample_key(tool_context))
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs) -> Any:
+            keep = sample(kwargs)
+            _log_entry(tool_name, args, kwargs, keep)
+            in_flight.inc()
+            start_time = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                _log_error(tool_name, time.perf_counter() - start_time, e)
+                raise
+            finally:
+                in_flight.dec()
+            _log_success(tool_name, time.perf_counter() - start_time, result, keep)
+            return result
+
+        return _with_context(async_wrapper, signature, takes_context)
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs) -> Any:
-        tool_name = func.__name__
-        
         # Log entry
-        print(f"[TOOL_ENTRY] 🔧 {tool_name}")
-        print(f"[TOOL_ENTRY] Args: {args if args else 'None'}")
-        print(f"[TOOL_ENTRY] Kwargs: {list(kwargs.keys()) if kwargs else 'None'}")
-        
-        start_time = time.time()
-        
+        keep = sample(kwargs)
+        _log_entry(tool_name, args, kwargs, keep)
+        in_flight.inc()
+        start_time = time.perf_counter()
+
         try:
             # Execute the tool
             result = func(*args, **kwargs)
-            
-            # Log successful exit
-            elapsed = time.time() - start_time
-            print(f"[TOOL_EXIT] ✅ {tool_name} - Success ({elapsed:.2f}s)")
-            print(f"[TOOL_EXIT] Result type: {type(result).__name__}")
-            
-            # Log result summary (truncate if too long)
-            result_str = str(result)
-            if len(result_str) > 200:
-                result_str = result_str[:200] + "..."
-            print(f"[TOOL_EXIT] Result: {result_str}")
-            
-            return result
-            
         except Exception as e:
             # Log error exit
-            elapsed = time.time() - start_time
-            print(f"[TOOL_EXIT] ❌ {tool_name} - Error ({elapsed:.2f}s)")
-            print(f"[TOOL_EXIT] Error: {type(e).__name__}: {str(e)}")
+            _log_error(tool_name, time.perf_counter() - start_time, e)
             raise
-    
+        finally:
+            in_flight.dec()
+
+        # Log successful exit
+        _log_success(tool_name, time.perf_counter() - start_time, result, keep)
+        return result
+
+    return _with_context(wrapper, signature, takes_context)
+
+
+def _with_context(wrapper: Callable, signature: inspect.Signature, takes_context: bool) -> Callable:
+    """Advertise an optional keyword-only tool_context on the wrapper's signature."""
+    parameters = list(signature.parameters.values())
+    if not takes_context and not any(p.kind is inspect.Parameter.VAR_KEYWORD for p in parameters):
+        context = inspect.Parameter("tool_context", inspect.Parameter.KEYWORD_ONLY, default=None)
+        wrapper.__signature__ = signature.replace(parameters=[*parameters, context])
     return wrapper
+
+
+def _sample_key(tool_context: Any) -> Optional[str]:
+    # Same key as the agent callbacks in logging_utils.py; a call without a
+    # context still gets one decision for its entry and exit
+    return getattr(tool_context, "invocation_id", None) or getattr(tool_context, "function_call_id", None)
+
+
+def _log_entry(tool_name: str, args: tuple, kwargs: dict, keep: bool) -> None:
+    if keep:
+        logger.info("[TOOL_ENTRY] 🔧 %s", tool_name, extra=event_extra("tool_entry", tool=tool_name))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[TOOL_ENTRY] Args: %s", _short.repr(args) if args else "None")
+        logger.debug("[TOOL_ENTRY] Kwargs: %s", list(kwargs.keys()) if kwargs else "None")
+
+
+def _log_success(tool_name: str, elapsed: float, result: Any, keep: bool) -> None:
+    failed = isinstance(result, dict) and result.get("success") is False
+    TOOL_LATENCY.labels(tool_name).observe(elapsed)
+    TOOL_CALLS.labels(tool_name, "failed" if failed else "success").inc()
+    TOOL_RESULT_BYTES.labels(tool_name).observe(approx_size(result))
+
+    if failed:
+        logger.warning("[TOOL_EXIT] ⚠️ %s - Failed (%.3fs): %s", tool_name, elapsed, result.get("error"),
+                       extra=event_extra("tool_exit", tool=tool_name, outcome="failed",
+                                         duration_s=round(elapsed, 4), error=result.get("error")))
+    elif keep:
+        logger.info("[TOOL_EXIT] ✅ %s - Success (%.3fs)", tool_name, elapsed,
+                    extra=event_extra("tool_exit", tool=tool_name, outcome="success", duration_s=round(elapsed, 4)))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[TOOL_EXIT] Result type: %s", type(result).__name__)
+        logger.debug("[TOOL_EXIT] Result: %s", _short.repr(result))
+
+
+def _log_error(tool_name: str, elapsed: float, error: Exception) -> None:
+    TOOL_LATENCY.labels(tool_name).observe(elapsed)
+    TOOL_CALLS.labels(tool_name, "error").inc()
+    logger.error("[TOOL_EXIT] ❌ %s - Error (%.3fs): %s: %s", tool_name, elapsed, type(error).__name__, error,
+                 extra=event_extra("tool_exit", tool=tool_name, outcome="error", duration_s=round(elapsed, 4),
+                                   error=f"{type(error).__name__}: {error}"))
+
+
+def approx_size(value: Any) -> int:
+    """
+    Approximate serialized size of a result in bytes.
+
+    Sums string lengths (plus a few bytes per key and item) instead of
+    rendering the whole result, so it stays cheap for large citation lists.
+    """
+    if isinstance(value, str):
+        return len(value) + 2
+    if isinstance(value, dict):
+        return 2 + sum(len(str(k)) + 4 + approx_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return 2 + sum(approx_size(v) + 1 for v in value)
+    if value is None or isinstance(value, bool):
+        return 4
+    if isinstance(value, (int, float)):
+        return 8
+    return len(str(value))
@@ -13,6 +13,14 @@ if [ ! -f ".env.yaml" ]; then
     exit 1
 fi
 
+# Copy helpers shared with the agent tools into the function source
+SHARED_MODULES="store_resolver.py answer_cache.py grounding.py search_filters.py metrics.py"
+mkdir -p _shared
+for module in $SHARED_MODULES; do
+    cp "../../agents/tools/$module" _shared/
+done
+trap 'rm -rf _shared' EXIT
+
 # Deploy the function
 echo "Deploying to Google Cloud Functions..."
 gcloud functions deploy file-search-api \
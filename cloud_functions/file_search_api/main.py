@@ -3,43 +3,120 @@ Google Cloud Function for Gemini File Search API operations.
 Handles direct file uploads, searches, and document management.
 """
 
+import io
 import os
+import sys
+import json
+import time
+import random
 import base64
 import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
 import functions_framework
-from flask import jsonify
+from flask import Response, jsonify, stream_with_context
 from google import genai
 from google.genai import types
 
+# Helpers shared with the agent tools live in agents/tools. deploy.sh copies them
+# into _shared/ for deployment; a local checkout imports them in place.
+_FUNCTION_DIR = os.path.dirname(os.path.abspath(__file__))
+for _shared_dir in (
+    os.path.join(_FUNCTION_DIR, '_shared'),
+    os.path.normpath(os.path.join(_FUNCTION_DIR, '..', '..', 'agents', 'tools')),
+):
+    if os.path.isdir(_shared_dir) and _shared_dir not in sys.path:
+        sys.path.append(_shared_dir)
+
+from store_resolver import get_resolver, is_not_found_error
+from answer_cache import AnswerCache
+from grounding import extract_citations, dedupe_citations
+from search_filters import (
+    build_metadata_filter, from_custom_metadata, infer_metadata, matches, normalize_metadata, to_custom_metadata
+)
+from metrics import CONTENT_TYPE, REGISTRY, counter, gauge, histogram
+
 # Initialize Gemini client
 client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
 
 # Get the data store name from environment variable
 DATA_STORE = os.getenv("DATA_STORE", "data_v1")
 
+# Cached per instance so warm invocations skip listing every store
+store_resolver = get_resolver(client, DATA_STORE)
+
+# Search answers, keyed on the store revision and cleared on upload/delete
+answer_cache = AnswerCache()
+
+# Document listings (whole or per page), keyed on the store revision and cleared on upload/delete
+LIST_CACHE_TTL = float(os.getenv("LIST_CACHE_TTL", "300"))
+list_cache = AnswerCache(max_entries=int(os.getenv("LIST_CACHE_SIZE", "64")), ttl=LIST_CACHE_TTL, disk_dir=None)
+
+# Largest page the documents endpoint returns
+LIST_PAGE_SIZE_MAX = 20
+
+# Upload operations this instance has seen finish (and invalidated caches for)
+FINISHED_OPERATIONS_MAX = 1024
+finished_operations = OrderedDict()
+finished_operations_lock = threading.Lock()
+
+SEARCH_MODEL = 'gemini-2.5-flash'
+
+OPERATIONS = ('upload', 'upload_stream', 'bulk_upload', 'status', 'search', 'search_stream', 'list', 'delete', 'bulk_delete', 'stats', 'metrics')
+
+REQUESTS = counter('file_search_api_requests_total', 'Requests by operation and HTTP status', ['operation', 'status'])
+REQUEST_LATENCY = histogram('file_search_api_request_duration_seconds', 'Request latency by operation', ['operation'])
+CACHE_STATS = gauge('file_search_api_cache_stat', 'Store and answer cache counters for this instance', ['cache', 'stat'])
+
+# REST endpoint for calls the SDK can't make (same override the SDK honors)
+GEMINI_API_BASE_URL = os.getenv("GOOGLE_GEMINI_BASE_URL", "https://generativelanguage.googleapis.com").rstrip('/')
+
+# Bytes of a streamed upload held in memory and sent to Gemini per request;
+# rounded down to a multiple of 256 KiB, as the resumable upload protocol requires
+UPLOAD_CHUNK_GRANULARITY = 256 * 1024
+UPLOAD_CHUNK_SIZE = max(
+    UPLOAD_CHUNK_GRANULARITY,
+    int(os.getenv("UPLOAD_CHUNK_SIZE", str(8 * 1024 * 1024))) // UPLOAD_CHUNK_GRANULARITY * UPLOAD_CHUNK_GRANULARITY
+)
 
-def get_store_name():
+# Keep-alive connections to the REST endpoint, shared by all requests of this instance
+http_session = requests.Session()
+http_session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16))
+http_session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+# Upload operation polling: first delay and cap in seconds (doubled per poll, with jitter)
+UPLOAD_POLL_INITIAL = float(os.getenv("UPLOAD_POLL_INITIAL", "1"))
+UPLOAD_POLL_MAX = float(os.getenv("UPLOAD_POLL_MAX", "10"))
+
+# Longest a status request may wait for an upload to finish
+STATUS_MAX_WAIT = 25.0
+
+# Files of a bulk upload sent to the store at the same time
+BULK_UPLOAD_CONCURRENCY = int(os.getenv("BULK_UPLOAD_CONCURRENCY", "4"))
+
+# Most files accepted by one bulk upload
+BULK_UPLOAD_MAX_FILES = int(os.getenv("BULK_UPLOAD_MAX_FILES", "100"))
+
+# Documents of a bulk delete deleted at the same time
+BULK_DELETE_CONCURRENCY = int(os.getenv("BULK_DELETE_CONCURRENCY", "8"))
+
+# Most documents deleted by one bulk delete
+BULK_DELETE_MAX_DOCUMENTS = int(os.getenv("BULK_DELETE_MAX_DOCUMENTS", "500"))
+
+# Attempts per document when the API is rate limited or unavailable
+BULK_DELETE_MAX_ATTEMPTS = int(os.getenv("BULK_DELETE_MAX_ATTEMPTS", "4"))
+
+# First retry delay in seconds (doubles per attempt, with jitter)
+BULK_DELETE_BACKOFF_BASE = 0.5
+
+
+def get_store_name(create=True):
     """Get the resource name of the File Search store, creating it if it doesn't exist."""
-    try:
-        # List all stores to find ours
-        for store in client.file_search_stores.list():
-            if getattr(store, 'display_name', '') == DATA_STORE:
-                print(f"[STORE] Found store {DATA_STORE}: {store.name}")
-                return store.name
-        
-        # Store doesn't exist, create it
-        print(f"[STORE] Store {DATA_STORE} not found, creating...")
-        store = client.file_search_stores.create(
-            config={'display_name': DATA_STORE}
-        )
-        print(f"[STORE] Created store: {store.name}")
-        return store.name
-    except Exception as e:
-        print(f"[STORE ERROR] Failed to get/create store: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        raise
+    return store_resolver.resolve(create=create)
 
 
 def ensure_store_exists():
@@ -47,6 +124,55 @@ def ensure_store_exists():
     get_store_name()
 
 
+def search_config(store_name, filters=None):
+    """Generation config that grounds the answer in the File Search store, optionally scoped by metadata."""
+    return types.GenerateContentConfig(
+        tools=[
+            types.Tool(
+                file_search=types.FileSearch(
+                    file_search_store_names=[store_name],
+                    metadata_filter=build_metadata_filter(filters)
+                )
+            )
+        ]
+    )
+
+
+def search_cache_key(query, filters):
+    """Answer cache key for a query and its metadata filters; None bypasses the cache."""
+    revision = store_resolver.revision()
+    if revision is None:
+        return None
+    return answer_cache.make_key(
+        query,
+        SEARCH_MODEL,
+        revision,
+        metadata_filter=build_metadata_filter(filters)
+    )
+
+
+def invalidate_store_caches():
+    """Forget cached store metadata, answers and listings after the store's documents change."""
+    store_resolver.invalidate()
+    answer_cache.clear()
+    list_cache.clear()
+
+
+def mark_operation_finished(operation_name):
+    """
+    Record that an upload operation finished; True the first time this
+    instance sees it, so repeated status polls don't clear the caches again.
+    """
+    with finished_operations_lock:
+        if operation_name in finished_operations:
+            finished_operations.move_to_end(operation_name)
+            return False
+        finished_operations[operation_name] = True
+        while len(finished_operations) > FINISHED_OPERATIONS_MAX:
+            finished_operations.popitem(last=False)
+        return True
+
+
 @functions_framework.http
 def file_search_api(request):
     """
@@ -54,9 +180,16 @@ def file_search_api(request):
     
     Supported operations (based on official Gemini File Search API):
     - POST /upload - Upload a file to File Search store
+    - POST /upload_stream - Upload a file sent as the raw request body
+    - POST /bulk_upload - Upload many files in one request
+    - GET/POST /status - Progress of an upload operation
     - POST /search - Search the File Search store
+    - POST /search_stream - Search, streaming the answer as server-sent events
     - POST /list - List all documents in the store
     - POST /delete - Delete a document from the store
+    - POST /bulk_delete - Delete many documents, by name, display-name prefix or metadata
+    - POST /stats - Cache counters for this instance
+    - GET/POST /metrics - Request and cache metrics in Prometheus text format
     """
     
     # Enable CORS
@@ -74,23 +207,15 @@ def file_search_api(request):
         'Content-Type': 'application/json'
     }
     
+    operation = None
+    status = 500
+    start_time = time.perf_counter()
     try:
         # Get the operation from query parameter or request body
-        operation = request.args.get('operation') or request.get_json().get('operation')
-        
-        if operation == 'upload':
-            return handle_upload(request, headers)
-        elif operation == 'search':
-            return handle_search(request, headers)
-        elif operation == 'list':
-            return handle_list(request, headers)
-        elif operation == 'delete':
-            return handle_delete(request, headers)
-        else:
-            return jsonify({
-                'success': False,
-                'error': f'Unknown operation: {operation}. Valid operations: upload, search, list, delete'
-            }), 400, headers
+        operation = request.args.get('operation') or (request.get_json(silent=True) or {}).get('operation')
+        response = dispatch(operation, request, headers)
+        status = response_status(response)
+        return response
             
     except Exception as e:
         print(f"[ERROR] {str(e)}")
@@ -100,10 +225,65 @@ def file_search_api(request):
             'success': False,
             'error': str(e)
         }), 500, headers
+    
+    finally:
+        # Streaming responses are timed until the stream starts
+        label = operation if operation in OPERATIONS else 'unknown'
+        REQUEST_LATENCY.labels(label).observe(time.perf_counter() - start_time)
+        REQUESTS.labels(label, str(status)).inc()
+
+
+def dispatch(operation, request, headers):
+    """Route a request to the handler for its operation."""
+    if operation == 'upload':
+        return handle_upload(request, headers)
+    elif operation == 'upload_stream':
+        return handle_upload_stream(request, headers)
+    elif operation == 'bulk_upload':
+        return handle_bulk_upload(request, headers)
+    elif operation == 'status':
+        return handle_status(request, headers)
+    elif operation == 'search':
+        return handle_search(request, headers)
+    elif operation == 'search_stream':
+        return handle_search_stream(request, headers)
+    elif operation == 'list':
+        return handle_list(request, headers)
+    elif operation == 'delete':
+        return handle_delete(request, headers)
+    elif operation == 'bulk_delete':
+        return handle_bulk_delete(request, headers)
+    elif operation == 'stats':
+        return handle_stats(request, headers)
+    elif operation == 'metrics':
+        return handle_metrics(request, headers)
+    else:
+        return jsonify({
+            'success': False,
+            'error': f'Unknown operation: {operation}. Valid operations: {", ".join(OPERATIONS)}'
+        }), 400, headers
+
+
+def is_true(value):
+    """True for a JSON true or a "true"/"1" flag in a body, query or form value ("false", "0", "no" are false)."""
+    return str(value).lower() in ('1', 'true')
+
+
+def response_status(response):
+    """HTTP status of a handler's return value (a Response or a (body, status, headers) tuple)."""
+    if isinstance(response, tuple):
+        return response[1] if len(response) > 1 else 200
+    return getattr(response, 'status_code', 200)
 
 
 def handle_upload(request, headers):
-    """Handle file upload to Gemini File Search store."""
+    """
+    Handle file upload to Gemini File Search store.
+    
+    Returns once the file has been sent, with the operation that indexes it
+    (poll it with /status); pass "wait": true to return only when indexing
+    has finished.
+    """
     try:
         data = request.get_json()
         
@@ -119,6 +299,16 @@ def handle_upload(request, headers):
                 'error': 'Missing required parameters: file_data and filename'
             }), 400, headers
         
+        # Optional document metadata used to scope searches; inferred from the
+        # filename when the client sends none
+        try:
+            metadata = normalize_metadata(data.get('metadata')) or infer_metadata(filename)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400, headers
+        
         print(f"[UPLOAD] Uploading {filename} ({mime_type}) to {DATA_STORE}")
         
         # Get the store resource name
@@ -135,6 +325,8 @@ def handle_upload(request, headers):
         try:
             # Upload to File Search store
             config = {'display_name': display_name}
+            if metadata:
+                config['custom_metadata'] = to_custom_metadata(metadata)
             
             operation = client.file_search_stores.upload_to_file_search_store(
                 file=tmp_path,
@@ -142,23 +334,10 @@ def handle_upload(request, headers):
                 config=config
             )
             
-            # Wait for import to complete
-            import time
-            while not operation.done:
-                time.sleep(2)
-                operation = client.operations.get(operation)
-            
-            print(f"[UPLOAD] Successfully uploaded {filename}")
+            if is_true(data.get('wait', '')):
+                operation = wait_for_operation(operation)
             
-            return jsonify({
-                'success': True,
-                'message': f'Successfully uploaded {filename} to File Search store',
-                'filename': filename,
-                'display_name': display_name,
-                'store_name': DATA_STORE,
-                'operation_name': operation.name,
-                'size_bytes': len(file_bytes)
-            }), 200, headers
+            return upload_response(operation, filename, display_name, metadata, len(file_bytes), headers)
             
         finally:
             # Clean up temporary file
@@ -167,6 +346,69 @@ def handle_upload(request, headers):
                 
     except Exception as e:
         print(f"[UPLOAD ERROR] {str(e)}")
+        if is_not_found_error(e):
+            store_resolver.invalidate()
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': f'Upload failed: {str(e)}'
+        }), 500, headers
+
+
+def handle_upload_stream(request, headers):
+    """
+    Handle a file upload sent as the raw request body.
+    
+    The body is the file itself; filename, mime_type (default: the request
+    Content-Type), display_name and metadata (JSON) are query parameters.
+    The body is forwarded to Gemini's resumable upload UPLOAD_CHUNK_SIZE bytes
+    at a time, so the file is never held in memory whole, base64-encoded or
+    copied to a temporary file. Like /upload, it returns the indexing
+    operation without waiting for it unless wait=true.
+    """
+    try:
+        args = request.args
+        filename = args.get('filename')
+        mime_type = args.get('mime_type') or request.mimetype or 'application/octet-stream'
+        display_name = args.get('display_name') or filename
+        size_bytes = request.content_length
+        
+        if not filename:
+            return jsonify({
+                'success': False,
+                'error': 'Missing required parameter: filename'
+            }), 400, headers
+        
+        if not size_bytes:
+            return jsonify({
+                'success': False,
+                'error': 'Missing Content-Length: send the file as the request body'
+            }), 411, headers
+        
+        try:
+            metadata = normalize_metadata(json.loads(args['metadata']) if args.get('metadata') else None) \
+                or infer_metadata(filename)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid metadata: {str(e)}'
+            }), 400, headers
+        
+        print(f"[UPLOAD] Streaming {filename} ({mime_type}, {size_bytes} bytes) to {DATA_STORE}")
+        
+        store_name = get_store_name()
+        upload_url = start_resumable_upload(store_name, size_bytes, mime_type, display_name, metadata)
+        operation = stream_to_upload_url(upload_url, request.stream, size_bytes)
+        if is_true(args.get('wait', '')):
+            operation = wait_for_operation(operation)
+        
+        return upload_response(operation, filename, display_name, metadata, size_bytes, headers)
+        
+    except Exception as e:
+        print(f"[UPLOAD ERROR] {str(e)}")
+        if is_not_found_error(e):
+            store_resolver.invalidate()
         import traceback
         traceback.print_exc()
         return jsonify({
@@ -175,8 +417,361 @@ def handle_upload(request, headers):
         }), 500, headers
 
 
+def upload_response(operation, filename, display_name, metadata, size_bytes, headers):
+    """
+    Response for a sent upload: 200 when the file is already indexed,
+    otherwise 202 with the operation to poll with /status.
+    """
+    # The document is listed (as pending) from now on
+    invalidate_store_caches()
+    
+    if operation.error:
+        print(f"[UPLOAD ERROR] Indexing {filename} failed: {operation.error}")
+        return jsonify({
+            'success': False,
+            'error': f"Upload failed: {operation.error.get('message', operation.error)}",
+            'operation_name': operation.name
+        }), 500, headers
+    
+    if operation.done:
+        # Already invalidated above, status polls needn't do it again
+        mark_operation_finished(operation.name)
+        print(f"[UPLOAD] Successfully uploaded {filename}")
+        message = f'Successfully uploaded {filename} to File Search store'
+    else:
+        print(f"[UPLOAD] Sent {filename}, indexing in {operation.name}")
+        message = f'Uploaded {filename}; indexing is in progress'
+    
+    return jsonify({
+        'success': True,
+        'message': message,
+        'filename': filename,
+        'display_name': display_name,
+        'metadata': metadata,
+        'store_name': DATA_STORE,
+        'operation_name': operation.name,
+        'done': bool(operation.done),
+        'document_name': operation_document_name(operation),
+        'size_bytes': size_bytes
+    }), 200 if operation.done else 202, headers
+
+
+def handle_bulk_upload(request, headers):
+    """
+    Upload many files in one request through a bounded pool of workers.
+    
+    Accepts either multipart/form-data with one or more "files" parts (plus an
+    optional "metadata" JSON field applied to every file), or a JSON body with
+    "files": a list of objects with the same fields as /upload. Each file is
+    uploaded independently: a failed file is reported in its result and does
+    not stop the others. Pass wait=true to wait for indexing of each file.
+    """
+    try:
+        started = time.perf_counter()
+        data = request.get_json(silent=True) or {}
+        wait = any(
+            is_true(value)
+            for value in (data.get('wait', ''), request.args.get('wait', ''), request.form.get('wait', ''))
+        )
+        
+        try:
+            items = bulk_upload_items(request, data)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400, headers
+        
+        if not items:
+            return jsonify({
+                'success': False,
+                'error': 'No files: send multipart "files" parts or a JSON "files" list'
+            }), 400, headers
+        
+        if len(items) > BULK_UPLOAD_MAX_FILES:
+            return jsonify({
+                'success': False,
+                'error': f'Too many files: {len(items)} (at most {BULK_UPLOAD_MAX_FILES} per request)'
+            }), 400, headers
+        
+        print(f"[BULK_UPLOAD] Uploading {len(items)} files to {DATA_STORE} ({BULK_UPLOAD_CONCURRENCY} at a time)")
+        store_name = get_store_name()
+        
+        def upload(item):
+            return upload_item(item, store_name, wait)
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(BULK_UPLOAD_CONCURRENCY, len(items)))) as pool:
+            results = list(pool.map(upload, items))
+        
+        invalidate_store_caches()
+        succeeded = sum(1 for result in results if result['success'])
+        elapsed_ms = round((time.perf_counter() - started) * 1000)
+        print(f"[BULK_UPLOAD] {succeeded}/{len(results)} files uploaded in {elapsed_ms}ms")
+        
+        return jsonify({
+            'success': succeeded == len(results),
+            'store_name': DATA_STORE,
+            'results': results,
+            'count': len(results),
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'elapsed_ms': elapsed_ms,
+            'total_bytes': sum(result.get('size_bytes', 0) for result in results)
+        }), 200, headers
+        
+    except Exception as e:
+        print(f"[BULK_UPLOAD ERROR] {str(e)}")
+        if is_not_found_error(e):
+            store_resolver.invalidate()
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': f'Bulk upload failed: {str(e)}'
+        }), 500, headers
+
+
+def bulk_upload_items(request, data):
+    """
+    Files of a bulk upload as {filename, mime_type, display_name, metadata, open}
+    dicts, where open() returns a binary file object.
+    
+    Raises ValueError for malformed input (bad metadata, missing fields).
+    """
+    items = []
+    if request.files:
+        shared_metadata = request.form.get('metadata')
+        metadata = normalize_metadata(json.loads(shared_metadata) if shared_metadata else None)
+        for upload in request.files.getlist('files'):
+            items.append({
+                'filename': upload.filename,
+                'mime_type': upload.mimetype or 'application/octet-stream',
+                'display_name': upload.filename,
+                'metadata': metadata or infer_metadata(upload.filename),
+                # Multipart parts are already spooled by the request parser
+                'open': lambda upload=upload: upload.stream
+            })
+        return items
+    
+    for index, entry in enumerate(data.get('files') or []):
+        if not isinstance(entry, dict) or not entry.get('file_data') or not entry.get('filename'):
+            raise ValueError(f'files[{index}] needs file_data and filename')
+        items.append({
+            'filename': entry['filename'],
+            'mime_type': entry.get('mime_type', 'application/octet-stream'),
+            'display_name': entry.get('display_name') or entry['filename'],
+            'metadata': normalize_metadata(entry.get('metadata')) or infer_metadata(entry['filename']),
+            'open': lambda file_data=entry['file_data']: io.BytesIO(base64.b64decode(file_data))
+        })
+    return items
+
+
+def upload_item(item, store_name, wait=False):
+    """Upload one bulk upload file; failures are returned as the file's result, not raised."""
+    started = time.perf_counter()
+    result = {'filename': item['filename'], 'display_name': item['display_name']}
+    try:
+        stream = item['open']()
+        stream.seek(0, os.SEEK_END)
+        result['size_bytes'] = stream.tell()
+        stream.seek(0)
+        
+        config = {'display_name': item['display_name'], 'mime_type': item['mime_type']}
+        if item['metadata']:
+            config['custom_metadata'] = to_custom_metadata(item['metadata'])
+        
+        operation = client.file_search_stores.upload_to_file_search_store(
+            file=stream,
+            file_search_store_name=store_name,
+            config=config
+        )
+        if wait:
+            operation = wait_for_operation(operation)
+        if operation.error:
+            raise RuntimeError(operation.error.get('message', str(operation.error)))
+        if operation.done:
+            # handle_bulk_upload invalidates the caches after the batch
+            mark_operation_finished(operation.name)
+        
+        result.update(
+            success=True,
+            operation_name=operation.name,
+            done=bool(operation.done),
+            document_name=operation_document_name(operation)
+        )
+    except Exception as e:
+        print(f"[BULK_UPLOAD ERROR] {item['filename']}: {str(e)}")
+        result.update(success=False, error=str(e))
+    result['duration_ms'] = round((time.perf_counter() - started) * 1000)
+    return result
+
+
+def start_resumable_upload(store_name, size_bytes, mime_type, display_name, metadata=None):
+    """Start a resumable upload to the store and return the URL the file content is sent to."""
+    body = {'displayName': display_name, 'mimeType': mime_type}
+    if metadata:
+        body['customMetadata'] = [
+            {'key': entry['key'], 'stringValue': entry['string_value']} for entry in to_custom_metadata(metadata)
+        ]
+    response = http_session.post(
+        f"{GEMINI_API_BASE_URL}/upload/v1beta/{store_name}:uploadToFileSearchStore",
+        headers={
+            'X-Goog-Api-Key': os.getenv("GEMINI_API_KEY"),
+            'X-Goog-Upload-Protocol': 'resumable',
+            'X-Goog-Upload-Command': 'start',
+            'X-Goog-Upload-Header-Content-Length': str(size_bytes),
+            'X-Goog-Upload-Header-Content-Type': mime_type
+        },
+        json=body,
+        timeout=30
+    )
+    upload_url = response.headers.get('X-Goog-Upload-URL')
+    if response.status_code != 200 or not upload_url:
+        raise RuntimeError(f'Upload start failed: {response.status_code} - {response.text}')
+    return upload_url
+
+
+def stream_to_upload_url(upload_url, stream, size_bytes):
+    """
+    Send `size_bytes` bytes read from `stream` to a resumable upload URL in
+    UPLOAD_CHUNK_SIZE pieces and return the resulting upload operation.
+    """
+    offset = 0
+    while True:
+        chunk = read_exactly(stream, min(UPLOAD_CHUNK_SIZE, size_bytes - offset))
+        if offset + len(chunk) < size_bytes and len(chunk) < UPLOAD_CHUNK_SIZE:
+            raise ValueError(f'Request body ended after {offset + len(chunk)} of {size_bytes} bytes')
+        command = 'upload, finalize' if offset + len(chunk) >= size_bytes else 'upload'
+        response = http_session.post(
+            upload_url,
+            headers={
+                'X-Goog-Upload-Command': command,
+                'X-Goog-Upload-Offset': str(offset)
+            },
+            data=chunk,
+            timeout=120
+        )
+        offset += len(chunk)
+        upload_status = response.headers.get('X-Goog-Upload-Status')
+        if response.status_code != 200 or upload_status not in ('active', 'final'):
+            raise RuntimeError(f'Upload failed at byte {offset}: {response.status_code} - {response.text}')
+        if upload_status == 'final':
+            return types.UploadToFileSearchStoreOperation.from_api_response(response.json())
+        if offset >= size_bytes:
+            raise RuntimeError('All content was sent but the upload was not finalized')
+
+
+def read_exactly(stream, size):
+    """Read `size` bytes from a stream, or fewer only if it ends first."""
+    parts = []
+    remaining = size
+    while remaining > 0:
+        part = stream.read(remaining)
+        if not part:
+            break
+        parts.append(part)
+        remaining -= len(part)
+    return b''.join(parts)
+
+
+def wait_for_operation(operation, timeout=None):
+    """
+    Poll an upload operation until it is done or `timeout` seconds have passed.
+    
+    Delays start at UPLOAD_POLL_INITIAL and double up to UPLOAD_POLL_MAX, each
+    randomized to between half and all of its value so concurrent waiters
+    don't poll in lockstep.
+    """
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    delay = UPLOAD_POLL_INITIAL
+    while not operation.done:
+        sleep = random.uniform(delay / 2, delay)
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            sleep = min(sleep, remaining)
+        time.sleep(sleep)
+        operation = client.operations.get(operation)
+        delay = min(delay * 2, UPLOAD_POLL_MAX)
+    return operation
+
+
+def operation_document_name(operation):
+    """Resource name of the document an upload operation created, once it is known."""
+    response = getattr(operation, 'response', None)
+    return getattr(response, 'document_name', None)
+
+
+def handle_status(request, headers):
+    """
+    Report the progress of an upload operation.
+    
+    Takes "operation_name" (from /upload or /upload_stream) and an optional
+    "wait" in seconds (at most STATUS_MAX_WAIT) to wait for the operation to
+    finish before answering.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        operation_name = request.args.get('operation_name') or data.get('operation_name')
+        
+        if not operation_name:
+            return jsonify({
+                'success': False,
+                'error': 'Missing required parameter: operation_name'
+            }), 400, headers
+        
+        try:
+            wait = min(float(request.args.get('wait') or data.get('wait') or 0), STATUS_MAX_WAIT)
+        except (TypeError, ValueError):
+            return jsonify({
+                'success': False,
+                'error': 'wait must be a number of seconds'
+            }), 400, headers
+        
+        operation = client.operations.get(types.UploadToFileSearchStoreOperation(name=operation_name))
+        if wait > 0:
+            operation = wait_for_operation(operation, timeout=wait)
+        
+        if operation.error:
+            state = 'failed'
+        elif operation.done:
+            state = 'succeeded'
+            # Indexing finished: searches and listings must see the new document,
+            # once per operation however often it is polled
+            if mark_operation_finished(operation_name):
+                invalidate_store_caches()
+        else:
+            state = 'processing'
+        print(f"[STATUS] {operation_name}: {state}")
+        
+        return jsonify({
+            'success': True,
+            'operation_name': operation_name,
+            'done': bool(operation.done),
+            'state': state,
+            'document_name': operation_document_name(operation),
+            'error': (operation.error or {}).get('message') if operation.error else None,
+            'metadata': operation.metadata
+        }), 200, headers
+        
+    except Exception as e:
+        print(f"[STATUS ERROR] {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': f'Status failed: {str(e)}'
+        }), 500, headers
+
+
 def handle_search(request, headers):
-    """Handle semantic search in Gemini File Search store."""
+    """
+    Handle semantic search in Gemini File Search store.
+    
+    Optional "filters" ({"doc_kind", "regulation", "business_domain"}) restrict
+    the search to documents uploaded with matching metadata.
+    """
     try:
         data = request.get_json()
         query = data.get('query')
@@ -187,67 +782,67 @@ def handle_search(request, headers):
                 'error': 'Missing required parameter: query'
             }), 400, headers
         
-        print(f"[SEARCH] Searching for: {query}")
+        try:
+            filters = normalize_metadata(data.get('filters'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400, headers
+        
+        print(f"[SEARCH] Searching for: {query}" + (f" (filters: {filters})" if filters else ""))
         
         # Get the store resource name
         store_name = get_store_name()
         
+        cache_key = search_cache_key(query, filters)
+        cached = answer_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            print(f"[SEARCH] Answer cache hit for: {query}")
+            return jsonify({
+                'success': True,
+                'query': query,
+                'answer': cached['answer'],
+                'citations': cached['citations'],
+                'filters': filters,
+                'store_name': DATA_STORE,
+                'cached': True
+            }), 200, headers
+        
         # Perform semantic search using File Search tool
         response = client.models.generate_content(
-            model='gemini-2.5-flash',
+            model=SEARCH_MODEL,
             contents=query,
-            config=types.GenerateContentConfig(
-                tools=[
-                    types.Tool(
-                        file_search=types.FileSearch(
-                            file_search_store_names=[store_name]
-                        )
-                    )
-                ]
-            )
+            config=search_config(store_name, filters)
         )
         
         # Extract answer and citations
         answer = response.text if hasattr(response, 'text') else str(response)
         
-        # Extract citations from grounding metadata
-        citations = []
-        if hasattr(response, 'candidates') and response.candidates:
-            for candidate in response.candidates:
-                if hasattr(candidate, 'grounding_metadata'):
-                    metadata = candidate.grounding_metadata
-                    if hasattr(metadata, 'grounding_chunks'):
-                        for chunk in metadata.grounding_chunks:
-                            # Try to get citation from retrieved_context first
-                            if hasattr(chunk, 'retrieved_context'):
-                                ctx = chunk.retrieved_context
-                                source = getattr(ctx, 'title', getattr(ctx, 'uri', 'Unknown'))
-                                content = getattr(ctx, 'text', '')
-                                citations.append({
-                                    'source': source,
-                                    'content': content[:500] if content else ''  # Limit content length
-                                })
-                            # Fallback to web citations
-                            elif hasattr(chunk, 'web') and hasattr(chunk.web, 'uri'):
-                                citations.append({
-                                    'source': getattr(chunk.web, 'title', chunk.web.uri),
-                                    'content': getattr(chunk.web, 'uri', '')
-                                })
+        # Extract deduplicated citations from grounding metadata
+        citations = extract_citations(response)
         
         print(f"[SEARCH] Found answer with {len(citations)} citations")
         if citations:
             print(f"[SEARCH] Sample citation: {citations[0]['source']}")
         
+        if cache_key:
+            answer_cache.set(cache_key, {'answer': answer, 'citations': citations})
+        
         return jsonify({
             'success': True,
             'query': query,
             'answer': answer,
             'citations': citations,
-            'store_name': DATA_STORE
+            'filters': filters,
+            'store_name': DATA_STORE,
+            'cached': False
         }), 200, headers
         
     except Exception as e:
         print(f"[SEARCH ERROR] {str(e)}")
+        if is_not_found_error(e):
+            store_resolver.invalidate()
         import traceback
         traceback.print_exc()
         return jsonify({
@@ -256,82 +851,174 @@ def handle_search(request, headers):
         }), 500, headers
 
 
-def handle_list(request, headers):
-    """List all documents in the File Search store using REST API with pagination."""
+def handle_search_stream(request, headers):
+    """
+    Handle semantic search, streaming the answer as server-sent events.
+    Accepts the same optional "filters" as /search.
+    
+    Emits "delta" events with answer text as it is generated, then one
+    "citations" event once grounding metadata has arrived, then "done".
+    Failures after the stream has started are reported as an "error" event.
+    """
+    data = request.get_json()
+    query = data.get('query')
+    
+    if not query:
+        return jsonify({
+            'success': False,
+            'error': 'Missing required parameter: query'
+        }), 400, headers
+    
     try:
-        print(f"[LIST] Listing documents in {DATA_STORE}")
-        
-        # Get the store resource name
-        store_name = get_store_name()
-        print(f"[LIST] Store name: {store_name}")
-        
-        # Use REST API directly as workaround for SDK issue
-        # SDK has a bug where parent parameter isn't passed correctly to _list()
-        api_key = os.getenv("GEMINI_API_KEY")
-        base_url = f"https://generativelanguage.googleapis.com/v1beta/{store_name}/documents"
-        
-        # Collect all documents across pages
-        all_documents = []
-        page_token = None
-        page_count = 0
-        
-        while True:
-            page_count += 1
-            # Build URL with pagination parameters
-            url = base_url
-            params = {'pageSize': 20}  # Max page size allowed by API
-            if page_token:
-                params['pageToken'] = page_token
-            
-            print(f"[LIST] Fetching page {page_count} from REST API")
-            response = requests.get(
-                url,
-                headers={"X-Goog-Api-Key": api_key},
-                params=params,
-                timeout=30
-            )
-            
-            if response.status_code != 200:
-                print(f"[LIST ERROR] API returned status {response.status_code}: {response.text}")
-                return jsonify({
-                    'success': False,
-                    'error': f'API error: {response.status_code} - {response.text}'
-                }), 500, headers
+        filters = normalize_metadata(data.get('filters'))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400, headers
+    
+    print(f"[SEARCH_STREAM] Streaming search for: {query}" + (f" (filters: {filters})" if filters else ""))
+    
+    def sse(event, payload):
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+    
+    def generate():
+        try:
+            store_name = get_store_name()
             
-            data = response.json()
+            cache_key = search_cache_key(query, filters)
+            cached = answer_cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                print(f"[SEARCH_STREAM] Answer cache hit for: {query}")
+                yield sse('delta', {'text': cached['answer']})
+                yield sse('citations', {'citations': cached['citations']})
+                yield sse('done', {'success': True, 'cached': True, 'store_name': DATA_STORE})
+                return
             
-            # Parse documents from current page
-            page_documents = data.get('documents', [])
-            print(f"[LIST] Page {page_count}: Found {len(page_documents)} documents")
+            answer_parts = []
+            citations = []
+            for chunk in client.models.generate_content_stream(
+                model=SEARCH_MODEL,
+                contents=query,
+                config=search_config(store_name, filters)
+            ):
+                text = chunk.text
+                if text:
+                    answer_parts.append(text)
+                    yield sse('delta', {'text': text})
+                # Grounding metadata usually arrives with the last chunk
+                citations.extend(extract_citations(chunk))
             
-            for doc in page_documents:
-                all_documents.append({
-                    'name': doc.get('name', ''),
-                    'display_name': doc.get('displayName', ''),
-                    'create_time': doc.get('createTime', ''),
-                    'update_time': doc.get('updateTime', ''),
-                    'state': doc.get('state', ''),
-                    'size_bytes': int(doc.get('sizeBytes', 0)),
-                    'mime_type': doc.get('mimeType', '')
-                })
+            citations = dedupe_citations(citations)
+            print(f"[SEARCH_STREAM] Streamed answer with {len(citations)} citations")
+            yield sse('citations', {'citations': citations})
             
-            # Check if there are more pages
-            page_token = data.get('nextPageToken')
-            if not page_token:
-                print(f"[LIST] No more pages, stopping pagination")
-                break
+            if cache_key:
+                answer_cache.set(cache_key, {'answer': ''.join(answer_parts), 'citations': citations})
+            yield sse('done', {'success': True, 'cached': False, 'store_name': DATA_STORE})
             
-            print(f"[LIST] More pages available, continuing...")
+        except Exception as e:
+            print(f"[SEARCH_STREAM ERROR] {str(e)}")
+            if is_not_found_error(e):
+                store_resolver.invalidate()
+            import traceback
+            traceback.print_exc()
+            yield sse('error', {'success': False, 'error': f'Search failed: {str(e)}'})
+    
+    stream_headers = {
+        'Access-Control-Allow-Origin': '*',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    }
+    return Response(
+        stream_with_context(generate()),
+        status=200,
+        mimetype='text/event-stream',
+        headers=stream_headers
+    )
+
+
+def handle_list(request, headers):
+    """
+    List documents in the File Search store using the REST API.
+    
+    With "page_size" and/or "page_token" only that page is fetched and
+    "next_page_token" is returned for the next one; otherwise every page is
+    fetched. Listings are cached until an upload or delete changes the store.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        page_token = request.args.get('page_token') or data.get('page_token')
+        page_size = request.args.get('page_size') or data.get('page_size')
+        try:
+            page_size = min(max(int(page_size), 1), LIST_PAGE_SIZE_MAX) if page_size else None
+        except (TypeError, ValueError):
+            return jsonify({
+                'success': False,
+                'error': 'page_size must be a number'
+            }), 400, headers
+        single_page = page_size is not None or page_token is not None
         
-        print(f"[LIST] Total: Found {len(all_documents)} documents across {page_count} page(s) in {DATA_STORE}")
+        print(f"[LIST] Listing documents in {DATA_STORE}" + (f" (page size {page_size or LIST_PAGE_SIZE_MAX})" if single_page else ""))
         
-        return jsonify({
+        # Listing never creates the store; a missing store simply has no documents
+        store_name = get_store_name(create=False)
+        print(f"[LIST] Store name: {store_name}")
+        
+        if not store_name:
+            return jsonify({
+                'success': True,
+                'store_name': DATA_STORE,
+                'documents': [],
+                'count': 0,
+                'pages_fetched': 0,
+                'next_page_token': None
+            }), 200, headers
+        
+        # Keyed on the store revision so changes made by other instances are
+        # seen; without a revision the listing cache is bypassed
+        revision = store_resolver.revision()
+        cache_key = '\x1f'.join([
+            store_name,
+            revision,
+            str(page_size or LIST_PAGE_SIZE_MAX),
+            page_token or '',
+            'page' if single_page else 'all'
+        ]) if revision else None
+        cached = list_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            print(f"[LIST] Listing cache hit ({cached['count']} documents)")
+            return jsonify(dict(cached, cached=True)), 200, headers
+        
+        if single_page:
+            documents, next_page_token = fetch_documents_page(store_name, page_size or LIST_PAGE_SIZE_MAX, page_token)
+            page_count = 1
+        else:
+            # Collect all documents across pages
+            documents = []
+            next_page_token = None
+            page_count = 0
+            while True:
+                page_count += 1
+                print(f"[LIST] Fetching page {page_count} from REST API")
+                page_documents, next_page_token = fetch_documents_page(store_name, LIST_PAGE_SIZE_MAX, next_page_token)
+                documents.extend(page_documents)
+                if not next_page_token:
+                    break
+        
+        print(f"[LIST] Total: Found {len(documents)} documents across {page_count} page(s) in {DATA_STORE}")
+        
+        result = {
             'success': True,
             'store_name': DATA_STORE,
-            'documents': all_documents,
-            'count': len(all_documents),
-            'pages_fetched': page_count
-        }), 200, headers
+            'documents': documents,
+            'count': len(documents),
+            'pages_fetched': page_count,
+            'next_page_token': next_page_token
+        }
+        if cache_key:
+            list_cache.set(cache_key, result)
+        return jsonify(dict(result, cached=False)), 200, headers
         
     except Exception as e:
         print(f"[LIST ERROR] {str(e)}")
@@ -343,6 +1030,47 @@ def handle_list(request, headers):
         }), 500, headers
 
 
+def fetch_documents_page(store_name, page_size, page_token=None):
+    """
+    One page of the store's documents from the REST API, as (documents, next_page_token).
+    
+    Uses the REST API directly as a workaround for an SDK issue: the SDK
+    doesn't pass the parent parameter to _list() correctly.
+    """
+    params = {'pageSize': page_size}
+    if page_token:
+        params['pageToken'] = page_token
+    
+    response = http_session.get(
+        f"{GEMINI_API_BASE_URL}/v1beta/{store_name}/documents",
+        headers={"X-Goog-Api-Key": os.getenv("GEMINI_API_KEY")},
+        params=params,
+        timeout=30
+    )
+    
+    if response.status_code != 200:
+        print(f"[LIST ERROR] API returned status {response.status_code}: {response.text}")
+        if response.status_code == 404:
+            store_resolver.invalidate()
+        raise RuntimeError(f'API error: {response.status_code} - {response.text}')
+    
+    data = response.json()
+    documents = [
+        {
+            'name': doc.get('name', ''),
+            'display_name': doc.get('displayName', ''),
+            'create_time': doc.get('createTime', ''),
+            'update_time': doc.get('updateTime', ''),
+            'state': doc.get('state', ''),
+            'size_bytes': int(doc.get('sizeBytes', 0)),
+            'mime_type': doc.get('mimeType', ''),
+            'metadata': from_custom_metadata(doc.get('customMetadata'))
+        }
+        for doc in data.get('documents', [])
+    ]
+    return documents, data.get('nextPageToken')
+
+
 def handle_delete(request, headers):
     """Delete a document from the File Search store."""
     try:
@@ -361,10 +1089,11 @@ def handle_delete(request, headers):
         client.file_search_stores.documents.delete(name=document_name)
         
         print(f"[DELETE] Successfully deleted {document_name}")
+        invalidate_store_caches()
         
         return jsonify({
             'success': True,
-            'message': f'Successfully deleted document',
+            'message': 'Successfully deleted document',
             'document_name': document_name
         }), 200, headers
         
@@ -376,3 +1105,182 @@ def handle_delete(request, headers):
             'success': False,
             'error': f'Delete failed: {str(e)}'
         }), 500, headers
+
+
+def handle_bulk_delete(request, headers):
+    """
+    Delete many documents in one request through a bounded pool of workers.
+    
+    The documents are either listed in "document_names" or selected from the
+    store by "display_name_prefix" and/or "metadata" (every given key must
+    match). With dry_run=true the selected documents are returned without
+    deleting them. Rate-limited and unavailable responses are retried with
+    backoff; a document that fails is reported in its result and does not
+    stop the others. A document that no longer exists counts as deleted.
+    """
+    try:
+        started = time.perf_counter()
+        data = request.get_json(silent=True) or {}
+        document_names = data.get('document_names')
+        prefix = data.get('display_name_prefix')
+        dry_run = bool(data.get('dry_run'))
+        
+        if document_names is not None and (prefix or data.get('metadata')):
+            return jsonify({
+                'success': False,
+                'error': 'Pass either document_names or display_name_prefix/metadata, not both'
+            }), 400, headers
+        
+        try:
+            filters = normalize_metadata(data.get('metadata'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid metadata: {str(e)}'
+            }), 400, headers
+        
+        if document_names is not None:
+            if not isinstance(document_names, list) or not all(isinstance(name, str) and name for name in document_names):
+                return jsonify({
+                    'success': False,
+                    'error': 'document_names must be a list of document resource names'
+                }), 400, headers
+            # Keep the request order, without deleting a document twice
+            targets = [{'name': name} for name in dict.fromkeys(document_names)]
+        elif prefix or filters:
+            targets = select_documents(prefix, filters)
+        else:
+            return jsonify({
+                'success': False,
+                'error': 'Missing required parameter: document_names, display_name_prefix or metadata'
+            }), 400, headers
+        
+        if len(targets) > BULK_DELETE_MAX_DOCUMENTS:
+            return jsonify({
+                'success': False,
+                'error': f'Too many documents: {len(targets)} (at most {BULK_DELETE_MAX_DOCUMENTS} per request)'
+            }), 400, headers
+        
+        if dry_run or not targets:
+            print(f"[BULK_DELETE] {len(targets)} documents selected" + (" (dry run)" if dry_run else ""))
+            return jsonify({
+                'success': True,
+                'store_name': DATA_STORE,
+                'dry_run': dry_run,
+                'results': [dict(target, success=True, deleted=False) for target in targets],
+                'count': len(targets),
+                'succeeded': 0,
+                'failed': 0,
+                'elapsed_ms': round((time.perf_counter() - started) * 1000)
+            }), 200, headers
+        
+        print(f"[BULK_DELETE] Deleting {len(targets)} documents from {DATA_STORE} ({BULK_DELETE_CONCURRENCY} at a time)")
+        with ThreadPoolExecutor(max_workers=max(1, min(BULK_DELETE_CONCURRENCY, len(targets)))) as pool:
+            results = list(pool.map(delete_document, targets))
+        
+        invalidate_store_caches()
+        succeeded = sum(1 for result in results if result['success'])
+        elapsed_ms = round((time.perf_counter() - started) * 1000)
+        print(f"[BULK_DELETE] {succeeded}/{len(results)} documents deleted in {elapsed_ms}ms")
+        
+        return jsonify({
+            'success': succeeded == len(results),
+            'store_name': DATA_STORE,
+            'dry_run': False,
+            'results': results,
+            'count': len(results),
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'elapsed_ms': elapsed_ms
+        }), 200, headers
+        
+    except Exception as e:
+        print(f"[BULK_DELETE ERROR] {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': f'Bulk delete failed: {str(e)}'
+        }), 500, headers
+
+
+def select_documents(prefix=None, filters=None):
+    """Documents of the store whose display name starts with `prefix` and whose metadata matches `filters`."""
+    store_name = get_store_name(create=False)
+    if not store_name:
+        return []
+    
+    selected = []
+    page_token = None
+    while True:
+        documents, page_token = fetch_documents_page(store_name, LIST_PAGE_SIZE_MAX, page_token)
+        for document in documents:
+            if prefix and not document['display_name'].startswith(prefix):
+                continue
+            if not matches(document['metadata'], filters):
+                continue
+            selected.append({'name': document['name'], 'display_name': document['display_name']})
+        if not page_token:
+            return selected
+
+
+def delete_document(target):
+    """Delete one bulk delete document; failures are returned as its result, not raised."""
+    started = time.perf_counter()
+    result = dict(target)
+    for attempt in range(1, BULK_DELETE_MAX_ATTEMPTS + 1):
+        try:
+            client.file_search_stores.documents.delete(name=target['name'])
+            result.update(success=True, deleted=True)
+            break
+        except Exception as e:
+            if is_not_found_error(e):
+                result.update(success=True, deleted=False, not_found=True)
+                break
+            if is_transient_error(e) and attempt < BULK_DELETE_MAX_ATTEMPTS:
+                delay = BULK_DELETE_BACKOFF_BASE * 2 ** (attempt - 1)
+                time.sleep(random.uniform(delay / 2, delay))
+                continue
+            print(f"[BULK_DELETE ERROR] {target['name']}: {str(e)}")
+            result.update(success=False, error=str(e))
+            break
+    result['attempts'] = attempt
+    result['duration_ms'] = round((time.perf_counter() - started) * 1000)
+    return result
+
+
+def is_transient_error(error):
+    """True for rate-limit, overload and connection errors worth retrying."""
+    # The SDK talks to the API through httpx
+    if isinstance(error, (httpx.TransportError, requests.exceptions.ConnectionError)):
+        return True
+    code = getattr(error, 'code', None)
+    if code in (429, 500, 502, 503, 504):
+        return True
+    text = str(error)
+    return 'RESOURCE_EXHAUSTED' in text or 'UNAVAILABLE' in text
+
+
+def handle_stats(request, headers):
+    """Report this instance's cache counters."""
+    return jsonify({
+        'success': True,
+        'store_name': DATA_STORE,
+        'store_cache': store_resolver.stats(),
+        'answer_cache': answer_cache.stats(),
+        'list_cache': list_cache.stats()
+    }), 200, headers
+
+
+def handle_metrics(request, headers):
+    """Expose request and cache metrics in the Prometheus text format."""
+    for cache, stats in (('store', store_resolver.stats()), ('answer', answer_cache.stats()), ('list', list_cache.stats())):
+        for stat, value in stats.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                CACHE_STATS.labels(cache, stat).set(value)
+    
+    metrics_headers = {
+        'Access-Control-Allow-Origin': '*',
+        'Content-Type': CONTENT_TYPE
+    }
+    return REGISTRY.render(), 200, metrics_headers
@@ -14,6 +14,9 @@ import fileSearchAPI from '../services/fileSearchAPI';
 
 function FileSearch() {
   const [selectedFiles, setSelectedFiles] = useState([]);
+  // Document kind sent as upload metadata; 'auto' lets the server infer it from the file name
+  const [docKind, setDocKind] = useState('auto');
+  const [regulation, setRegulation] = useState('');
   const [uploadLoading, setUploadLoading] = useState(false);
   const [uploadProgress, setUploadProgress] = useState([]);
   const [success, setSuccess] = useState(null);
@@ -21,8 +24,13 @@ function FileSearch() {
   const [documents, setDocuments] = useState([]);
   const [listLoading, setListLoading] = useState(false);
   const [deleteLoading, setDeleteLoading] = useState(null);
+  const [checkedDocuments, setCheckedDocuments] = useState([]);
+  const [bulkDeleteLoading, setBulkDeleteLoading] = useState(false);
   const [currentPage, setCurrentPage] = useState(1);
   const [itemsPerPage] = useState(10);
+  // pageTokens[i] is the cursor of page i + 1 (the first page has none)
+  const [pageTokens, setPageTokens] = useState([null]);
+  const [nextPageToken, setNextPageToken] = useState(null);
   const fileInputRef = useRef(null);
 
   // Load documents on mount
@@ -30,11 +38,20 @@ function FileSearch() {
     loadDocuments();
   }, []);
 
-  const loadDocuments = async () => {
+  // Fetch one page of documents; the server only lists that page
+  const loadDocuments = async (page = currentPage, tokens = pageTokens) => {
     try {
       setListLoading(true);
-      const result = await fileSearchAPI.listDocuments();
-      setDocuments(result.documents || []);
+      const result = await fileSearchAPI.listDocuments({ pageSize: itemsPerPage, pageToken: tokens[page - 1] });
+      const pageDocuments = result.documents || [];
+      if (pageDocuments.length === 0 && page > 1) {
+        // The page emptied (e.g. after a delete): show the previous one
+        return loadDocuments(page - 1, tokens);
+      }
+      setDocuments(pageDocuments);
+      setCurrentPage(page);
+      setPageTokens(tokens);
+      setNextPageToken(result.next_page_token || null);
     } catch (err) {
       console.error('Error loading documents:', err);
     } finally {
@@ -42,6 +59,18 @@ function FileSearch() {
     }
   };
 
+  const goToNextPage = () => {
+    if (nextPageToken) {
+      loadDocuments(currentPage + 1, [...pageTokens.slice(0, currentPage), nextPageToken]);
+    }
+  };
+
+  const goToPreviousPage = () => {
+    if (currentPage > 1) {
+      loadDocuments(currentPage - 1);
+    }
+  };
+
   const handleDeleteDocument = async (documentName, displayName) => {
     if (!window.confirm(`Are you sure you want to delete "${displayName}"?`)) {
       return;
@@ -52,13 +81,8 @@ function FileSearch() {
       setError(null);
       await fileSearchAPI.deleteDocument(documentName);
       setSuccess(`Successfully deleted "${displayName}"`);
-      // Reload documents and stay on current page if possible
+      // Reload the current page (or the previous one if it is now empty)
       await loadDocuments();
-      // Reset to last valid page if current page would be empty
-      const newTotalPages = Math.ceil((documents.length - 1) / itemsPerPage);
-      if (currentPage > newTotalPages && newTotalPages > 0) {
-        setCurrentPage(newTotalPages);
-      }
       setTimeout(() => setSuccess(null), 3000);
     } catch (err) {
       console.error('Error deleting document:', err);
@@ -68,6 +92,39 @@ function FileSearch() {
     }
   };
 
+  const toggleChecked = (documentName) => {
+    setCheckedDocuments(prev => prev.includes(documentName)
+      ? prev.filter(name => name !== documentName)
+      : [...prev, documentName]);
+  };
+
+  const handleBulkDelete = async () => {
+    const count = checkedDocuments.length;
+    if (!window.confirm(`Are you sure you want to delete ${count} document${count > 1 ? 's' : ''}?`)) {
+      return;
+    }
+
+    try {
+      setBulkDeleteLoading(true);
+      setError(null);
+      const result = await fileSearchAPI.bulkDeleteDocuments({ documentNames: checkedDocuments });
+      // Keep the failed ones checked so they can be retried
+      setCheckedDocuments(result.results.filter(r => !r.success).map(r => r.name));
+      if (result.failed > 0) {
+        setError(`Deleted ${result.succeeded} of ${result.count} documents; ${result.failed} failed`);
+      } else {
+        setSuccess(`Successfully deleted ${result.succeeded} document${result.succeeded > 1 ? 's' : ''}`);
+        setTimeout(() => setSuccess(null), 3000);
+      }
+      await loadDocuments();
+    } catch (err) {
+      console.error('Error deleting documents:', err);
+      setError(err.message || 'Failed to delete documents');
+    } finally {
+      setBulkDeleteLoading(false);
+    }
+  };
+
   const handleFileSelect = (e) => {
     const files = Array.from(e.target.files);
     if (files.length > 0) {
@@ -90,7 +147,17 @@ function FileSearch() {
       setError(null);
       setSuccess(null);
       
-      // Upload all files in parallel
+      const metadata = docKind === 'auto' ? null : {
+        doc_kind: docKind,
+        ...(docKind === 'regulation' && regulation.trim() ? { regulation: regulation.trim().toUpperCase() } : {})
+      };
+      
+      // Several files are sent in one bulk request, a single file as a streamed upload
+      const bulkResults = selectedFiles.length > 1
+        ? fileSearchAPI.bulkUpload(selectedFiles, metadata).then(response => response.results)
+        : null;
+      
+      // Track each file until it has been indexed
       const uploadPromises = selectedFiles.map(async (file, index) => {
         try {
           // Update progress: uploading
@@ -100,7 +167,21 @@ function FileSearch() {
             return newProgress;
           });
           
-          const result = await fileSearchAPI.uploadFile(file);
+          const result = bulkResults
+            ? (await bulkResults)[index]
+            : await fileSearchAPI.uploadFile(file, metadata);
+          if (!result.success) {
+            throw new Error(result.error || 'Upload failed');
+          }
+          
+          // Update progress: sent, waiting for indexing
+          setUploadProgress(prev => {
+            const newProgress = [...prev];
+            newProgress[index] = { name: file.name, status: 'uploading', progress: 75 };
+            return newProgress;
+          });
+          
+          await fileSearchAPI.waitForUpload(result);
           
           // Update progress: success
           setUploadProgress(prev => {
@@ -138,8 +219,7 @@ function FileSearch() {
       }
       
       // Reload documents and reset to first page
-      await loadDocuments();
-      setCurrentPage(1);
+      await loadDocuments(1, [null]);
       
       setTimeout(() => {
         setSelectedFiles([]);
@@ -240,6 +320,41 @@ function FileSearch() {
               )}
             </div>
 
+            <div className="grid grid-cols-1 sm:grid-cols-2 gap-4">
+              <div>
+                <label className="block text-sm font-medium text-gray-700 mb-2">
+                  Document Type
+                </label>
+                <select
+                  value={docKind}
+                  onChange={(e) => setDocKind(e.target.value)}
+                  disabled={uploadLoading}
+                  className="block w-full text-sm border border-gray-300 rounded-md px-3 py-2
+                    focus:outline-none focus:ring-2 focus:ring-blue-500"
+                >
+                  <option value="auto">Detect from file name</option>
+                  <option value="regulation">Regulation</option>
+                  <option value="business_process">Business process</option>
+                </select>
+              </div>
+              {docKind === 'regulation' && (
+                <div>
+                  <label className="block text-sm font-medium text-gray-700 mb-2">
+                    Regulation
+                  </label>
+                  <input
+                    type="text"
+                    value={regulation}
+                    onChange={(e) => setRegulation(e.target.value)}
+                    disabled={uploadLoading}
+                    placeholder="e.g. GDPR, CCPA, HIPAA"
+                    className="block w-full text-sm border border-gray-300 rounded-md px-3 py-2
+                      focus:outline-none focus:ring-2 focus:ring-blue-500"
+                  />
+                </div>
+              )}
+            </div>
+
             {/* Upload Progress */}
             {uploadProgress.length > 0 && (
               <div className="space-y-2">
@@ -314,14 +429,30 @@ function FileSearch() {
               <DocumentTextIcon className="h-6 w-6 text-purple-600 mr-2" />
               <h2 className="text-xl font-semibold text-gray-900">Uploaded Documents</h2>
             </div>
-            <button
-              onClick={loadDocuments}
-              disabled={listLoading}
-              className="flex items-center px-3 py-1.5 text-sm text-gray-700 bg-gray-100 hover:bg-gray-200 rounded-md disabled:opacity-50"
-            >
-              <ArrowPathIcon className={`h-4 w-4 mr-1 ${listLoading ? 'animate-spin' : ''}`} />
-              Refresh
-            </button>
+            <div className="flex items-center space-x-2">
+              {checkedDocuments.length > 0 && (
+                <button
+                  onClick={handleBulkDelete}
+                  disabled={bulkDeleteLoading}
+                  className="flex items-center px-3 py-1.5 text-sm text-red-600 bg-red-50 hover:bg-red-100 rounded-md disabled:opacity-50"
+                >
+                  {bulkDeleteLoading ? (
+                    <ArrowPathIcon className="h-4 w-4 mr-1 animate-spin" />
+                  ) : (
+                    <TrashIcon className="h-4 w-4 mr-1" />
+                  )}
+                  Delete {checkedDocuments.length} selected
+                </button>
+              )}
+              <button
+                onClick={() => loadDocuments()}
+                disabled={listLoading}
+                className="flex items-center px-3 py-1.5 text-sm text-gray-700 bg-gray-100 hover:bg-gray-200 rounded-md disabled:opacity-50"
+              >
+                <ArrowPathIcon className={`h-4 w-4 mr-1 ${listLoading ? 'animate-spin' : ''}`} />
+                Refresh
+              </button>
+            </div>
           </div>
 
           {listLoading ? (
@@ -339,12 +470,12 @@ function FileSearch() {
             <div className="space-y-4">
               <div className="flex items-center justify-between">
                 <p className="text-sm text-gray-600">
-                  Showing {Math.min((currentPage - 1) * itemsPerPage + 1, documents.length)}-{Math.min(currentPage * itemsPerPage, documents.length)} of {documents.length} document{documents.length !== 1 ? 's' : ''}
+                  Showing documents {(currentPage - 1) * itemsPerPage + 1}-{(currentPage - 1) * itemsPerPage + documents.length}
                 </p>
-                {documents.length > itemsPerPage && (
+                {(currentPage > 1 || nextPageToken) && (
                   <div className="flex items-center space-x-2">
                     <button
-                      onClick={() => setCurrentPage(prev => Math.max(1, prev - 1))}
+                      onClick={goToPreviousPage}
                       disabled={currentPage === 1}
                       className="p-1 rounded hover:bg-gray-100 disabled:opacity-50 disabled:cursor-not-allowed"
                       title="Previous page"
@@ -352,11 +483,11 @@ function FileSearch() {
                       <ChevronLeftIcon className="h-5 w-5 text-gray-600" />
                     </button>
                     <span className="text-sm text-gray-600">
-                      Page {currentPage} of {Math.ceil(documents.length / itemsPerPage)}
+                      Page {currentPage}
                     </span>
                     <button
-                      onClick={() => setCurrentPage(prev => Math.min(Math.ceil(documents.length / itemsPerPage), prev + 1))}
-                      disabled={currentPage >= Math.ceil(documents.length / itemsPerPage)}
+                      onClick={goToNextPage}
+                      disabled={!nextPageToken}
                       className="p-1 rounded hover:bg-gray-100 disabled:opacity-50 disabled:cursor-not-allowed"
                       title="Next page"
                     >
@@ -366,12 +497,18 @@ function FileSearch() {
                 )}
               </div>
               <div className="divide-y divide-gray-200">
-                {documents
-                  .slice((currentPage - 1) * itemsPerPage, currentPage * itemsPerPage)
-                  .map((doc) => (
+                {documents.map((doc) => (
                   <div key={doc.name} className="py-3 flex items-center justify-between hover:bg-gray-50 px-2 rounded">
                     <div className="flex-1 min-w-0">
                       <div className="flex items-center">
+                        <input
+                          type="checkbox"
+                          checked={checkedDocuments.includes(doc.name)}
+                          onChange={() => toggleChecked(doc.name)}
+                          disabled={bulkDeleteLoading}
+                          className="h-4 w-4 mr-3 text-purple-600 border-gray-300 rounded focus:ring-purple-500"
+                          aria-label={`Select ${doc.display_name || 'document'}`}
+                        />
                         <DocumentTextIcon className="h-5 w-5 text-purple-600 mr-2 flex-shrink-0" />
                         <div className="flex-1 min-w-0">
                           <p className="text-sm font-medium text-gray-900 truncate">
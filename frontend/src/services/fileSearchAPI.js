@@ -16,53 +16,53 @@ const apiClient = axios.create({
   },
 });
 
+// MIME type for a file, from its extension when the browser doesn't know it
+const guessMimeType = (file) => {
+  if (file.type && file.type !== 'application/octet-stream') {
+    return file.type;
+  }
+  const ext = file.name.split('.').pop().toLowerCase();
+  const mimeTypeMap = {
+    'txt': 'text/plain',
+    'md': 'text/plain',
+    'pdf': 'application/pdf',
+    'doc': 'application/msword',
+    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'csv': 'text/csv',
+    'json': 'application/json',
+    'xml': 'text/xml',
+    'html': 'text/html'
+  };
+  return mimeTypeMap[ext] || 'text/plain';
+};
+
 const fileSearchAPI = {
   /**
    * Upload a file to Gemini File Search store
+   * The file is sent as the raw request body and streamed to the store by the
+   * Cloud Function (no base64 encoding, no copy of the file in memory).
    * @param {File} file - File object to upload
-   * @returns {Promise} - Upload response
+   * @param {Object} metadata - Optional {doc_kind, regulation, business_domain}
+   * @returns {Promise} - Upload response; indexing may still be running
+   *   (done: false), see waitForUpload
    */
-  async uploadFile(file) {
+  async uploadFile(file, metadata = null) {
     try {
       console.log('[FileSearchAPI] Uploading file:', file.name);
       
-      // Convert file to base64
-      const fileBase64 = await new Promise((resolve, reject) => {
-        const reader = new FileReader();
-        reader.onloadend = () => {
-          const result = reader.result;
-          const base64 = result.includes(',') ? result.split(',')[1] : result;
-          resolve(base64);
-        };
-        reader.onerror = reject;
-        reader.readAsDataURL(file);
-      });
-      
-      // Determine MIME type
-      let mimeType = file.type;
-      if (!mimeType || mimeType === 'application/octet-stream') {
-        const ext = file.name.split('.').pop().toLowerCase();
-        const mimeTypeMap = {
-          'txt': 'text/plain',
-          'md': 'text/plain',
-          'pdf': 'application/pdf',
-          'doc': 'application/msword',
-          'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-          'csv': 'text/csv',
-          'json': 'application/json',
-          'xml': 'text/xml',
-          'html': 'text/html'
-        };
-        mimeType = mimeTypeMap[ext] || 'text/plain';
-      }
+      const mimeType = guessMimeType(file);
       
       // Upload to Cloud Function
-      const response = await apiClient.post('', {
-        operation: 'upload',
-        file_data: fileBase64,
-        filename: file.name,
-        mime_type: mimeType,
-        display_name: file.name
+      const response = await apiClient.post('', file, {
+        params: {
+          operation: 'upload_stream',
+          filename: file.name,
+          mime_type: mimeType,
+          display_name: file.name,
+          ...(metadata ? { metadata: JSON.stringify(metadata) } : {})
+        },
+        headers: { 'Content-Type': mimeType },
+        timeout: 0 // large files; the server bounds the upload itself
       });
       
       console.log('[FileSearchAPI] Upload successful:', response.data);
@@ -73,18 +73,98 @@ const fileSearchAPI = {
     }
   },
 
+  /**
+   * Upload several files in one request; the Cloud Function sends them to the
+   * store a few at a time
+   * @param {File[]} files - File objects to upload
+   * @param {Object} metadata - Optional {doc_kind, regulation, business_domain} for every file
+   * @returns {Promise} - {results: per-file outcomes in the order given, succeeded, failed, elapsed_ms}
+   */
+  async bulkUpload(files, metadata = null) {
+    try {
+      console.log('[FileSearchAPI] Bulk uploading', files.length, 'files');
+      
+      const form = new FormData();
+      for (const file of files) {
+        form.append('files', new File([file], file.name, { type: guessMimeType(file) }));
+      }
+      if (metadata) {
+        form.append('metadata', JSON.stringify(metadata));
+      }
+      
+      const response = await apiClient.post('', form, {
+        params: { operation: 'bulk_upload' },
+        headers: { 'Content-Type': 'multipart/form-data' },
+        timeout: 0
+      });
+      
+      console.log('[FileSearchAPI] Bulk upload finished:', response.data);
+      return response.data;
+    } catch (error) {
+      console.error('[FileSearchAPI] Bulk upload error:', error);
+      throw new Error(error.response?.data?.error || error.message || 'Bulk upload failed');
+    }
+  },
+
+  /**
+   * Get the progress of an upload operation
+   * @param {string} operationName - operation_name returned by uploadFile
+   * @returns {Promise} - {done, state: 'processing' | 'succeeded' | 'failed', document_name, error}
+   */
+  async getUploadStatus(operationName) {
+    try {
+      const response = await apiClient.post('', {
+        operation: 'status',
+        operation_name: operationName
+      });
+      return response.data;
+    } catch (error) {
+      console.error('[FileSearchAPI] Status error:', error);
+      throw new Error(error.response?.data?.error || error.message || 'Failed to get upload status');
+    }
+  },
+
+  /**
+   * Wait until an upload has been indexed, polling its status with exponential
+   * backoff and jitter
+   * @param {Object} upload - Response of uploadFile
+   * @param {Object} options - Optional maxDelayMs and timeoutMs
+   * @returns {Promise} - Final status
+   */
+  async waitForUpload(upload, { maxDelayMs = 10000, timeoutMs = 10 * 60 * 1000 } = {}) {
+    if (upload.done) {
+      return upload;
+    }
+    const deadline = Date.now() + timeoutMs;
+    let delay = 1000;
+    while (Date.now() < deadline) {
+      await new Promise(resolve => setTimeout(resolve, delay / 2 + Math.random() * delay / 2));
+      const status = await this.getUploadStatus(upload.operation_name);
+      if (status.state === 'failed') {
+        throw new Error(status.error || 'Indexing failed');
+      }
+      if (status.done) {
+        return status;
+      }
+      delay = Math.min(delay * 2, maxDelayMs);
+    }
+    throw new Error('Timed out waiting for indexing to finish');
+  },
+
   /**
    * Search documents in the File Search store
    * @param {string} query - Search query
+   * @param {Object} filters - Optional {doc_kind, regulation, business_domain}
    * @returns {Promise} - Search results
    */
-  async search(query) {
+  async search(query, filters = null) {
     try {
       console.log('[FileSearchAPI] Searching for:', query);
       
       const response = await apiClient.post('', {
         operation: 'search',
-        query: query
+        query: query,
+        ...(filters ? { filters } : {})
       });
       
       console.log('[FileSearchAPI] Search results:', response.data);
@@ -96,15 +176,83 @@ const fileSearchAPI = {
   },
 
   /**
-   * List all documents in the File Search store
-   * @returns {Promise} - List of documents
+   * Search documents, streaming the answer as it is generated
+   * @param {string} query - Search query
+   * @param {Object} handlers - Callbacks: onDelta(text), onCitations(citations); optional filters
+   * @returns {Promise} - Resolves with {answer, citations, cached} when the stream ends
+   */
+  async searchStream(query, { onDelta, onCitations, filters } = {}) {
+    console.log('[FileSearchAPI] Streaming search for:', query);
+    
+    const response = await fetch(`${CLOUD_FUNCTION_URL}?operation=search_stream`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ operation: 'search_stream', query, ...(filters ? { filters } : {}) })
+    });
+    if (!response.ok || !response.body) {
+      const data = await response.json().catch(() => ({}));
+      throw new Error(data.error || `Search failed: ${response.status}`);
+    }
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let answer = '';
+    let citations = [];
+    
+    // Server-sent events are separated by a blank line
+    const handleEvent = (rawEvent) => {
+      let event = 'message';
+      let data = '';
+      for (const line of rawEvent.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      }
+      const payload = data ? JSON.parse(data) : {};
+      if (event === 'delta') {
+        answer += payload.text;
+        onDelta && onDelta(payload.text);
+      } else if (event === 'citations') {
+        citations = payload.citations;
+        onCitations && onCitations(citations);
+      } else if (event === 'error') {
+        throw new Error(payload.error || 'Search failed');
+      } else if (event === 'done') {
+        return { answer, citations, cached: payload.cached };
+      }
+      return null;
+    };
+    
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const rawEvent = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        const result = handleEvent(rawEvent);
+        if (result) return result;
+      }
+    }
+    return { answer, citations, cached: false };
+  },
+
+  /**
+   * List documents in the File Search store
+   * Without options every document is returned; with pageSize and/or
+   * pageToken only that page is fetched.
+   * @param {Object} options - Optional pageSize (at most 20) and pageToken (next_page_token of the previous page)
+   * @returns {Promise} - {documents, next_page_token}
    */
-  async listDocuments() {
+  async listDocuments({ pageSize, pageToken } = {}) {
     try {
       console.log('[FileSearchAPI] Listing documents');
       
       const response = await apiClient.post('', {
-        operation: 'list'
+        operation: 'list',
+        ...(pageSize ? { page_size: pageSize } : {}),
+        ...(pageToken ? { page_token: pageToken } : {})
       });
       
       console.log('[FileSearchAPI] Documents:', response.data);
@@ -135,6 +283,37 @@ const fileSearchAPI = {
       console.error('[FileSearchAPI] Delete error:', error);
       throw new Error(error.response?.data?.error || error.message || 'Delete failed');
     }
+  },
+
+  /**
+   * Delete many documents in one request, either by name or by selecting them
+   * with a display-name prefix and/or metadata; the Cloud Function deletes
+   * them a few at a time
+   * @param {Object} selection - {documentNames} or {displayNamePrefix, metadata}
+   * @param {boolean} selection.dryRun - Only return the documents that would be deleted
+   * @returns {Promise} - {results: per-document outcomes, succeeded, failed, elapsed_ms}
+   */
+  async bulkDeleteDocuments({ documentNames, displayNamePrefix, metadata, dryRun = false } = {}) {
+    try {
+      console.log('[FileSearchAPI] Bulk deleting:', documentNames ? `${documentNames.length} documents` : { displayNamePrefix, metadata });
+      
+      const response = await apiClient.post('', {
+        operation: 'bulk_delete',
+        document_names: documentNames,
+        display_name_prefix: displayNamePrefix,
+        metadata,
+        dry_run: dryRun
+      }, {
+        // Waits for every deletion to finish
+        timeout: 0
+      });
+      
+      console.log('[FileSearchAPI] Bulk delete finished:', response.data);
+      return response.data;
+    } catch (error) {
+      console.error('[FileSearchAPI] Bulk delete error:', error);
+      throw new Error(error.response?.data?.error || error.message || 'Bulk delete failed');
+    }
   }
 };
 
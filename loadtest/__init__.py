@@ -0,0 +1,8 @@
+"""
+Offline load-test harness.
+
+Runs concurrent sessions through the agent pipeline (root_agent) and the
+File Search Cloud Function handlers against a local fake of the Gemini API
+(see fake_gemini.py), and reports throughput, per-stage latency percentiles
+and event-loop blocking. See run.py for usage.
+"""
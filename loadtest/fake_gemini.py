@@ -0,0 +1,415 @@
+"""
+Local stand-in for the Gemini and File Search REST endpoints.
+
+Serves just enough of the API for the agents and the Cloud Function to run
+end to end without quota:
+
+- models/*:generateContent and :streamGenerateContent (SSE)
+- fileSearchStores list/create/get and fileSearchStores/*/documents list
+
+Model responses are synthesised from the request: calls that declare
+functions get a functionCall (the router picks business_data_agent or
+risk_analysis_agent from the query wording), calls with a response schema get
+JSON matching the schema, and File Search calls get text with grounding
+metadata. Latency and output length are drawn from log-normal distributions
+so runs look like real traffic but are reproducible with --seed.
+
+Usage:
+    python -m loadtest.fake_gemini --port 8765 --latency-ms 400 --tokens 200
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+STORE_ID = "fileSearchStores/loadtest-store"
+
+_WORDS = (
+    "data processing personal consent retention controller processor transfer "
+    "security breach notification access erasure portability profiling risk "
+    "assessment lawful basis legitimate interest customer employee vendor "
+    "record audit policy encryption minimisation purpose limitation"
+).split()
+
+_RISK_WORDS = re.compile(r"risk|complian|gdpr|ccpa|hipaa|regulat|violat|gap", re.IGNORECASE)
+
+
+class FakeGeminiConfig:
+    """Latency and output-size distributions for the fake server."""
+
+    def __init__(
+        self,
+        latency_ms: float = 400.0,
+        latency_sigma: float = 0.3,
+        tokens: int = 200,
+        tokens_sigma: float = 0.5,
+        token_ms: float = 2.0,
+        citations: int = 5,
+        error_rate: float = 0.0,
+        store_display_name: str = "data_v1",
+        documents: int = 25,
+        seed: Optional[int] = None
+    ):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.tokens = tokens
+        self.tokens_sigma = tokens_sigma
+        self.token_ms = token_ms
+        self.citations = citations
+        self.error_rate = error_rate
+        self.store_display_name = store_display_name
+        self.documents = documents
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def first_token_delay(self) -> float:
+        """Seconds before the first byte of a response."""
+        return self._lognormal(self.latency_ms, self.latency_sigma) / 1000.0
+
+    def output_tokens(self) -> int:
+        return max(1, int(self._lognormal(self.tokens, self.tokens_sigma)))
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def words(self, count: int, seed_text: str = "") -> str:
+        with self._lock:
+            picks = [self._random.choice(_WORDS) for _ in range(count)]
+        prefix = " ".join(seed_text.split()[:8])
+        return (prefix + " " if prefix else "") + " ".join(picks)
+
+    def _lognormal(self, mean: float, sigma: float) -> float:
+        if mean <= 0:
+            return 0.0
+        # Parameterised so the distribution's mean is `mean`
+        mu = math.log(mean) - sigma * sigma / 2
+        with self._lock:
+            return self._random.lognormvariate(mu, sigma)
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    """Request handler; the server's `config` attribute holds FakeGeminiConfig."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # Per-request access logs would dominate the harness output
+        pass
+
+    @property
+    def config(self) -> FakeGeminiConfig:
+        return self.server.config
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/healthz":
+            return self._json({"ok": True})
+        if re.fullmatch(r"/v1\w*/fileSearchStores", path):
+            return self._json({"fileSearchStores": [self._store()]})
+        if re.fullmatch(r"/v1\w*/fileSearchStores/[^/]+/documents", path):
+            return self._list_documents()
+        if re.fullmatch(r"/v1\w*/fileSearchStores/[^/]+", path):
+            return self._json(self._store())
+        return self._json({"error": {"code": 404, "message": f"Unknown path {path}", "status": "NOT_FOUND"}}, 404)
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        body = self._read_json()
+        if re.fullmatch(r"/v1\w*/fileSearchStores", path):
+            return self._json(self._store())
+
+        match = re.fullmatch(r"/v1\w*/models/([^:]+):(generateContent|streamGenerateContent)", path)
+        if not match:
+            return self._json({"error": {"code": 404, "message": f"Unknown path {path}", "status": "NOT_FOUND"}}, 404)
+
+        time.sleep(self.config.first_token_delay())
+        if self.config.should_fail():
+            return self._json({"error": {"code": 503, "message": "Injected failure", "status": "UNAVAILABLE"}}, 503)
+
+        response = self._model_response(body)
+        if match.group(2) == "streamGenerateContent":
+            return self._stream(response)
+        time.sleep(self.config.token_ms * response["usageMetadata"]["candidatesTokenCount"] / 1000.0)
+        return self._json(response)
+
+    # Model responses
+
+    def _model_response(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        query = _last_user_text(body.get("contents") or [])
+        tools = body.get("tools") or []
+        declarations = [d for tool in tools for d in tool.get("functionDeclarations") or []]
+        generation_config = body.get("generationConfig") or {}
+        schema = generation_config.get("responseJsonSchema") or generation_config.get("responseSchema")
+        grounding = None
+
+        if declarations and not _answered_function_call(body.get("contents") or []):
+            part = {"functionCall": _function_call(declarations, query)}
+            tokens = 20
+        elif schema:
+            part = {"text": json.dumps(_instance(schema, self.config, query, schema))}
+            tokens = len(part["text"]) // 4
+        else:
+            tokens = self.config.output_tokens()
+            part = {"text": self.config.words(tokens, query)}
+            if any("fileSearch" in tool for tool in tools):
+                grounding = self._grounding(query)
+
+        candidate = {"content": {"role": "model", "parts": [part]}, "finishReason": "STOP", "index": 0}
+        if grounding:
+            candidate["groundingMetadata"] = grounding
+        prompt_tokens = len(json.dumps(body.get("contents") or [])) // 4
+        return {
+            "candidates": [candidate],
+            "usageMetadata": {
+                "promptTokenCount": prompt_tokens,
+                "candidatesTokenCount": tokens,
+                "totalTokenCount": prompt_tokens + tokens,
+            },
+            "modelVersion": "fake-gemini",
+        }
+
+    def _grounding(self, query: str) -> Dict[str, Any]:
+        chunks, supports = [], []
+        for i in range(self.config.citations):
+            chunks.append({"retrievedContext": {
+                "title": f"document_{i % max(1, self.config.documents)}.txt",
+                "text": self.config.words(80, query),
+                "uri": f"{STORE_ID}/documents/doc-{i}",
+            }})
+            supports.append({
+                "segment": {"startIndex": i * 10, "endIndex": i * 10 + 9},
+                "groundingChunkIndices": [i],
+                "confidenceScores": [round(0.9 - i * 0.05, 2)],
+            })
+        return {"groundingChunks": chunks, "groundingSupports": supports}
+
+    def _stream(self, response: Dict[str, Any]) -> None:
+        candidate = response["candidates"][0]
+        text = candidate["content"]["parts"][0].get("text")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        if text is None:
+            self._chunk(f"data: {json.dumps(response)}\r\n\r\n")
+        else:
+            words = text.split(" ")
+            step = 20
+            for start in range(0, len(words), step):
+                last = start + step >= len(words)
+                piece = " ".join(words[start:start + step]) + ("" if last else " ")
+                chunk_candidate = {"content": {"role": "model", "parts": [{"text": piece}]}, "index": 0}
+                if last:
+                    chunk_candidate["finishReason"] = "STOP"
+                    if "groundingMetadata" in candidate:
+                        chunk_candidate["groundingMetadata"] = candidate["groundingMetadata"]
+                chunk = {"candidates": [chunk_candidate]}
+                if last:
+                    chunk["usageMetadata"] = response["usageMetadata"]
+                time.sleep(self.config.token_ms * min(step, len(words) - start) / 1000.0)
+                self._chunk(f"data: {json.dumps(chunk)}\r\n\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    # File Search resources
+
+    def _store(self) -> Dict[str, Any]:
+        return {
+            "name": STORE_ID,
+            "displayName": self.config.store_display_name,
+            "activeDocumentsCount": str(self.config.documents),
+            "sizeBytes": str(self.config.documents * 10000),
+            "updateTime": "2025-01-01T00:00:00Z",
+        }
+
+    def _list_documents(self) -> None:
+        params = parse_qs(urlparse(self.path).query)
+        page_size = int(params.get("pageSize", ["20"])[0])
+        start = int(params.get("pageToken", ["0"])[0] or 0)
+        end = min(start + page_size, self.config.documents)
+        documents = [{
+            "name": f"{STORE_ID}/documents/doc-{i}",
+            "displayName": f"document_{i}.txt",
+            "state": "STATE_ACTIVE",
+            "sizeBytes": "10000",
+            "mimeType": "text/plain",
+            "createTime": "2025-01-01T00:00:00Z",
+            "updateTime": "2025-01-01T00:00:00Z",
+        } for i in range(start, end)]
+        payload = {"documents": documents}
+        if end < self.config.documents:
+            payload["nextPageToken"] = str(end)
+        return self._json(payload)
+
+    # Plumbing
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return {}
+
+    def _json(self, payload: Dict[str, Any], status: int = 200) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _chunk(self, text: str) -> None:
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+def _last_user_text(contents: List[Dict[str, Any]]) -> str:
+    for content in reversed(contents):
+        for part in content.get("parts") or []:
+            if content.get("role", "user") == "user" and part.get("text"):
+                return part["text"]
+    return ""
+
+
+def _answered_function_call(contents: List[Dict[str, Any]]) -> bool:
+    """True if the conversation ends with a function response (time to answer)."""
+    if not contents:
+        return False
+    return any("functionResponse" in part for part in contents[-1].get("parts") or [])
+
+
+def _function_call(declarations: List[Dict[str, Any]], query: str) -> Dict[str, Any]:
+    names = [d.get("name") for d in declarations]
+    if "risk_analysis_agent" in names and "business_data_agent" in names:
+        name = "risk_analysis_agent" if _RISK_WORDS.search(query) else "business_data_agent"
+    elif "search_many" in names:
+        name = "search_many"
+    else:
+        name = names[0]
+    declaration = declarations[names.index(name)]
+    return {"name": name, "args": _function_args(declaration, query)}
+
+
+def _function_args(declaration: Dict[str, Any], query: str) -> Dict[str, Any]:
+    schema = (
+        declaration.get("parametersJsonSchema")
+        or declaration.get("parameters_json_schema")
+        or declaration.get("parameters")
+        or {}
+    )
+    properties = schema.get("properties") or {}
+    wanted = schema.get("required") or [
+        name for name in properties if name in ("query", "request", "queries")
+    ] or list(properties)[:1]
+    args = {}
+    for name in wanted:
+        kind = str(_schema_type(properties.get(name) or {})).lower()
+        args[name] = [query] if kind == "array" else query
+    return args
+
+
+def _schema_type(schema: Dict[str, Any]) -> Optional[str]:
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), None)
+    if kind is None:
+        for option in schema.get("anyOf") or []:
+            if _schema_type(option) not in (None, "null", "NULL"):
+                return _schema_type(option)
+    return kind
+
+
+def _instance(schema: Dict[str, Any], config: FakeGeminiConfig, query: str, root: Dict[str, Any]) -> Any:
+    """A value matching a (JSON or Gemini) schema."""
+    if "$ref" in schema:
+        name = schema["$ref"].split("/")[-1]
+        return _instance((root.get("$defs") or root.get("definitions") or {})[name], config, query, root)
+    if "anyOf" in schema and not schema.get("type"):
+        options = [o for o in schema["anyOf"] if str(_schema_type(o)).lower() != "null"]
+        return _instance(options[0], config, query, root) if options else None
+    if schema.get("enum"):
+        return schema["enum"][0]
+
+    kind = str(_schema_type(schema)).lower()
+    if kind == "object":
+        return {
+            name: _instance(prop, config, query, root)
+            for name, prop in (schema.get("properties") or {}).items()
+        }
+    if kind == "array":
+        return [_instance(schema.get("items") or {"type": "string"}, config, query, root) for _ in range(2)]
+    if kind == "integer":
+        return 1
+    if kind == "number":
+        return 0.5
+    if kind == "boolean":
+        return True
+    return config.words(max(1, config.output_tokens() // 10), query)
+
+
+def start_server(config: FakeGeminiConfig, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Start the fake server in a background thread; returns the server (see server_address)."""
+    server = ThreadingHTTPServer((host, port), FakeGeminiHandler)
+    server.daemon_threads = True
+    server.config = config
+    threading.Thread(target=server.serve_forever, name="fake-gemini", daemon=True).start()
+    return server
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Command-line options for FakeGeminiConfig (shared with loadtest.run)."""
+    parser.add_argument("--latency-ms", type=float, default=400.0, help="Mean time to first token")
+    parser.add_argument("--latency-sigma", type=float, default=0.3, help="Log-normal sigma of the latency")
+    parser.add_argument("--tokens", type=int, default=200, help="Mean output tokens per response")
+    parser.add_argument("--tokens-sigma", type=float, default=0.5, help="Log-normal sigma of output tokens")
+    parser.add_argument("--token-ms", type=float, default=2.0, help="Generation time per output token")
+    parser.add_argument("--citations", type=int, default=5, help="Grounding chunks per File Search answer")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of model calls failing with 503")
+    parser.add_argument("--documents", type=int, default=25, help="Documents reported in the store")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible runs")
+
+
+def config_from_args(args: argparse.Namespace) -> FakeGeminiConfig:
+    return FakeGeminiConfig(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        tokens=args.tokens,
+        tokens_sigma=args.tokens_sigma,
+        token_ms=args.token_ms,
+        citations=args.citations,
+        error_rate=args.error_rate,
+        documents=args.documents,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Gemini / File Search API server for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), FakeGeminiHandler)
+    server.daemon_threads = True
+    server.config = config_from_args(args)
+    print(f"[FAKE_GEMINI] Listening on http://{args.host}:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""
+Load-test runner.
+
+Starts the fake Gemini server in a subprocess (so its threads don't skew the
+event-loop measurements), points the SDK at it through GOOGLE_GEMINI_BASE_URL
+and drives concurrent sessions through:
+
+- agent: root_agent (DocumentSearchAgent) via an ADK InMemoryRunner, with a
+  plugin timing every agent, model call and tool call (including the
+  sub-agents run through AgentTool)
+- cloud_function: the File Search Cloud Function handlers (search,
+  search_stream, list, stats), called through Flask request contexts
+
+Usage:
+    python -m loadtest.run --target agent --sessions 200 --concurrency 20
+    python -m loadtest.run --target cloud_function --sessions 500 --concurrency 50 \\
+        --latency-ms 300 --json report.json
+
+The answer cache is disabled by default so every session reaches the model;
+pass --answer-cache to measure cached behaviour.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from .fake_gemini import add_arguments
+from .stats import LatencyRecorder, LoopLagMonitor, format_report
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BUSINESS_QUERIES = [
+    "How do we handle customer onboarding?",
+    "What personal data does the employee monitoring process collect?",
+    "Which vendors receive customer data?",
+    "How long do we retain healthcare patient records?",
+    "Describe the marketing campaign process.",
+]
+
+RISK_QUERIES = [
+    "What are the GDPR compliance risks in our customer onboarding process?",
+    "Assess CCPA risk for the advertising monetization process.",
+    "Identify HIPAA compliance gaps in healthcare patient analytics.",
+    "What are the regulatory risks of our AI automated decision making?",
+]
+
+
+def start_fake_server(args: argparse.Namespace) -> tuple:
+    """Launch loadtest.fake_gemini in a subprocess; returns (process, base_url)."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    command = [
+        sys.executable, "-m", "loadtest.fake_gemini", "--port", str(port),
+        "--latency-ms", str(args.latency_ms), "--latency-sigma", str(args.latency_sigma),
+        "--tokens", str(args.tokens), "--tokens-sigma", str(args.tokens_sigma),
+        "--token-ms", str(args.token_ms), "--citations", str(args.citations),
+        "--error-rate", str(args.error_rate), "--documents", str(args.documents),
+    ]
+    if args.seed is not None:
+        command += ["--seed", str(args.seed)]
+    process = subprocess.Popen(command, cwd=REPO_ROOT, stdout=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return process, base_url
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("Fake Gemini server did not start")
+
+
+def configure_environment(base_url: str, answer_cache: bool) -> None:
+    """Point every client at the fake server; must run before agents/ is imported."""
+    os.environ["GOOGLE_GEMINI_BASE_URL"] = base_url
+    os.environ["GOOGLE_GENAI_USE_VERTEXAI"] = "FALSE"
+    os.environ.setdefault("GEMINI_API_KEY", "loadtest")
+    os.environ.setdefault("GOOGLE_API_KEY", "loadtest")
+    os.environ["RETRIEVAL_BACKEND"] = "file_search"
+    if not answer_cache:
+        os.environ["ANSWER_CACHE_SIZE"] = "0"
+        os.environ.pop("ANSWER_CACHE_DIR", None)
+
+
+def pick_query(rng: random.Random, risk_ratio: float) -> str:
+    return rng.choice(RISK_QUERIES if rng.random() < risk_ratio else BUSINESS_QUERIES)
+
+
+# Agent pipeline
+
+def stage_timer_plugin(recorder: LatencyRecorder):
+    """ADK plugin recording agent, model and tool durations as stages."""
+    from google.adk.plugins.base_plugin import BasePlugin
+
+    class StageTimerPlugin(BasePlugin):
+        def __init__(self):
+            super().__init__(name="loadtest_stage_timer")
+            self._starts: Dict[tuple, float] = {}
+
+        def _start(self, key: tuple) -> None:
+            self._starts[key] = time.perf_counter()
+
+        def _stop(self, key: tuple, stage: str, error: bool = False) -> None:
+            start = self._starts.pop(key, None)
+            if start is not None:
+                recorder.record(stage, time.perf_counter() - start, error)
+
+        async def before_agent_callback(self, *, agent, callback_context):
+            self._start(("agent", callback_context.invocation_id, agent.name))
+
+        async def after_agent_callback(self, *, agent, callback_context):
+            self._stop(("agent", callback_context.invocation_id, agent.name), f"agent:{agent.name}")
+
+        async def before_model_callback(self, *, callback_context, llm_request):
+            self._start(("model", callback_context.invocation_id, callback_context.agent_name))
+
+        async def after_model_callback(self, *, callback_context, llm_response):
+            key = ("model", callback_context.invocation_id, callback_context.agent_name)
+            self._stop(key, f"model:{callback_context.agent_name}", bool(llm_response.error_code))
+
+        async def on_model_error_callback(self, *, callback_context, llm_request, error):
+            key = ("model", callback_context.invocation_id, callback_context.agent_name)
+            self._stop(key, f"model:{callback_context.agent_name}", error=True)
+
+        async def before_tool_callback(self, *, tool, tool_args, tool_context):
+            self._start(("tool", tool_context.function_call_id))
+
+        async def after_tool_callback(self, *, tool, tool_args, tool_context, result):
+            error = isinstance(result, dict) and result.get("success") is False
+            self._stop(("tool", tool_context.function_call_id), f"tool:{tool.name}", error)
+
+        async def on_tool_error_callback(self, *, tool, tool_args, tool_context, error):
+            self._stop(("tool", tool_context.function_call_id), f"tool:{tool.name}", error=True)
+
+    return StageTimerPlugin()
+
+
+async def run_agent_sessions(args: argparse.Namespace, recorder: LatencyRecorder) -> int:
+    """Drive args.sessions sessions through root_agent; returns the number that failed."""
+    from google.adk.runners import InMemoryRunner
+    from google.genai import types
+    from agents import root_agent
+
+    runner = InMemoryRunner(agent=root_agent, app_name="loadtest", plugins=[stage_timer_plugin(recorder)])
+    rng = random.Random(args.seed)
+    queries = [pick_query(rng, args.risk_ratio) for _ in range(args.sessions)]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    failed = 0
+
+    async def session(query: str) -> None:
+        nonlocal failed
+        async with semaphore:
+            start = time.perf_counter()
+            error = False
+            try:
+                user_id = f"user-{uuid.uuid4().hex[:8]}"
+                created = await runner.session_service.create_session(app_name="loadtest", user_id=user_id)
+                message = types.Content(role="user", parts=[types.Part(text=query)])
+                first_event = None
+                async for event in runner.run_async(user_id=user_id, session_id=created.id, new_message=message):
+                    if first_event is None:
+                        first_event = time.perf_counter()
+                        recorder.record("session:first_event", first_event - start)
+                    if event.error_code:
+                        error = True
+            except Exception as e:
+                error = True
+                if args.verbose:
+                    print(f"[LOADTEST] Session failed: {str(e)}", file=sys.stderr)
+            recorder.record("session:total", time.perf_counter() - start, error)
+            if error:
+                failed += 1
+
+    await asyncio.gather(*(session(q) for q in queries))
+    await runner.close()
+    return failed
+
+
+# Cloud Function handlers
+
+CF_OPERATIONS = ("search", "search_stream", "list", "stats")
+
+
+async def run_cloud_function_sessions(args: argparse.Namespace, recorder: LatencyRecorder) -> int:
+    """Call the Cloud Function handlers concurrently from a thread pool, like the Functions runtime."""
+    sys.path.insert(0, os.path.join(REPO_ROOT, "cloud_functions", "file_search_api"))
+    import main as cloud_function
+
+    from flask import Flask
+    app = Flask("loadtest")
+    rng = random.Random(args.seed)
+    weights = [float(w) for w in args.cf_mix.split(",")]
+    jobs = [
+        (rng.choices(CF_OPERATIONS, weights=weights)[0], pick_query(rng, args.risk_ratio))
+        for _ in range(args.sessions)
+    ]
+
+    def call(operation: str, query: str) -> bool:
+        body = {"operation": operation, "query": query}
+        start = time.perf_counter()
+        error = False
+        with app.test_request_context("/", method="POST", json=body):
+            from flask import request
+            response = app.make_response(cloud_function.file_search_api(request))
+            if response.is_streamed:
+                first = None
+                for chunk in response.response:
+                    if first is None:
+                        first = time.perf_counter()
+                        recorder.record(f"cf:{operation}:first_byte", first - start)
+                    if b"event: error" in (chunk if isinstance(chunk, bytes) else chunk.encode()):
+                        error = True
+            else:
+                error = response.status_code >= 400 or not (response.get_json(silent=True) or {}).get("success")
+        recorder.record(f"cf:{operation}", time.perf_counter() - start, error)
+        return error
+
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = await asyncio.gather(*(loop.run_in_executor(pool, call, op, q) for op, q in jobs))
+    return sum(results)
+
+
+# Entry point
+
+@contextlib.contextmanager
+def _quiet_output():
+    """Send prints and log records to a discarded buffer."""
+    import logging
+    sink = io.StringIO()
+    handlers = [h for h in logging.getLogger().handlers if isinstance(h, logging.StreamHandler)]
+    streams = [h.setStream(sink) for h in handlers]
+    try:
+        # Handlers created while agents/ is imported bind to the redirected stderr
+        with contextlib.redirect_stdout(sink), contextlib.redirect_stderr(sink):
+            yield
+    finally:
+        for handler, stream in zip(handlers, streams):
+            handler.setStream(stream)
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    recorder = LatencyRecorder()
+    monitor = LoopLagMonitor()
+    monitor.start()
+    start = time.perf_counter()
+
+    # Agents and tools print and log on every call; keep that work but not on the terminal
+    with contextlib.nullcontext() if args.verbose else _quiet_output():
+        if args.target == "agent":
+            failed = await run_agent_sessions(args, recorder)
+        else:
+            failed = await run_cloud_function_sessions(args, recorder)
+
+    elapsed = time.perf_counter() - start
+    await monitor.stop()
+    return {
+        "target": args.target,
+        "sessions": args.sessions,
+        "concurrency": args.concurrency,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_per_s": round(args.sessions / elapsed, 2) if elapsed > 0 else 0.0,
+        "failed": failed,
+        "stages": recorder.summary(elapsed),
+        "event_loop": monitor.summary(),
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline load test for the agents and the File Search Cloud Function")
+    parser.add_argument("--target", choices=("agent", "cloud_function"), default="agent")
+    parser.add_argument("--sessions", type=int, default=50, help="Total sessions / requests")
+    parser.add_argument("--concurrency", type=int, default=10, help="Sessions in flight at once")
+    parser.add_argument("--risk-ratio", type=float, default=0.5, help="Fraction of risk-analysis queries")
+    parser.add_argument("--cf-mix", default="6,2,1,1",
+                        help="Relative weights of Cloud Function operations: " + ",".join(CF_OPERATIONS))
+    parser.add_argument("--answer-cache", action="store_true", help="Keep the answer cache enabled")
+    parser.add_argument("--fake-url", help="Use an already running fake server instead of starting one")
+    parser.add_argument("--json", dest="json_path", help="Also write the report as JSON to this path")
+    parser.add_argument("--verbose", action="store_true", help="Show agent/tool output and session errors")
+    add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    process = None
+    base_url = args.fake_url
+    if not base_url:
+        process, base_url = start_fake_server(args)
+    try:
+        configure_environment(base_url, args.answer_cache)
+        report = asyncio.run(run(args))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    print(format_report(report))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
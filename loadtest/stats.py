@@ -0,0 +1,119 @@
+"""
+Latency recording and reporting for the load-test harness.
+"""
+import asyncio
+import math
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class LatencyRecorder:
+    """Thread-safe per-stage latency samples and error counts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples: Dict[str, List[float]] = defaultdict(list)
+        self._errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, stage: str, seconds: float, error: bool = False) -> None:
+        with self._lock:
+            self._samples[stage].append(seconds)
+            if error:
+                self._errors[stage] += 1
+
+    def summary(self, elapsed: float) -> Dict[str, Dict[str, Any]]:
+        """Per-stage count, errors, throughput and latency percentiles (ms)."""
+        with self._lock:
+            samples = {stage: sorted(values) for stage, values in self._samples.items()}
+            errors = dict(self._errors)
+        summary = {}
+        for stage in sorted(samples):
+            values = samples[stage]
+            summary[stage] = {
+                "count": len(values),
+                "errors": errors.get(stage, 0),
+                "throughput_per_s": round(len(values) / elapsed, 2) if elapsed > 0 else 0.0,
+                "mean_ms": round(1000 * sum(values) / len(values), 1),
+                "p50_ms": round(1000 * percentile(values, 50), 1),
+                "p95_ms": round(1000 * percentile(values, 95), 1),
+                "p99_ms": round(1000 * percentile(values, 99), 1),
+                "max_ms": round(1000 * values[-1], 1),
+            }
+        return summary
+
+
+class LoopLagMonitor:
+    """
+    Measures event-loop blocking by scheduling a timer every `interval` seconds
+    and recording how late it fires.
+    """
+
+    def __init__(self, interval: float = 0.01, threshold: float = 0.005):
+        self.interval = interval
+        self.threshold = threshold
+        self.lags: List[float] = []
+        self.blocked_seconds = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = time.perf_counter() - start - self.interval
+            self.lags.append(lag)
+            if lag > self.threshold:
+                self.blocked_seconds += lag
+
+    def summary(self) -> Dict[str, Any]:
+        lags = sorted(self.lags)
+        return {
+            "samples": len(lags),
+            "p50_ms": round(1000 * percentile(lags, 50), 2),
+            "p99_ms": round(1000 * percentile(lags, 99), 2),
+            "max_ms": round(1000 * lags[-1], 2) if lags else 0.0,
+            "blocked_ms": round(1000 * self.blocked_seconds, 1),
+        }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Human-readable table for a run report (see loadtest.run)."""
+    lines = [
+        f"Target: {report['target']}  sessions: {report['sessions']}  concurrency: {report['concurrency']}",
+        f"Elapsed: {report['elapsed_s']}s  throughput: {report['throughput_per_s']} sessions/s  "
+        f"failed: {report['failed']}",
+        "",
+        f"{'stage':<48}{'count':>7}{'err':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}",
+    ]
+    for stage, row in report["stages"].items():
+        lines.append(
+            f"{stage:<48}{row['count']:>7}{row['errors']:>6}{row['p50_ms']:>10}{row['p95_ms']:>10}"
+            f"{row['p99_ms']:>10}{row['max_ms']:>10}"
+        )
+    lag = report["event_loop"]
+    lines += [
+        "",
+        f"Event loop lag: p50 {lag['p50_ms']}ms  p99 {lag['p99_ms']}ms  max {lag['max_ms']}ms  "
+        f"blocked {lag['blocked_ms']}ms over {lag['samples']} samples",
+    ]
+    return "\n".join(lines)
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Incremental sync of the local corpus (data/ and regulations/) to the File Search store.
+
+Keeps a manifest of every synced file: its content hash and the store
+document it was uploaded as. Each run:
+
+1. Hashes the local files (files whose size and mtime match the manifest
+   reuse the recorded hash, so unchanged files are not even read)
+2. Lists the store through the File Search Cloud Function
+3. Uploads new and changed files, and files whose document disappeared from
+   the store; byte-identical duplicates of a file already in the store (with
+   the same inferred metadata) are recorded without uploading them again
+4. Deletes the documents of changed and removed files
+
+Uploads run in parallel and deletes go through bulk_delete. Documents in the store that the
+manifest doesn't know about (e.g. uploaded from the UI) are left alone.
+
+Usage:
+    python sync_corpus.py --url https://.../file-search-api [--dry-run] [--no-delete]
+
+Environment:
+    FILE_SEARCH_URL: Cloud Function URL (default for --url; REACT_APP_FILE_SEARCH_URL also works)
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# search_filters is shared with the agent tools and the Cloud Function
+sys.path.append(os.path.join(REPO_ROOT, 'agents', 'tools'))
+from search_filters import infer_metadata  # noqa: E402
+
+DEFAULT_DIRS = ['data', 'regulations']
+DEFAULT_MANIFEST = os.path.join(REPO_ROOT, '.corpus_manifest.json')
+EXTENSIONS = {'.txt': 'text/plain', '.md': 'text/plain', '.pdf': 'application/pdf'}
+
+# Seconds spent waiting for uploads to be indexed (to learn their document names)
+INDEX_WAIT = 300
+
+# Documents per bulk_delete request (the Cloud Function accepts up to 500)
+BULK_DELETE_BATCH = 100
+
+
+def iter_local_files(dirs: List[str]) -> List[str]:
+    """Corpus files under the directories, as paths relative to the repo root."""
+    paths = []
+    for directory in dirs:
+        root_dir = directory if os.path.isabs(directory) else os.path.join(REPO_ROOT, directory)
+        if not os.path.isdir(root_dir):
+            print(f"[SYNC] Skipping missing directory: {directory}")
+            continue
+        for root, _, files in os.walk(root_dir):
+            for filename in sorted(files):
+                if os.path.splitext(filename)[1].lower() in EXTENSIONS:
+                    paths.append(os.path.relpath(os.path.join(root, filename), REPO_ROOT))
+    return sorted(paths)
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def scan(paths: List[str], manifest_files: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Hash, size and mtime of each local file, reusing the manifest hash of untouched files."""
+    local = {}
+    hashed = 0
+    for relpath in paths:
+        stat = os.stat(os.path.join(REPO_ROOT, relpath))
+        entry = manifest_files.get(relpath) or {}
+        if entry.get('size') == stat.st_size and entry.get('mtime_ns') == stat.st_mtime_ns and entry.get('sha256'):
+            sha256 = entry['sha256']
+        else:
+            sha256 = file_sha256(os.path.join(REPO_ROOT, relpath))
+            hashed += 1
+        local[relpath] = {'sha256': sha256, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    print(f"[SYNC] {len(local)} local files ({hashed} hashed, {len(local) - hashed} unchanged since the last sync)")
+    return local
+
+
+def plan(local: Dict[str, Dict[str, Any]], manifest_files: Dict[str, Any], remote: Dict[str, Any]) -> Dict[str, List]:
+    """
+    Work needed to make the store match the local files.
+
+    Returns {"upload": [relpath], "duplicate": [(relpath, source relpath)],
+    "keep": [relpath], "delete": [(relpath, document_name)]}.
+
+    A duplicate shares the source's document, and with it the source's
+    display name; files with the same content but different inferred metadata
+    (e.g. a copy in regulations/ of a file in data/) are uploaded separately
+    so scoped searches find each of them.
+    """
+    result = {'upload': [], 'duplicate': [], 'keep': [], 'delete': []}
+    # (hash, metadata) -> a file whose content is (or will be) in the store with that metadata
+    in_store: Dict[Tuple[str, str], str] = {}
+
+    def content_key(relpath: str) -> Tuple[str, str]:
+        return local[relpath]['sha256'], json.dumps(infer_metadata(relpath), sort_keys=True)
+
+    def present(entry: Dict[str, Any]) -> bool:
+        # Uploads still being indexed have no document name yet
+        return bool(entry.get('document_name') and entry['document_name'] in remote) or \
+            bool(entry.get('operation_name') and not entry.get('document_name'))
+
+    for relpath, info in local.items():
+        entry = manifest_files.get(relpath)
+        if entry and entry.get('sha256') == info['sha256'] and present(entry):
+            result['keep'].append(relpath)
+            in_store.setdefault(content_key(relpath), relpath)
+
+    kept = set(result['keep'])
+    for relpath, info in local.items():
+        if relpath in kept:
+            continue
+        entry = manifest_files.get(relpath)
+        if entry and entry.get('document_name'):
+            # Changed content: the old document goes once the new one is in place
+            result['delete'].append((relpath, entry['document_name']))
+        key = content_key(relpath)
+        if key in in_store:
+            result['duplicate'].append((relpath, in_store[key]))
+        else:
+            result['upload'].append(relpath)
+            in_store[key] = relpath
+
+    for relpath, entry in manifest_files.items():
+        if relpath not in local and entry.get('document_name'):
+            result['delete'].append((relpath, entry['document_name']))
+
+    # Duplicates share a document: it stays while any kept file refers to it,
+    # and is deleted once even if several files referred to it
+    referenced = {manifest_files[r].get('document_name') for r in result['keep']}
+    deletes, seen = [], set()
+    for relpath, name in result['delete']:
+        if name not in referenced and name not in seen:
+            seen.add(name)
+            deletes.append((relpath, name))
+    result['delete'] = deletes
+    return result
+
+
+def resolve_pending(client: 'FileSearchClient', manifest_files: Dict[str, Any], pool: ThreadPoolExecutor) -> None:
+    """Look up the document names of uploads that were still being indexed at the last sync."""
+    pending = [r for r, entry in manifest_files.items() if entry.get('operation_name') and not entry.get('document_name')]
+    if not pending:
+        return
+
+    def status(relpath: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        try:
+            return relpath, client.call('status', json={'operation_name': manifest_files[relpath]['operation_name']})
+        except Exception as e:
+            print(f"[SYNC] Status of {relpath} unavailable: {e}")
+            return relpath, None
+
+    for relpath, result in pool.map(status, pending):
+        if result is None:
+            continue
+        if result['state'] == 'failed':
+            # Indexing failed: upload it again
+            manifest_files[relpath].pop('operation_name')
+        elif result.get('document_name'):
+            manifest_files[relpath]['document_name'] = result['document_name']
+    print(f"[SYNC] Checked {len(pending)} uploads pending since the last sync")
+
+
+class FileSearchClient:
+    """Minimal client for the File Search Cloud Function, safe to share across threads."""
+
+    def __init__(self, url: str, pool_size: int):
+        self.url = url.rstrip('/')
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def call(self, operation: str, retries: int = 4, partial: bool = False, **kwargs) -> Dict[str, Any]:
+        """
+        Call an operation, retrying rate limits, server errors and connection failures with backoff.
+
+        With `partial`, a response with per-item "results" is returned even if some items failed.
+        """
+        params = {'operation': operation, **kwargs.pop('params', {})}
+        delay = 1.0
+        for attempt in range(retries + 1):
+            try:
+                response = self.session.post(self.url, params=params, timeout=300, **kwargs)
+                if response.status_code not in (429, 500, 502, 503, 504) or attempt == retries:
+                    data = response.json()
+                    if not data.get('success', False) and not (partial and 'results' in data):
+                        raise RuntimeError(data.get('error') or f'{operation} failed: HTTP {response.status_code}')
+                    return data
+            except requests.ConnectionError:
+                if attempt == retries:
+                    raise
+            if 'data' in kwargs and hasattr(kwargs['data'], 'seek'):
+                kwargs['data'].seek(0)
+            time.sleep(random.uniform(delay / 2, delay))
+            delay = min(delay * 2, 30.0)
+        raise RuntimeError(f'{operation} failed')
+
+    def list_documents(self) -> Tuple[str, Dict[str, Any]]:
+        data = self.call('list', json={'operation': 'list'})
+        return data['store_name'], {doc['name']: doc for doc in data['documents']}
+
+    def upload(self, relpath: str) -> Dict[str, Any]:
+        path = os.path.join(REPO_ROOT, relpath)
+        params = {
+            'filename': os.path.basename(relpath),
+            'display_name': os.path.basename(relpath),
+            'mime_type': EXTENSIONS[os.path.splitext(relpath)[1].lower()],
+            'metadata': json.dumps(infer_metadata(relpath)),
+        }
+        # The file object is streamed as the request body
+        with open(path, 'rb') as f:
+            return self.call('upload_stream', params=params, data=f,
+                             headers={'Content-Type': params['mime_type']})
+
+    def document_name(self, operation_name: str, timeout: float) -> Optional[str]:
+        """Document created by an upload operation, waiting up to `timeout` seconds for indexing."""
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = max(0.0, min(20.0, deadline - time.monotonic()))
+            status = self.call('status', json={'operation_name': operation_name, 'wait': wait})
+            if status['state'] == 'failed':
+                raise RuntimeError(status.get('error') or 'indexing failed')
+            if status['done'] or time.monotonic() >= deadline:
+                return status.get('document_name')
+
+    def bulk_delete(self, document_names: List[str]) -> Dict[str, Optional[str]]:
+        """Delete documents, BULK_DELETE_BATCH per request; returns document name -> error (None if deleted)."""
+        errors = {}
+        for start in range(0, len(document_names), BULK_DELETE_BATCH):
+            batch = document_names[start:start + BULK_DELETE_BATCH]
+            data = self.call('bulk_delete', partial=True, json={'operation': 'bulk_delete', 'document_names': batch})
+            for result in data['results']:
+                errors[result['name']] = None if result['success'] else result.get('error', 'delete failed')
+        return errors
+
+
+def load_manifest(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {'files': {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(path: str, manifest: Dict[str, Any]) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def sync(args: argparse.Namespace) -> int:
+    started = time.perf_counter()
+    manifest = load_manifest(args.manifest)
+    client = FileSearchClient(args.url, args.concurrency)
+
+    store_name, remote = client.list_documents()
+    if manifest.get('store_name') not in (None, store_name):
+        print(f"[SYNC] Manifest is for store {manifest['store_name']}, not {store_name}: starting a new manifest")
+        manifest = {'files': {}}
+    manifest['store_name'] = store_name
+    files = manifest['files']
+    print(f"[SYNC] Store {store_name} has {len(remote)} documents")
+
+    pool = ThreadPoolExecutor(max_workers=max(1, args.concurrency))
+    resolve_pending(client, files, pool)
+    local = scan(iter_local_files(args.dirs), files)
+    work = plan(local, files, remote)
+    print(f"[SYNC] {len(work['keep'])} unchanged, {len(work['upload'])} to upload, "
+          f"{len(work['duplicate'])} duplicates, {len(work['delete'])} to delete")
+    if args.dry_run:
+        for relpath in work['upload']:
+            print(f"[SYNC] Would upload {relpath}")
+        for relpath, source in work['duplicate']:
+            print(f"[SYNC] Would skip {relpath} (same content as {source})")
+        for relpath, name in work['delete']:
+            print(f"[SYNC] Would delete {name} ({relpath})")
+        return 0
+
+    failures = 0
+
+    def upload(relpath: str) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+        try:
+            result = client.upload(relpath)
+            document_name = result.get('document_name')
+            if not document_name and not args.no_wait:
+                document_name = client.document_name(result['operation_name'], INDEX_WAIT)
+            return relpath, {'operation_name': result['operation_name'], 'document_name': document_name}, None
+        except Exception as e:
+            return relpath, None, str(e)
+
+    try:
+        uploaded = set()
+        for relpath, result, error in pool.map(upload, work['upload']):
+            if error:
+                failures += 1
+                print(f"[SYNC] Upload failed: {relpath}: {error}")
+                continue
+            uploaded.add(relpath)
+            files[relpath] = dict(local[relpath], **result)
+            print(f"[SYNC] Uploaded {relpath}")
+
+        for relpath, source in work['duplicate']:
+            if source in uploaded or source in work['keep']:
+                uploaded.add(relpath)
+                files[relpath] = dict(local[relpath], document_name=files[source].get('document_name'),
+                                      operation_name=files[source].get('operation_name'), duplicate_of=source)
+
+        for relpath in work['keep']:
+            files[relpath].update(local[relpath])
+
+        # Old documents of changed files are only deleted once their new content is in place
+        deletions = [] if args.no_delete else [
+            (relpath, name) for relpath, name in work['delete'] if relpath not in local or relpath in uploaded
+        ]
+
+        # One bulk_delete request deletes them concurrently on the server
+        try:
+            errors = client.bulk_delete(list(dict.fromkeys(name for _, name in deletions))) if deletions else {}
+        except Exception as e:
+            errors = {name: str(e) for _, name in deletions}
+
+        failed_deletes = set()
+        for relpath, document_name in deletions:
+            error = errors.get(document_name, 'not deleted')
+            if error:
+                failures += 1
+                failed_deletes.add(relpath)
+                print(f"[SYNC] Delete failed: {document_name} ({relpath}): {error}")
+            else:
+                print(f"[SYNC] Deleted {document_name} ({relpath})")
+
+        # Forget removed files, except those whose document still has to be deleted
+        for relpath in [r for r in files if r not in local]:
+            if not args.no_delete and relpath not in failed_deletes:
+                files.pop(relpath)
+    finally:
+        pool.shutdown()
+        save_manifest(args.manifest, manifest)
+
+    print(f"[SYNC] Done in {time.perf_counter() - started:.1f}s: {len(work['upload'])} uploads, "
+          f"{len(deletions)} deletes, {failures} failures -> {args.manifest}")
+    return 1 if failures else 0
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Sync the local corpus to the File Search store")
+    parser.add_argument('--url', default=os.getenv('FILE_SEARCH_URL') or os.getenv('REACT_APP_FILE_SEARCH_URL'),
+                        help='File Search Cloud Function URL')
+    parser.add_argument('--dirs', nargs='+', default=DEFAULT_DIRS, help='Directories to sync (relative to the repo root)')
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST, help='Manifest of synced files')
+    parser.add_argument('--concurrency', type=int, default=4, help='Uploads and deletes running at the same time')
+    parser.add_argument('--dry-run', action='store_true', help='Only show what would change')
+    parser.add_argument('--no-delete', action='store_true', help="Don't delete documents of changed or removed files")
+    parser.add_argument('--no-wait', action='store_true',
+                        help="Don't wait for indexing; document names are recorded on the next sync")
+    args = parser.parse_args(argv)
+    if not args.url:
+        parser.error('--url or FILE_SEARCH_URL is required')
+    sys.exit(sync(args))
+
+
+if __name__ == '__main__':
+    main()
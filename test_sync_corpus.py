@@ -0,0 +1,93 @@
+"""
+Tests for the sync plan of sync_corpus.py.
+
+Run with: python -m pytest test_sync_corpus.py
+"""
+from sync_corpus import plan
+
+
+def _local(**hashes):
+    return {path: {'sha256': sha256, 'size': 1, 'mtime_ns': 1} for path, sha256 in hashes.items()}
+
+
+A = 'data/alpha.txt'
+B = 'data/beta.txt'
+C = 'data/gamma.txt'
+
+
+def test_unchanged_file_is_kept():
+    work = plan(_local(**{A: 'h1'}), {A: {'sha256': 'h1', 'document_name': 'd1'}}, {'d1': {}})
+    assert work == {'upload': [], 'duplicate': [], 'keep': [A], 'delete': []}
+
+
+def test_changed_file_is_uploaded_and_old_document_deleted():
+    work = plan(_local(**{A: 'h2'}), {A: {'sha256': 'h1', 'document_name': 'd1'}}, {'d1': {}})
+    assert work['upload'] == [A]
+    assert work['delete'] == [(A, 'd1')]
+    assert work['keep'] == []
+
+
+def test_file_missing_from_store_is_uploaded_again():
+    work = plan(_local(**{A: 'h1'}), {A: {'sha256': 'h1', 'document_name': 'd1'}}, {})
+    assert work['upload'] == [A]
+    assert work['keep'] == []
+
+
+def test_removed_file_is_deleted():
+    manifest = {
+        A: {'sha256': 'h1', 'document_name': 'd1'},
+        B: {'sha256': 'h2', 'document_name': 'd2'},
+    }
+    work = plan(_local(**{A: 'h1'}), manifest, {'d1': {}, 'd2': {}})
+    assert work['keep'] == [A]
+    assert work['delete'] == [(B, 'd2')]
+
+
+def test_duplicate_of_kept_file_is_not_uploaded():
+    work = plan(_local(**{A: 'h1', B: 'h1'}), {A: {'sha256': 'h1', 'document_name': 'd1'}}, {'d1': {}})
+    assert work['keep'] == [A]
+    assert work['duplicate'] == [(B, A)]
+    assert work['upload'] == []
+
+
+def test_duplicate_of_changed_file_follows_its_upload():
+    manifest = {
+        A: {'sha256': 'h1', 'document_name': 'd1'},
+        B: {'sha256': 'h1', 'document_name': 'd1', 'duplicate_of': A},
+    }
+    work = plan(_local(**{A: 'h2', B: 'h2'}), manifest, {'d1': {}})
+    assert work['upload'] == [A]
+    assert work['duplicate'] == [(B, A)]
+    # The shared document is deleted once
+    assert work['delete'] == [(A, 'd1')]
+
+
+def test_shared_document_stays_while_a_kept_file_refers_to_it():
+    manifest = {
+        A: {'sha256': 'h1', 'document_name': 'd1'},
+        B: {'sha256': 'h1', 'document_name': 'd1', 'duplicate_of': A},
+    }
+    work = plan(_local(**{A: 'h1'}), manifest, {'d1': {}})
+    assert work['keep'] == [A]
+    assert work['delete'] == []
+
+
+def test_duplicate_with_different_metadata_is_uploaded():
+    regulation = 'regulations/alpha.txt'
+    work = plan(_local(**{A: 'h1', regulation: 'h1'}), {A: {'sha256': 'h1', 'document_name': 'd1'}}, {'d1': {}})
+    assert work['keep'] == [A]
+    assert work['upload'] == [regulation]
+    assert work['duplicate'] == []
+
+
+def test_pending_upload_is_kept():
+    manifest = {C: {'sha256': 'h3', 'operation_name': 'op1'}}
+    work = plan(_local(**{C: 'h3'}), manifest, {})
+    assert work == {'upload': [], 'duplicate': [], 'keep': [C], 'delete': []}
+
+
+def test_pending_upload_of_changed_file_is_uploaded_again():
+    manifest = {C: {'sha256': 'h3', 'operation_name': 'op1'}}
+    work = plan(_local(**{C: 'h4'}), manifest, {})
+    assert work['upload'] == [C]
+    assert work['delete'] == []
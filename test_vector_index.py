@@ -0,0 +1,77 @@
+"""
+Crash-recovery tests for the memory-mapped vector index.
+
+Run with: python -m pytest test_vector_index.py
+"""
+import os
+
+import numpy as np
+
+from agents.retrieval.vector_index import VectorIndex
+
+DIM = 4
+
+
+def _vectors(n, offset=0):
+    vectors = np.zeros((n, DIM), dtype=np.float32)
+    for i in range(n):
+        vectors[i, (i + offset) % DIM] = 1.0
+    return vectors
+
+
+def _rows(n, offset=0):
+    return [{"path": f"doc{i + offset}.txt", "text": f"chunk {i + offset}"} for i in range(n)]
+
+
+def test_orphaned_files_without_header_are_reset(tmp_path):
+    # First sync killed after appending but before save_header
+    index = VectorIndex(str(tmp_path), DIM, "test")
+    index.append(_vectors(2), _rows(2))
+    assert not os.path.exists(index.header_path)
+
+    index = VectorIndex(str(tmp_path), DIM, "test")
+    assert index.count == 0
+    assert not os.path.exists(index.vectors_path)
+
+    new = _vectors(1, offset=3)
+    index.append(new, _rows(1, offset=3))
+    assert np.array_equal(index.vector(0), new[0])
+
+
+def test_vectors_written_without_rows_are_truncated(tmp_path):
+    index = VectorIndex(str(tmp_path), DIM, "test")
+    index.append(_vectors(2), _rows(2))
+    index.save_header()
+
+    # Crash between the vectors and rows writes of the next append
+    with open(index.vectors_path, "ab") as f:
+        f.write(_vectors(1, offset=2).tobytes())
+
+    index = VectorIndex(str(tmp_path), DIM, "test")
+    assert index.count == 2
+    assert os.path.getsize(index.vectors_path) == 2 * DIM * 4
+
+    new = _vectors(1, offset=3)
+    added = index.append(new, _rows(1, offset=3))
+    assert list(added) == [2]
+    assert np.array_equal(index.vector(2), new[0])
+
+
+def test_rows_appended_after_header_are_truncated(tmp_path):
+    index = VectorIndex(str(tmp_path), DIM, "test")
+    index.append(_vectors(2), _rows(2))
+    index.save_header()
+    # Crash between a complete append and save_header
+    index.append(_vectors(1, offset=2), _rows(1, offset=2))
+
+    index = VectorIndex(str(tmp_path), DIM, "test")
+    assert index.count == 2
+    assert os.path.getsize(index.vectors_path) == 2 * DIM * 4
+    with open(index.rows_path, "r", encoding="utf-8") as f:
+        assert len(f.readlines()) == 2
+
+
+def test_search_with_no_results_requested(tmp_path):
+    index = VectorIndex(str(tmp_path), DIM, "test")
+    index.append(_vectors(2), _rows(2))
+    assert index.search(_vectors(1), top_k=0) == [[]]